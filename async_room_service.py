@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Asyncio serving mode for the Room Availability Service
+
+Serves /room-status, /multi-room-status, /health and /metrics with the same
+JSON as the Flask app, but downloads feeds with aiohttp so one process can
+keep many slow calendar servers in flight without a worker per request.
+Parsing, expansion and status computation are CPU-bound and run on a small
+thread pool (ASYNC_CPU_WORKERS) so they never block the event loop.
+
+The feed and compiled-timeline caches, circuit breakers, background refresh
+and metrics are shared with room_availability_service. Run with:
+
+    gunicorn async_room_service:app --worker-class aiohttp.GunicornWebWorker --bind 0.0.0.0:5000
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp import web
+
+import room_availability_service as service
+from room_availability_service import (
+    DOWNLOAD_BYTES,
+    FEED_CACHE_REQUESTS,
+    FETCH_SECONDS,
+    REQUESTS_IN_FLIGHT,
+    TIMEZONE,
+    UPSTREAM_ERRORS,
+    FeedCacheEntry,
+    FeedTooLargeError,
+    IcsStreamPruner,
+    cache_control,
+    conditional_headers,
+    encode_json_body,
+    feed_metrics_context,
+    matched_etag,
+    multi_room_payload,
+    parse_field_selection,
+    payload_etag,
+    record_timing,
+    requested_rooms,
+    room_status_payload,
+    select_fields,
+    store_feed,
+)
+
+ASYNC_CPU_WORKERS = int(os.environ.get('ASYNC_CPU_WORKERS', '4'))
+
+logger = logging.getLogger(__name__)
+
+
+def _upstream_error_type(error: Exception) -> str:
+    if isinstance(error, asyncio.TimeoutError):
+        return 'timeout'
+    if isinstance(error, aiohttp.ClientResponseError):
+        return 'http_5xx' if error.status >= 500 else 'http_4xx'
+    if isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)):
+        return 'connection'
+    return service._upstream_error_type(error)
+
+
+def _wait_flight(flight) -> asyncio.Future:
+    """Future on the running loop settled with a SingleFlight flight's result, whichever thread finishes it"""
+    loop = asyncio.get_running_loop()
+    waiter = loop.create_future()
+
+    def _settle(flight) -> None:
+        if waiter.done():
+            return
+        if flight.error is not None:
+            waiter.set_exception(flight.error)
+        else:
+            waiter.set_result(flight.result)
+
+    def _finished(flight) -> None:
+        try:
+            loop.call_soon_threadsafe(_settle, flight)
+        except RuntimeError:
+            pass  # The loop was closed while the flight ran
+
+    flight.add_done_callback(_finished)
+    return waiter
+
+
+class AsyncFeedFetcher:
+    """
+    Non-blocking counterpart of get_feed / get_feed_snapshot
+
+    Downloads share FEED_CACHE, FEED_FLIGHTS and the per-host circuit
+    breakers with the threaded fetch path, so concurrent requests and
+    background refreshes for the same URL wait on a single download.
+    CPU-bound work is handed to `cpu_executor`.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, cpu_executor: ThreadPoolExecutor):
+        self.session = session
+        self.cpu_executor = cpu_executor
+        # The event loop only keeps weak references to tasks
+        self._downloads: Set[asyncio.Task] = set()
+
+    async def run_cpu(self, fn, *args):
+        """Run fn on the CPU pool in a copy of the current context (metrics labels, Server-Timing)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.cpu_executor, contextvars.copy_context().run, fn, *args)
+
+    async def get_feed_snapshot(self, ics_url: str) -> FeedCacheEntry:
+        if not service.BACKGROUND_REFRESH:
+            return await self.get_feed(ics_url)
+        service.REFRESHER.track(ics_url)
+        cached = service.FEED_CACHE.get(ics_url)
+        if cached is None and service.SNAPSHOTS is not None:
+            cached = await self.run_cpu(service.cached_feed, ics_url)
+        if cached is not None and cached.age() < service.REFRESH_MAX_STALENESS:
+            FEED_CACHE_REQUESTS.inc(result='snapshot')
+            return cached
+        try:
+            return await self.get_feed(ics_url)
+        except Exception as e:
+            return service.stale_snapshot(ics_url, cached, e)
+
+    async def get_feed(self, ics_url: str) -> FeedCacheEntry:
+        cached = service.FEED_CACHE.get(ics_url)
+        if cached is not None and service.FEED_CACHE.is_fresh(cached):
+            FEED_CACHE_REQUESTS.inc(result='hit')
+            return cached
+        flight, leader = service.FEED_FLIGHTS.join(ics_url)
+        if leader:
+            download = asyncio.ensure_future(self._download_feed(ics_url, cached))
+            self._downloads.add(download)
+            download.add_done_callback(lambda done: self._download_done(ics_url, flight, done))
+        # Each caller awaits its own future, so a caller that times out does not cancel the download
+        return await _wait_flight(flight)
+
+    def _download_done(self, ics_url: str, flight, download: asyncio.Task) -> None:
+        self._downloads.discard(download)
+        if download.cancelled():
+            service.FEED_FLIGHTS.finish(ics_url, flight, error=Exception("Feed download was cancelled"))
+        elif download.exception() is not None:
+            service.FEED_FLIGHTS.finish(ics_url, flight, error=download.exception())
+        else:
+            service.FEED_FLIGHTS.finish(ics_url, flight, download.result())
+
+    async def _download_feed(self, ics_url: str, cached: Optional[FeedCacheEntry]) -> FeedCacheEntry:
+        if service.SNAPSHOTS is not None:
+            shared = await self.run_cpu(service.shared_snapshot, ics_url, cached)
+            if shared is not None:
+                if service.FEED_CACHE.is_fresh(shared):
+                    return shared
+                cached = shared
+        labels = service._metric_labels(ics_url)
+        host = urlsplit(ics_url).netloc
+        breaker = service.HTTP_CLIENT.breaker
+
+        # Same adaptive timeout as the sync fetch; hedging is left to the sync workers, where
+        # a stalled request holds the whole worker rather than one task on the loop
+        timeout = service.FEED_LATENCY.timeout_for(host)
+
+        try:
+            started = time.perf_counter()
+            headers_at = None
+            breaker.before_request(host)
+            try:
+                async with self.session.get(
+                    ics_url, headers=conditional_headers(cached),
+                    timeout=aiohttp.ClientTimeout(total=None, connect=timeout, sock_read=timeout),
+                ) as response:
+                    headers_at = time.perf_counter()
+                    record_timing('upstream_ttfb', headers_at - started)
+                    service.FEED_LATENCY.record(host, headers_at - started)
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+                    not_modified = response.status == 304 and cached is not None
+                    if not not_modified:
+                        response.raise_for_status()
+                        if response.content_length and response.content_length > service.ICS_MAX_BYTES:
+                            raise FeedTooLargeError(f"ICS feed exceeds {service.ICS_MAX_BYTES} bytes")
+                        pruner = IcsStreamPruner(service._prune_cutoff(), service.ICS_MAX_BYTES)
+                        async for chunk in response.content.iter_chunked(service.ICS_CHUNK_SIZE):
+                            pruner.feed(chunk)
+                        body = pruner.finish()
+            except asyncio.TimeoutError:
+                if headers_at is None:
+                    service.FEED_LATENCY.record_timeout(host, timeout)
+                breaker.record_failure(host)
+                raise
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError):
+                breaker.record_failure(host)
+                raise
+            except aiohttp.ClientResponseError as e:
+                if e.status >= 500:
+                    breaker.record_failure(host)
+                else:
+                    breaker.release_trial(host)
+                raise
+            except BaseException:
+                breaker.release_trial(host)
+                raise
+            else:
+                breaker.record_success(host)
+
+            FETCH_SECONDS.observe(time.perf_counter() - started, **labels)
+            if not_modified:
+                await self.run_cpu(service.mark_feed_revalidated, ics_url)
+                FEED_CACHE_REQUESTS.inc(result='revalidated')
+                return cached
+            record_timing('download', time.perf_counter() - headers_at)
+            DOWNLOAD_BYTES.observe(pruner.total_bytes, **labels)
+            FEED_CACHE_REQUESTS.inc(result='miss')
+        except Exception as e:
+            UPSTREAM_ERRORS.inc(host=labels['host'], type=_upstream_error_type(e))
+            raise Exception(f"Failed to fetch ICS feed: {str(e) or type(e).__name__}")
+
+        return await self.run_cpu(store_feed, ics_url, body, pruner.content_hash, etag, last_modified)
+
+    async def room_status(self, ics_url: str, room_name: str, now: datetime) -> Dict:
+        with feed_metrics_context(ics_url):
+            feed = await self.get_feed_snapshot(ics_url)
+            return await self.run_cpu(room_status_payload, feed, ics_url, room_name, now)
+
+    async def room_statuses(self, rooms: List[tuple], now: datetime) -> tuple:
+        """
+        Async counterpart of build_room_status_responses
+
+        Every feed is started at once; each gets MULTI_ROOM_FEED_TIMEOUT seconds
+        and the batch gets MULTI_ROOM_DEADLINE seconds. Downloads abandoned by a
+        timeout keep running and still refresh the cache.
+        """
+        async def _one(ics_url: str, room_name: str) -> tuple:
+            try:
+                return await asyncio.wait_for(
+                    self.room_status(ics_url, room_name, now), service.MULTI_ROOM_FEED_TIMEOUT
+                ), None
+            except asyncio.TimeoutError:
+                reason = f"Feed timed out after {service.MULTI_ROOM_FEED_TIMEOUT:g}s"
+            except Exception as e:
+                reason = str(e)
+            logger.error(f"Error processing ICS feed {ics_url}: {reason}")
+            return None, reason
+
+        tasks = [asyncio.ensure_future(_one(ics_url, room_name)) for ics_url, room_name in rooms]
+        _, pending = await asyncio.wait(tasks, timeout=service.MULTI_ROOM_DEADLINE)
+        for task in pending:
+            task.cancel()
+
+        results = []
+        errors = []
+        for task, (ics_url, room_name) in zip(tasks, rooms):
+            if task in pending:
+                result, error = None, f"Request deadline of {service.MULTI_ROOM_DEADLINE:g}s exceeded"
+            else:
+                result, error = task.result()
+            if error is None:
+                results.append(result)
+            else:
+                errors.append({'ics_url': ics_url, 'room_name': room_name, 'error': error})
+        return results, errors
+
+
+FEED_FETCHER = web.AppKey('feed_fetcher', AsyncFeedFetcher)
+
+
+def json_response(payload: Dict, status: int = 200) -> web.Response:
+    # Same encoding as Flask's jsonify so both modes return byte-identical bodies
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':')) + '\n'
+    return web.Response(text=body, status=status, content_type='application/json')
+
+
+def conditional_json(request: web.Request, payload: Dict, rooms: List[Dict], now: datetime,
+                     cacheable: bool = True) -> web.Response:
+    """aiohttp version of room_availability_service.conditional_json"""
+    digest = payload_etag(payload)
+    held = {tag.value for tag in request.if_none_match or ()}
+    matched = matched_etag(digest, lambda tag: '*' in held or tag in held)
+    if matched is not None:
+        response = web.Response(status=304)
+        digest = matched
+    else:
+        started = time.perf_counter()
+        response = json_response(payload)
+        record_timing('serialize', time.perf_counter() - started)
+    response.etag = digest
+    if service.COMPRESS_RESPONSES:
+        response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = cache_control(rooms, now, cacheable)
+    return response
+
+
+def _compress_response(request: web.Request, response: web.Response, endpoint: str) -> None:
+    """aiohttp version of room_availability_service._compress_response"""
+    if response.content_type != 'application/json' or not isinstance(response.body, bytes):
+        return
+    if service.COMPRESS_RESPONSES:
+        response.headers['Vary'] = 'Accept-Encoding'
+    body, encoding = encode_json_body(response.body, response.status, request.headers.get('Accept-Encoding', ''),
+                                      endpoint)
+    if encoding is not None:
+        response.body = body
+        response.headers['Content-Encoding'] = encoding
+        if response.etag is not None:
+            response.etag = f'{response.etag.value}-{encoding}'
+
+
+@web.middleware
+async def _track_request(request: web.Request, handler):
+    endpoint = request.match_info.route.name or 'unknown'
+    token = service._metrics_endpoint.set(endpoint)
+    REQUESTS_IN_FLIGHT.inc(endpoint=endpoint)
+    timings_token = None
+    if service.SERVER_TIMING and endpoint in service.DIAGNOSTIC_ENDPOINTS:
+        started = time.perf_counter()
+        timings_token = service._request_timings.set({})
+    try:
+        response = await handler(request)
+        if timings_token is not None:
+            timings = service._request_timings.get()
+            timings['total'] = time.perf_counter() - started
+            response.headers['Server-Timing'] = ', '.join(
+                f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in timings.items()
+            )
+        _compress_response(request, response, endpoint)
+        return response
+    finally:
+        if timings_token is not None:
+            service._request_timings.reset(timings_token)
+        REQUESTS_IN_FLIGHT.dec(endpoint=endpoint)
+        service._metrics_endpoint.reset(token)
+
+
+async def metrics(request: web.Request) -> web.Response:
+    """Prometheus metrics for this worker process"""
+    return web.Response(
+        text=service.METRICS.render(), headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    )
+
+
+async def health(request: web.Request) -> web.Response:
+    """Health check endpoint"""
+    return json_response({
+        'status': 'ok',
+        'timezone': str(TIMEZONE),
+        'timestamp': datetime.now(TIMEZONE).isoformat()
+    })
+
+
+async def room_status(request: web.Request) -> web.Response:
+    """Single room status; same parameters and JSON as the Flask endpoint"""
+    ics_url = request.query.get('ics_url')
+    room_name = request.query.get('room_name', 'Conference Room')
+
+    if not ics_url:
+        return json_response({'error': 'ics_url parameter required'}, status=400)
+    try:
+        selection = parse_field_selection(request.query.get('fields'), request.query.get('view'))
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+
+    try:
+        now = datetime.now(TIMEZONE)
+        payload = await request.app[FEED_FETCHER].room_status(ics_url, room_name, now)
+        return conditional_json(request, select_fields(payload, selection), [payload], now)
+    except Exception as e:
+        logger.error(f"Error: {str(e)}", exc_info=True)
+        return json_response({
+            'error': str(e),
+            'room_name': room_name,
+            'status': 'ERROR',
+            'current_time': datetime.now(TIMEZONE).strftime('%-I:%M %p')
+        }, status=500)
+
+
+async def multi_room_status(request: web.Request) -> web.Response:
+    """Several feeds in one request; same parameters and JSON as the Flask endpoint"""
+    rooms = requested_rooms(request.query.getall('ics_url', []), request.query.getall('room_name', []))
+    if not rooms:
+        return json_response({'error': 'at least one ics_url parameter is required'}, status=400)
+    try:
+        selection = parse_field_selection(request.query.get('fields'), request.query.get('view'))
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+
+    now = datetime.now(TIMEZONE)
+    results, errors = await request.app[FEED_FETCHER].room_statuses(rooms, now)
+
+    if not results:
+        return json_response({'error': 'No calendars could be processed', 'details': errors}, status=500)
+
+    payload = multi_room_payload([select_fields(result, selection) for result in results], errors, now)
+    # Failed rooms should be retried on the next poll rather than cached
+    return conditional_json(request, payload, results, now, cacheable=not errors)
+
+
+async def _feed_fetcher_ctx(app: web.Application):
+    # Created per worker once the event loop is running, so nothing is shared across a fork
+    connector = aiohttp.TCPConnector(
+        limit=service.ICS_MAX_PER_HOST * service.ICS_POOL_HOSTS, limit_per_host=service.ICS_MAX_PER_HOST
+    )
+    # Like requests' timeout: connect (including waiting for a pooled connection) and each read
+    timeout = aiohttp.ClientTimeout(total=None, connect=service.ICS_TIMEOUT, sock_read=service.ICS_TIMEOUT)
+    cpu_executor = ThreadPoolExecutor(max_workers=ASYNC_CPU_WORKERS, thread_name_prefix='async-cpu')
+    async with aiohttp.ClientSession(
+        connector=connector, timeout=timeout, trust_env=service.USE_PROXY_FOR_ICS
+    ) as session:
+        app[FEED_FETCHER] = AsyncFeedFetcher(session, cpu_executor)
+        yield
+    cpu_executor.shutdown(wait=False)
+
+
+def create_app() -> web.Application:
+    app = web.Application(middlewares=[_track_request])
+    app.cleanup_ctx.append(_feed_fetcher_ctx)
+    app.router.add_get('/metrics', metrics, name='metrics')
+    app.router.add_get('/health', health, name='health')
+    app.router.add_get('/room-status', room_status, name='room_status')
+    app.router.add_get('/multi-room-status', multi_room_status, name='multi_room_status')
+    return app
+
+
+app = create_app()
+
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 5000))
+    web.run_app(app, host='0.0.0.0', port=port)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for a calendar server
+
+Serves ICS bodies from memory over HTTP on 127.0.0.1 with ETag /
+If-None-Match support, and counts the requests it receives so benchmarks
+can report upstream traffic. Latency (overall or per feed) and a rate of
+5xx errors can be injected to stand in for slow or flaky calendar hosts.
+"""
+
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+
+class FeedServer:
+    """In-process ICS feed server; use as a context manager or call start()/stop()"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, seed: int = 0):
+        self._feeds: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._latency: Dict[Optional[str], Tuple[float, float]] = {}
+        self.error_rate = 0.0
+        self.requests = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def set_feed(self, name: str, body: bytes) -> str:
+        """Publish (or replace) a feed and return its URL"""
+        with self._lock:
+            self._feeds[name] = body
+        return f'{self.base_url}/{name}.ics'
+
+    def get_feed(self, name: str):
+        with self._lock:
+            return self._feeds.get(name)
+
+    def set_latency(self, seconds: float, jitter: float = 0.0, name: Optional[str] = None) -> None:
+        """Delay responses (for one feed, or every feed without its own delay) by seconds plus up to jitter"""
+        with self._lock:
+            self._latency[name] = (seconds, jitter)
+
+    def set_error_rate(self, rate: float) -> None:
+        """Answer this fraction of requests with 503"""
+        with self._lock:
+            self.error_rate = rate
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.not_modified = 0
+            self.errors = 0
+            self.bytes_sent = 0
+
+    def _injected(self, name: str) -> Tuple[float, bool]:
+        """(seconds to delay, whether to fail) for a request to feed `name`"""
+        with self._lock:
+            seconds, jitter = self._latency.get(name) or self._latency.get(None) or (0.0, 0.0)
+            delay = seconds + (self._rng.uniform(0, jitter) if jitter else 0.0)
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            return delay, fail
+
+    def start(self) -> 'FeedServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='feed-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FeedServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                name = self.path.lstrip('/').split('?', 1)[0]
+                if name.endswith('.ics'):
+                    name = name[:-4]
+                body = server.get_feed(name)
+                with server._lock:
+                    server.requests += 1
+                delay, fail = server._injected(name)
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if body is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if self.headers.get('If-None-Match') == etag:
+                    with server._lock:
+                        server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/calendar; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.bytes_sent += len(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
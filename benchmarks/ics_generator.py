@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Synthetic ICS calendar generator for benchmarks
+
+Produces room calendars shaped like Exchange/Google exports: years of past
+one-off meetings, daily and weekly RRULE series (UNTIL in UTC, COUNT and
+open-ended), EXDATE/RDATE adjustments, RECURRENCE-ID overrides and
+cancelled instances.
+"""
+
+import argparse
+import random
+import sys
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+import pytz
+
+
+WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR']
+TOPICS = ['Standup', 'Planning', 'Design Review', '1:1', 'Interview', 'All Hands', 'Retro', 'Customer Call']
+ORGANIZERS = ['alex', 'sam', 'jordan', 'taylor', 'morgan', 'casey', 'riley', 'drew']
+
+VTIMEZONE_CHICAGO = [
+    'BEGIN:VTIMEZONE',
+    'TZID:America/Chicago',
+    'BEGIN:DAYLIGHT',
+    'TZOFFSETFROM:-0600',
+    'TZOFFSETTO:-0500',
+    'TZNAME:CDT',
+    'DTSTART:19700308T020000',
+    'RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=2SU',
+    'END:DAYLIGHT',
+    'BEGIN:STANDARD',
+    'TZOFFSETFROM:-0500',
+    'TZOFFSETTO:-0600',
+    'TZNAME:CST',
+    'DTSTART:19701101T020000',
+    'RRULE:FREQ=YEARLY;BYMONTH=11;BYDAY=1SU',
+    'END:STANDARD',
+    'END:VTIMEZONE',
+]
+
+
+def _local(value: datetime) -> str:
+    return value.strftime('%Y%m%dT%H%M%S')
+
+
+def _utc(value: datetime, tz) -> str:
+    return tz.localize(value).astimezone(pytz.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _fold(line: str) -> List[str]:
+    """Fold a content line at 75 octets as RFC 5545 requires"""
+    if len(line) <= 75:
+        return [line]
+    parts = [line[:75]]
+    line = line[75:]
+    while line:
+        parts.append(' ' + line[:74])
+        line = line[74:]
+    return parts
+
+
+class _Writer:
+    def __init__(self, tzid: str, rng: random.Random):
+        self.tzid = tzid
+        self.rng = rng
+        self.lines: List[str] = []
+        self.uid = 0
+
+    def next_uid(self) -> str:
+        self.uid += 1
+        return f'bench-{self.uid}@example.com'
+
+    def event(self, uid: str, start: datetime, end: datetime, extra: Optional[List[str]] = None) -> None:
+        topic = self.rng.choice(TOPICS)
+        organizer = self.rng.choice(ORGANIZERS)
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:{uid}',
+            'DTSTAMP:20240101T000000Z',
+            f'SUMMARY:{topic} ({uid.split("@")[0]})',
+            f'DTSTART;TZID={self.tzid}:{_local(start)}',
+            f'DTEND;TZID={self.tzid}:{_local(end)}',
+            f'ORGANIZER;CN={organizer.title()}:mailto:{organizer}@example.com',
+            f'DESCRIPTION:Booked via the room calendar for {topic.lower()} with the {organizer} team. '
+            'Dial-in details and agenda are attached to the original invitation.',
+        ]
+        lines.extend(extra or [])
+        lines.append('END:VEVENT')
+        for line in lines:
+            self.lines.extend(_fold(line))
+
+
+def generate_calendar(
+    one_off: int = 2000,
+    daily: int = 20,
+    weekly: int = 100,
+    overrides: int = 50,
+    cancellations: int = 20,
+    days_back: int = 365,
+    days_forward: int = 90,
+    today: Optional[date] = None,
+    tzid: str = 'America/Chicago',
+    seed: int = 0,
+) -> bytes:
+    """Build a synthetic room calendar; the same arguments always yield the same bytes"""
+    rng = random.Random(seed)
+    tz = pytz.timezone(tzid)
+    today = today or datetime.now(tz).date()
+    writer = _Writer(tzid, rng)
+
+    def slot(day: date) -> datetime:
+        offset = timedelta(hours=rng.randint(7, 17), minutes=rng.choice([0, 15, 30, 45]))
+        return datetime.combine(day, datetime.min.time()) + offset
+
+    # Past and upcoming one-off bookings
+    for _ in range(one_off):
+        start = slot(today + timedelta(days=rng.randint(-days_back, days_forward)))
+        writer.event(writer.next_uid(), start, start + timedelta(minutes=rng.choice([15, 30, 60, 90])))
+
+    # Series whose occurrences are a fixed number of days apart, so overrides can target real instances
+    open_series = []
+
+    for i in range(daily):
+        uid = writer.next_uid()
+        start = slot(today - timedelta(days=rng.randint(30, days_back)))
+        end = start + timedelta(minutes=rng.choice([15, 30]))
+        kind = i % 4
+        if kind == 0:
+            # Weekday standup ending in the future, UNTIL expressed in UTC
+            until = start + timedelta(days=days_back + days_forward)
+            rule = f'RRULE:FREQ=DAILY;UNTIL={_utc(until, tz)};BYDAY={",".join(WEEKDAYS)}'
+        elif kind == 1:
+            rule = f'RRULE:FREQ=DAILY;COUNT={rng.randint(50, 500)}'
+        elif kind == 2:
+            # Finished series - UNTIL in the past
+            rule = f'RRULE:FREQ=DAILY;UNTIL={_utc(start + timedelta(days=20), tz)}'
+        else:
+            rule = 'RRULE:FREQ=DAILY'
+            open_series.append((uid, start, end, 1))
+        extra = [rule]
+        skipped = start + timedelta(days=rng.randint(1, 20))
+        extra.append(f'EXDATE;TZID={tzid}:{_local(skipped)}')
+        extra.append(f'RDATE;TZID={tzid}:{_local(start.replace(hour=6) + timedelta(days=rng.randint(1, 20)))}')
+        writer.event(uid, start, end, extra)
+
+    for i in range(weekly):
+        uid = writer.next_uid()
+        start = slot(today - timedelta(days=rng.randint(7, days_back)))
+        end = start + timedelta(minutes=rng.choice([30, 60]))
+        interval = rng.choice([1, 1, 2])
+        weekday = WEEKDAYS[start.weekday()] if start.weekday() < 5 else 'MO'
+        if i % 3 == 0:
+            until = today + timedelta(days=rng.randint(-60, days_forward))
+            rule = f'RRULE:FREQ=WEEKLY;INTERVAL={interval};BYDAY={weekday};UNTIL={_utc(slot(until), tz)};WKST=SU'
+        else:
+            rule = f'RRULE:FREQ=WEEKLY;INTERVAL={interval}'
+            open_series.append((uid, start, end, 7 * interval))
+        extra = [rule, f'EXDATE;TZID={tzid}:{_local(start + timedelta(days=7 * interval))}']
+        writer.event(uid, start, end, extra)
+
+    # Moved and cancelled instances near today, where room status queries look
+    for index in range(min(overrides + cancellations, len(open_series) * 4)):
+        uid, start, end, step = rng.choice(open_series)
+        first = max(0, (today - start.date()).days // step - 2)
+        occurrence = start + timedelta(days=step * (first + rng.randint(0, 6)))
+        recurrence_id = f'RECURRENCE-ID;TZID={tzid}:{_local(occurrence)}'
+        if index < overrides:
+            moved = occurrence + timedelta(minutes=rng.choice([-60, -30, 30, 60, 120]))
+            writer.event(uid, moved, moved + (end - start), [recurrence_id, 'SEQUENCE:1'])
+        else:
+            writer.event(uid, occurrence, occurrence + (end - start), [recurrence_id, 'SEQUENCE:1', 'STATUS:CANCELLED'])
+
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//Room Display Benchmarks//EN', 'CALSCALE:GREGORIAN']
+    lines.extend(VTIMEZONE_CHICAGO if tzid == 'America/Chicago' else [])
+    lines.extend(writer.lines)
+    lines.append('END:VCALENDAR')
+    return ('\r\n'.join(lines) + '\r\n').encode('utf-8')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Write a synthetic room calendar to stdout')
+    parser.add_argument('--one-off', type=int, default=2000)
+    parser.add_argument('--daily', type=int, default=20)
+    parser.add_argument('--weekly', type=int, default=100)
+    parser.add_argument('--overrides', type=int, default=50)
+    parser.add_argument('--cancellations', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    sys.stdout.buffer.write(generate_calendar(
+        one_off=args.one_off, daily=args.daily, weekly=args.weekly,
+        overrides=args.overrides, cancellations=args.cancellations, seed=args.seed,
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Load test: a fleet of TRMNL panels polling the Room Availability Service
+
+Simulates `--devices` panels, each polling every `--interval` seconds for
+`--duration` seconds. By default every panel polls on the same aligned
+schedule (like panels refreshing on the hour and every five minutes after),
+spread only by up to `--jitter` seconds; `--unaligned` gives each panel its
+own phase instead. Panels show `--rooms` rooms whose calendars come from
+`--feeds` feeds (several rooms sharing a feed is the fan-in), and a
+`--multi-share` fraction of them show `--rooms-per-panel` rooms through
+/multi-room-status instead of one room through /room-status.
+
+Feeds are served by a local FeedServer, which can add latency, fail a
+fraction of requests with 503 and replace a feed with new content every
+`--change-interval` seconds. The service is launched with gunicorn.conf.py
+(as in the Dockerfile) unless `--url` points at one already running, which
+must be able to reach the feed server (see `--feed-host`):
+
+    python -m benchmarks.load_test --devices 2000 --interval 300 --duration 900 --workers 4
+    python -m benchmarks.load_test --devices 200 --interval 10 --duration 60 --feed-latency 0.5 \\
+        --feed-error-rate 0.05 --env ICS_CACHE_TTL=30 --output load.json
+
+Reported: throughput, p50/p95/p99 latency per endpoint, error rate and
+status counts, how late polls were sent (client saturation), and the
+requests the feed server received (upstream traffic, 304s and errors).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import urlencode, urlsplit
+
+import aiohttp
+import requests
+
+from benchmarks.feed_server import FeedServer
+from benchmarks.ics_generator import generate_calendar
+from benchmarks.run_benchmarks import SIZES, git_revision
+from benchmarks.startup_benchmark import ROOT, _free_port
+
+
+@dataclass
+class LoadProfile:
+    devices: int = 100
+    interval: float = 300.0
+    duration: float = 600.0
+    jitter: float = 5.0
+    aligned: bool = True
+    rooms: int = 100
+    feeds: int = 50
+    multi_share: float = 0.0
+    rooms_per_panel: int = 4
+    timeout: float = 60.0
+    connections: int = 1000
+    size: str = 'small'
+    feed_latency: float = 0.0
+    feed_jitter: float = 0.0
+    feed_error_rate: float = 0.0
+    change_interval: float = 0.0
+    seed: int = 0
+
+
+class Sample(NamedTuple):
+    endpoint: str
+    status: int  # 0 when the request failed without a response
+    latency_ms: float
+    lag_ms: float  # how much later than scheduled the request was sent
+
+
+def publish_feeds(server: FeedServer, profile: LoadProfile, feed_host: Optional[str] = None) -> List[str]:
+    """Publish the profile's feeds and return their URLs, as the service should request them"""
+    urls = []
+    for i in range(profile.feeds):
+        url = server.set_feed(f'load-{i}', generate_calendar(seed=profile.seed + i, **SIZES[profile.size]))
+        urls.append(url.replace(urlsplit(url).hostname, feed_host, 1) if feed_host else url)
+    return urls
+
+
+def build_panels(feed_urls: List[str], profile: LoadProfile) -> List[str]:
+    """The request path each device polls"""
+    rng = random.Random(profile.seed)
+    rooms = [(feed_urls[i % len(feed_urls)], f'Room {i}') for i in range(profile.rooms)]
+    panels = []
+    for device in range(profile.devices):
+        if rng.random() < profile.multi_share:
+            shown = [rooms[(device + k) % len(rooms)] for k in range(profile.rooms_per_panel)]
+            query = urlencode([('ics_url', url) for url, _ in shown] + [('room_name', name) for _, name in shown])
+            panels.append(f'/multi-room-status?{query}')
+        else:
+            url, name = rooms[device % len(rooms)]
+            panels.append(f'/room-status?{urlencode({"ics_url": url, "room_name": name})}')
+    return panels
+
+
+def poll_times(profile: LoadProfile, rng: random.Random) -> List[float]:
+    """Seconds after the start at which one device polls"""
+    phase = 0.0 if profile.aligned else rng.uniform(0, profile.interval)
+    times = []
+    tick = phase
+    while tick < profile.duration:
+        times.append(tick + (rng.uniform(0, profile.jitter) if profile.jitter else 0.0))
+        tick += profile.interval
+    return [t for t in times if t < profile.duration]
+
+
+async def _device(session: aiohttp.ClientSession, base_url: str, path: str, schedule: List[float],
+                  started: float, samples: List[Sample]) -> None:
+    loop = asyncio.get_running_loop()
+    endpoint = path.split('?', 1)[0]
+    for at in schedule:
+        await asyncio.sleep(max(0.0, started + at - loop.time()))
+        sent = loop.time()
+        status = 0
+        try:
+            async with session.get(base_url + path) as response:
+                await response.read()
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+        samples.append(Sample(endpoint, status, (loop.time() - sent) * 1000, (sent - started - at) * 1000))
+
+
+async def _change_feeds(server: FeedServer, profile: LoadProfile, rng: random.Random, changes: List[str]) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(profile.change_interval)
+        i = rng.randrange(profile.feeds)
+        # Generated off the loop so devices keep polling on schedule
+        body = await loop.run_in_executor(
+            None, lambda: generate_calendar(seed=rng.randrange(1 << 30), **SIZES[profile.size]))
+        server.set_feed(f'load-{i}', body)
+        changes.append(f'load-{i}')
+
+
+async def simulate(base_url: str, panels: List[str], profile: LoadProfile, server: FeedServer) -> tuple:
+    """(samples, feed changes, seconds elapsed) for one run of the profile"""
+    rng = random.Random(profile.seed)
+    samples: List[Sample] = []
+    changes: List[str] = []
+    timeout = aiohttp.ClientTimeout(total=profile.timeout)
+    connector = aiohttp.TCPConnector(limit=profile.connections)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                     headers={'Accept-Encoding': 'gzip'}) as session:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        changer = asyncio.ensure_future(_change_feeds(server, profile, rng, changes)) if profile.change_interval else None
+        try:
+            await asyncio.gather(*(
+                _device(session, base_url, path, poll_times(profile, rng), started, samples) for path in panels
+            ))
+        finally:
+            if changer is not None:
+                changer.cancel()
+        elapsed = loop.time() - started
+    return samples, changes, elapsed
+
+
+def latency_summary(values: List[float]) -> Dict:
+    """count / mean / p50 / p95 / p99 / max in ms"""
+    if not values:
+        return {'count': 0}
+    values = sorted(values)
+
+    def _at(q: float) -> float:
+        return round(values[min(len(values) - 1, int(len(values) * q))], 3)
+
+    return {
+        'count': len(values),
+        'mean_ms': round(sum(values) / len(values), 3),
+        'p50_ms': _at(0.5),
+        'p95_ms': _at(0.95),
+        'p99_ms': _at(0.99),
+        'max_ms': round(values[-1], 3),
+    }
+
+
+def summarize_run(samples: List[Sample], elapsed: float) -> Dict:
+    statuses: Dict[str, int] = {}
+    for sample in samples:
+        statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+    errors = sum(1 for sample in samples if not 200 <= sample.status < 400)
+    return {
+        'requests': len(samples),
+        'elapsed_seconds': round(elapsed, 3),
+        'throughput_rps': round(len(samples) / elapsed, 3) if elapsed else 0.0,
+        'error_rate': round(errors / len(samples), 5) if samples else 0.0,
+        'statuses': statuses,
+        'latency': {
+            'all': latency_summary([sample.latency_ms for sample in samples]),
+            **{endpoint: latency_summary([sample.latency_ms for sample in samples if sample.endpoint == endpoint])
+               for endpoint in sorted({sample.endpoint for sample in samples})},
+        },
+        'send_lag': latency_summary([sample.lag_ms for sample in samples]),
+    }
+
+
+def run_load_test(base_url: str, server: FeedServer, profile: LoadProfile, feed_host: Optional[str] = None) -> Dict:
+    """Publish the feeds, run the fleet against base_url and report the results"""
+    panels = build_panels(publish_feeds(server, profile, feed_host), profile)
+    server.set_latency(profile.feed_latency, profile.feed_jitter)
+    server.set_error_rate(profile.feed_error_rate)
+    server.reset_counters()
+    samples, changes, elapsed = asyncio.run(simulate(base_url, panels, profile, server))
+    report = summarize_run(samples, elapsed)
+    report['upstream'] = {
+        'requests': server.requests,
+        'not_modified': server.not_modified,
+        'errors': server.errors,
+        'bytes': server.bytes_sent,
+        'feed_changes': len(changes),
+    }
+    return report
+
+
+@contextmanager
+def gunicorn_service(app: str, workers: int, threads: int, worker_class: Optional[str], env: Dict[str, str],
+                     timeout: float = 30.0):
+    """Run the service under gunicorn.conf.py on a free local port; yields its base URL"""
+    port = _free_port()
+    command = ['gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'), app, '--chdir', ROOT,
+               '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--threads', str(threads),
+               '--log-level', 'warning']
+    if worker_class:
+        command += ['--worker-class', worker_class]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)),
+                               env={**os.environ, 'USE_PROXY_FOR_ICS': 'false', **env})
+    base = f'http://127.0.0.1:{port}'
+    try:
+        launched = time.perf_counter()
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f'gunicorn exited with status {process.returncode}')
+            if time.perf_counter() - launched > timeout:
+                raise RuntimeError(f'gunicorn did not answer /health within {timeout:g}s')
+            try:
+                if requests.get(f'{base}/health', timeout=1).status_code == 200:
+                    break
+            except requests.ConnectionError:
+                time.sleep(0.05)
+        yield base
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def _print_report(report: Dict) -> None:
+    print(f"  requests {report['requests']}  throughput {report['throughput_rps']:.1f}/s  "
+          f"error rate {report['error_rate']:.2%}  statuses {report['statuses']}")
+    for endpoint, stats in report['latency'].items():
+        if stats['count']:
+            print(f"  {endpoint:<20} p50 {stats['p50_ms']:>9.1f} ms  p95 {stats['p95_ms']:>9.1f} ms  "
+                  f"p99 {stats['p99_ms']:>9.1f} ms")
+    if report['send_lag']['count']:
+        print(f"  {'send lag':<20} p99 {report['send_lag']['p99_ms']:>9.1f} ms")
+    upstream = report['upstream']
+    print(f"  upstream requests {upstream['requests']}  304s {upstream['not_modified']}  "
+          f"errors {upstream['errors']}  feed changes {upstream['feed_changes']}")
+
+
+def main() -> None:
+    defaults = LoadProfile()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--devices', type=int, default=defaults.devices)
+    parser.add_argument('--interval', type=float, default=defaults.interval, help='seconds between polls of a device')
+    parser.add_argument('--duration', type=float, default=defaults.duration, help='seconds to run')
+    parser.add_argument('--jitter', type=float, default=defaults.jitter, help='random delay of each poll, seconds')
+    parser.add_argument('--unaligned', action='store_true', help='give each device its own polling phase')
+    parser.add_argument('--rooms', type=int, default=defaults.rooms)
+    parser.add_argument('--feeds', type=int, default=defaults.feeds, help='distinct feeds behind the rooms')
+    parser.add_argument('--multi-share', type=float, default=defaults.multi_share,
+                        help='fraction of devices polling /multi-room-status')
+    parser.add_argument('--rooms-per-panel', type=int, default=defaults.rooms_per_panel)
+    parser.add_argument('--size', choices=sorted(SIZES), default=defaults.size, help='generated calendar size')
+    parser.add_argument('--feed-latency', type=float, default=defaults.feed_latency, help='seconds added per feed request')
+    parser.add_argument('--feed-jitter', type=float, default=defaults.feed_jitter)
+    parser.add_argument('--feed-error-rate', type=float, default=defaults.feed_error_rate,
+                        help='fraction of feed requests answered with 503')
+    parser.add_argument('--change-interval', type=float, default=defaults.change_interval,
+                        help='replace a random feed every this many seconds (0 disables)')
+    parser.add_argument('--timeout', type=float, default=defaults.timeout, help='client timeout per request')
+    parser.add_argument('--connections', type=int, default=defaults.connections, help='client connection limit')
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    parser.add_argument('--url', help='test a running service instead of launching gunicorn')
+    parser.add_argument('--feed-host', help='host name the service should use to reach the feed server')
+    parser.add_argument('--feed-bind', default='127.0.0.1', help='address the feed server listens on')
+    parser.add_argument('--app', default='room_availability_service:app')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--worker-class')
+    parser.add_argument('--env', action='append', default=[], metavar='NAME=VALUE',
+                        help='environment for the launched service, e.g. ICS_CACHE_TTL=30')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    profile = LoadProfile(
+        devices=args.devices, interval=args.interval, duration=args.duration, jitter=args.jitter,
+        aligned=not args.unaligned, rooms=args.rooms, feeds=args.feeds, multi_share=args.multi_share,
+        rooms_per_panel=args.rooms_per_panel, timeout=args.timeout, connections=args.connections, size=args.size,
+        feed_latency=args.feed_latency, feed_jitter=args.feed_jitter, feed_error_rate=args.feed_error_rate,
+        change_interval=args.change_interval, seed=args.seed,
+    )
+    env = dict(item.split('=', 1) for item in args.env)
+
+    with FeedServer(host=args.feed_bind, seed=args.seed) as server:
+        if args.url:
+            report = run_load_test(args.url.rstrip('/'), server, profile, args.feed_host)
+        else:
+            with gunicorn_service(args.app, args.workers, args.threads, args.worker_class, env) as base_url:
+                report = run_load_test(base_url, server, profile, args.feed_host)
+
+    results = {
+        'git_revision': git_revision(),
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'profile': asdict(profile),
+        'service': {'url': args.url} if args.url else {
+            'app': args.app, 'workers': args.workers, 'threads': args.threads, 'worker_class': args.worker_class,
+            'env': env,
+        },
+        **report,
+    }
+    _print_report(results)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
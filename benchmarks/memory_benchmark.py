@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for compiled room timelines
+
+Expands synthetic calendars over a long horizon and measures, with
+tracemalloc, what keeping every room's timeline resident costs:
+
+- dicts: the occurrences as a list of event dicts plus the arrays of an
+  EventIndex over them (the representation before EventStore)
+- store: the same occurrences as an EventStore plus its EventIndex
+
+Each room gets its own calendar (different seed), as in a building where
+every room has its own feed:
+
+    python -m benchmarks.memory_benchmark --rooms 50 --days 365 --output memory.json
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from benchmarks.ics_generator import generate_calendar
+from benchmarks.run_benchmarks import git_revision
+from room_availability_service import Calendar, EventIndex, EventStore, TIMEZONE, expand_calendar
+
+# Recurring-heavy rooms: daily and weekly series dominate a year-long horizon
+CALENDAR = dict(one_off=300, daily=10, weekly=40, overrides=20, cancellations=10, days_forward=365)
+
+
+def expand_rooms(rooms: int, days: int) -> List:
+    today = datetime.now(TIMEZONE).date()
+    now = TIMEZONE.localize(datetime.combine(today, datetime.min.time()))
+    expanded = []
+    for seed in range(rooms):
+        cal = Calendar.from_ical(generate_calendar(seed=seed, today=today, **CALENDAR))
+        expanded.append(expand_calendar(cal, now, today, today + timedelta(days=days - 1))[0])
+    return expanded
+
+
+def measure(build: Callable[[], List]) -> Dict:
+    """Bytes still allocated by build()'s result, and the peak while building it"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {'retained_bytes': retained, 'peak_bytes': peak}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rooms', type=int, default=50)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    stores = expand_rooms(args.rooms, args.days)
+    occurrences = sum(len(store) for store in stores)
+
+    # Both representations are measured from the same expansion, so only the
+    # resident form is compared and not the cost of expanding
+    results = {
+        'dicts': measure(lambda: [EventIndex(list(store)) for store in stores]),
+        'store': measure(lambda: [EventIndex(EventStore.merge([store])) for store in stores]),
+    }
+    for result in results.values():
+        result['bytes_per_occurrence'] = round(result['retained_bytes'] / max(occurrences, 1), 1)
+
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'rooms': args.rooms,
+        'days': args.days,
+        'occurrences': occurrences,
+        'results': results,
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
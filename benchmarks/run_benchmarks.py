@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the Room Availability Service
+
+Generates synthetic calendars, serves them from a local feed server and
+times the hot paths: fetch_ics_feed, parse_events_with_recurrence,
+determine_room_status and the Flask endpoints (through the test client).
+Results are written as JSON so runs from different commits can be compared:
+
+    python -m benchmarks.run_benchmarks --output before.json
+    git checkout my-branch
+    python -m benchmarks.run_benchmarks --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from urllib.parse import quote
+
+# The local feed server must not be reached through a proxy, and benchmarks
+# measure the request path rather than the background refresher
+os.environ.setdefault('USE_PROXY_FOR_ICS', 'false')
+os.environ.setdefault('BACKGROUND_REFRESH', 'false')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import room_availability_service as service  # noqa: E402
+from benchmarks.feed_server import FeedServer  # noqa: E402
+from benchmarks.ics_generator import generate_calendar  # noqa: E402
+
+
+SIZES = {
+    'small': dict(one_off=200, daily=5, weekly=20, overrides=10, cancellations=5),
+    'medium': dict(one_off=2000, daily=20, weekly=100, overrides=50, cancellations=20),
+    'large': dict(one_off=10000, daily=50, weekly=400, overrides=200, cancellations=80),
+}
+
+
+def clear_caches() -> None:
+    service.FEED_CACHE.clear()
+    service.COMPILED_CACHE.clear()
+
+
+def measure(fn: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict:
+    """Run fn `repeat` times (calling setup before each run, untimed) and summarise durations in ms"""
+    samples: List[float] = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def summarize(samples: List[float]) -> Dict:
+    """min / median / mean / p95 / max of durations in ms"""
+    samples = sorted(samples)
+    return {
+        'runs': len(samples),
+        'min_ms': round(samples[0], 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        'max_ms': round(samples[-1], 3),
+    }
+
+
+def benchmark_size(server: FeedServer, size: str, repeat: int) -> Dict:
+    now = service.TIMEZONE.localize(datetime.combine(datetime.now(service.TIMEZONE).date(), datetime.min.time())
+                                    + timedelta(hours=10, minutes=7))
+    body = generate_calendar(today=now.date(), **SIZES[size])
+    url = server.set_feed(f'bench-{size}', body)
+    client = service.app.test_client()
+    query = f'ics_url={quote(url, safe="")}&room_name=Bench'
+
+    clear_caches()
+    cal = service.fetch_ics_feed(url)
+    events_today = service.parse_events_with_recurrence(cal, now)
+    events_month = service.parse_events_with_recurrence(
+        cal, now, start_date=now.date(), end_date=now.date() + timedelta(days=29)
+    )
+
+    results = {
+        'feed_bytes': len(body),
+        'vevents': body.count(b'BEGIN:VEVENT'),
+        'events_today': len(events_today),
+        'events_30_days': len(events_month),
+        'benchmarks': {},
+    }
+    bench = results['benchmarks']
+    server.reset_counters()
+
+    bench['fetch_ics_feed_cold'] = measure(lambda: service.fetch_ics_feed(url), repeat, setup=clear_caches)
+    bench['fetch_ics_feed_cached'] = measure(lambda: service.fetch_ics_feed(url), repeat * 10)
+    bench['parse_events_today'] = measure(lambda: service.parse_events_with_recurrence(cal, now), repeat)
+    bench['parse_events_30_days'] = measure(
+        lambda: service.parse_events_with_recurrence(
+            cal, now, start_date=now.date(), end_date=now.date() + timedelta(days=29)
+        ),
+        repeat,
+    )
+    bench['determine_room_status'] = measure(
+        lambda: service.determine_room_status(events_today, now), repeat * 100
+    )
+    bench['endpoint_room_status_cold'] = measure(
+        lambda: client.get(f'/room-status?{query}'), repeat, setup=clear_caches
+    )
+    bench['endpoint_room_status_warm'] = measure(lambda: client.get(f'/room-status?{query}'), repeat * 10)
+    bench['endpoint_multi_room_status_warm'] = measure(
+        lambda: client.get(f'/multi-room-status?{query}&{query}&{query}'), repeat * 10
+    )
+    bench['endpoint_debug_30_days_warm'] = measure(lambda: client.get(f'/debug?{query}&days=30'), repeat * 10)
+
+    results['upstream'] = {
+        'requests': server.requests,
+        'not_modified': server.not_modified,
+        'bytes_sent': server.bytes_sent,
+    }
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict, baseline: Dict) -> None:
+    """Print median deltas against a previous results file"""
+    print(f"\nComparison with {baseline.get('git_revision') or 'baseline'} (median ms)")
+    for size, result in current['sizes'].items():
+        base = baseline.get('sizes', {}).get(size)
+        if not base:
+            continue
+        for name, stats in result['benchmarks'].items():
+            before = base['benchmarks'].get(name)
+            if not before:
+                continue
+            ratio = stats['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+            print(f"  {size:<6} {name:<32} {before['median_ms']:>10.3f} -> {stats['median_ms']:>10.3f}  x{ratio:.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', choices=sorted(SIZES), default=['small', 'medium'])
+    parser.add_argument('--repeat', type=int, default=5, help='runs per benchmark (cheap ones run more)')
+    parser.add_argument('--output', default='bench_results.json', help='where to write JSON results')
+    parser.add_argument('--compare', help='previous results file to compare against')
+    args = parser.parse_args()
+
+    service.app.logger.disabled = True
+    results = {
+        'git_revision': git_revision(),
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sizes': {},
+    }
+    with FeedServer() as server:
+        for size in args.sizes:
+            print(f"Benchmarking {size} calendar...", flush=True)
+            results['sizes'][size] = benchmark_size(server, size, args.repeat)
+            for name, stats in results['sizes'][size]['benchmarks'].items():
+                print(f"  {name:<32} median {stats['median_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms")
+
+    with open(args.output, 'w') as handle:
+        json.dump(results, handle, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            compare(results, json.load(handle))
+
+
+if __name__ == '__main__':
+    main()
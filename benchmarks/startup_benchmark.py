@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the Room Availability Service
+
+Measures what a freshly scaled-up container pays before it serves normally:
+
+- import: time to import room_availability_service in a new interpreter
+- health: time from launching gunicorn to the first successful /health
+- first_room_status: latency of a worker's first /room-status against a
+  local feed (fetch, parse and expansion plus any cold-start cost)
+- next_room_status: the same for a second, equally sized feed right after;
+  the difference to first_room_status is the cold-start cost
+
+gunicorn is started both with gunicorn.conf.py (preloaded and warmed up
+before forking) and without it, with one worker so every request hits the
+same process:
+
+    python -m benchmarks.startup_benchmark --output startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+from urllib.parse import quote
+
+import requests
+
+from benchmarks.feed_server import FeedServer
+from benchmarks.ics_generator import generate_calendar
+from benchmarks.run_benchmarks import SIZES, git_revision, summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# gunicorn reads ./gunicorn.conf.py by default, so it is launched from this
+# directory and pointed at the repository with --chdir
+MODES = {
+    'preload': ['-c', os.path.join(ROOT, 'gunicorn.conf.py')],
+    'plain': ['room_availability_service:app'],
+}
+
+
+def measure_import(repeat: int) -> Dict:
+    samples: List[float] = []
+    for _ in range(repeat):
+        output = subprocess.check_output([
+            sys.executable, '-c',
+            'import time; t = time.perf_counter(); import room_availability_service; '
+            'print(time.perf_counter() - t)',
+        ], cwd=ROOT, text=True)
+        samples.append(float(output) * 1000)
+    return summarize(samples)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_once(mode: str, queries: List[str], timeout: float = 30.0) -> Dict[str, float]:
+    """Launch gunicorn in `mode` and time its first /health and /room-status responses (ms)"""
+    port = _free_port()
+    base = f'http://127.0.0.1:{port}'
+    launched = time.perf_counter()
+    process = subprocess.Popen(
+        ['gunicorn', *MODES[mode], '--chdir', ROOT, '--bind', f'127.0.0.1:{port}', '--workers', '1',
+         '--log-level', 'warning'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f'gunicorn ({mode}) exited with status {process.returncode}')
+            if time.perf_counter() - launched > timeout:
+                raise RuntimeError(f'gunicorn ({mode}) did not answer /health within {timeout:g}s')
+            try:
+                if requests.get(f'{base}/health', timeout=1).status_code == 200:
+                    break
+            except requests.ConnectionError:
+                time.sleep(0.01)
+        timings = {'health': (time.perf_counter() - launched) * 1000}
+        for name, query in zip(('first_room_status', 'next_room_status'), queries):
+            started = time.perf_counter()
+            response = requests.get(f'{base}/room-status?{query}', timeout=timeout)
+            response.raise_for_status()
+            timings[name] = (time.perf_counter() - started) * 1000
+        return timings
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', choices=sorted(SIZES), default='small', help='calendar served to /room-status')
+    parser.add_argument('--repeat', type=int, default=5, help='process launches per mode')
+    parser.add_argument('--output', default='startup_results.json', help='where to write JSON results')
+    args = parser.parse_args()
+
+    results = {
+        'git_revision': git_revision(),
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'size': args.size,
+        'import': measure_import(args.repeat),
+        'modes': {},
+    }
+    print(f"  {'import':<32} median {results['import']['median_ms']:>10.3f} ms")
+
+    with FeedServer() as server:
+        queries = [
+            f'ics_url={quote(server.set_feed(f"startup-{seed}", generate_calendar(seed=seed, **SIZES[args.size])), safe="")}'
+            for seed in (1, 2)
+        ]
+        for mode in MODES:
+            runs = [start_once(mode, queries) for _ in range(args.repeat)]
+            results['modes'][mode] = {name: summarize([run[name] for run in runs]) for name in runs[0]}
+            for name, stats in results['modes'][mode].items():
+                print(f"  {mode + ' ' + name:<32} median {stats['median_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms")
+
+    with open(args.output, 'w') as handle:
+        json.dump(results, handle, indent=2)
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
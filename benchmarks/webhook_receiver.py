@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for a webhook receiver such as TRMNL's custom plugin endpoint
+
+Accepts JSON POSTs on 127.0.0.1, records each body by path, and can be told
+to fail the next few requests so retry behaviour can be exercised.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+
+class WebhookReceiver:
+    """In-process webhook receiver; use as a context manager or call start()/stop()"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self._lock = threading.Lock()
+        self.received: Dict[str, List[Dict]] = {}
+        self.requests = 0
+        self._failures: List[tuple] = []
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def url(self, name: str) -> str:
+        return f'{self.base_url}/{name}'
+
+    def bodies(self, name: str) -> List[Dict]:
+        """Bodies accepted (answered 200) for a webhook, oldest first"""
+        with self._lock:
+            return list(self.received.get(name, []))
+
+    def fail_next(self, count: int = 1, status: int = 503, retry_after: Optional[float] = None) -> None:
+        """Answer the next `count` POSTs with `status` (and a Retry-After header if given)"""
+        with self._lock:
+            self._failures.extend([(status, retry_after)] * count)
+
+    def start(self) -> 'WebhookReceiver':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='webhook-receiver', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'WebhookReceiver':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                name = self.path.lstrip('/').split('?', 1)[0]
+                body = self.rfile.read(int(self.headers.get('Content-Length', '0')))
+                with server._lock:
+                    server.requests += 1
+                    failure = server._failures.pop(0) if server._failures else None
+                    if failure is None:
+                        server.received.setdefault(name, []).append(json.loads(body))
+
+                status = 200 if failure is None else failure[0]
+                self.send_response(status)
+                if failure is not None and failure[1] is not None:
+                    self.send_header('Retry-After', f'{failure[1]:g}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -5,279 +5,2161 @@ Parses ICS calendar feeds and returns current room status
 Now with support for recurring events (RRULE)!
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from icalendar import Calendar
 from icalendar.prop import vRecur
 from datetime import datetime, timedelta, date
 import pytz
 import requests
 from typing import List, Dict, Optional
-import recurring_ical_events
 import os
+import contextvars
+import io
+import copy
+import sqlite3
+import gzip
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+from werkzeug.http import parse_accept_header
+from werkzeug.wsgi import ClosingIterator
+from requests.adapters import HTTPAdapter
 from dateutil.rrule import rruleset, rrulestr
+from metrics import Registry, SIZE_BUCKETS
+from snapshot_store import FeedSnapshot, SnapshotStore
+
+try:
+    import brotli  # Optional: enables `Content-Encoding: br`
+except ImportError:
+    brotli = None
 
 app = Flask(__name__)
 
-# Configuration - can be overridden by environment variable
-TIMEZONE_STR = os.environ.get('TIMEZONE', 'America/Chicago')
-TIMEZONE = pytz.timezone(TIMEZONE_STR)
-USE_PROXY_FOR_ICS = os.environ.get('USE_PROXY_FOR_ICS', 'true').lower() not in ('false', '0', 'no')
+# Configuration - can be overridden by environment variable
+TIMEZONE_STR = os.environ.get('TIMEZONE', 'America/Chicago')
+TIMEZONE = pytz.timezone(TIMEZONE_STR)
+USE_PROXY_FOR_ICS = os.environ.get('USE_PROXY_FOR_ICS', 'true').lower() not in ('false', '0', 'no')
+
+# Upstream HTTP - request timeout, concurrent requests allowed per calendar host, and
+# circuit breaker (consecutive failures before a host fails fast for CIRCUIT_COOLDOWN seconds)
+ICS_TIMEOUT = float(os.environ.get('ICS_TIMEOUT', '10'))
+ICS_MAX_PER_HOST = int(os.environ.get('ICS_MAX_PER_HOST', '4'))
+ICS_POOL_HOSTS = int(os.environ.get('ICS_POOL_HOSTS', '32'))
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_COOLDOWN = float(os.environ.get('CIRCUIT_COOLDOWN', '60'))
+
+# Adaptive timeouts - once a host has LATENCY_MIN_SAMPLES response times (of the last
+# LATENCY_WINDOW), its timeout is TIMEOUT_P99_FACTOR x its p99, between ICS_TIMEOUT_MIN and
+# ICS_TIMEOUT. With HEDGE_REQUESTS, a feed on a host whose p95 is at most HEDGE_MAX_P95 seconds
+# gets a second request when the first has not answered within that p95
+ICS_TIMEOUT_MIN = float(os.environ.get('ICS_TIMEOUT_MIN', '1'))
+TIMEOUT_P99_FACTOR = float(os.environ.get('TIMEOUT_P99_FACTOR', '3'))
+LATENCY_WINDOW = int(os.environ.get('LATENCY_WINDOW', '100'))
+LATENCY_MIN_SAMPLES = int(os.environ.get('LATENCY_MIN_SAMPLES', '10'))
+HEDGE_REQUESTS = os.environ.get('HEDGE_REQUESTS', 'false').lower() in ('true', '1', 'yes')
+HEDGE_MAX_P95 = float(os.environ.get('HEDGE_MAX_P95', '1'))
+
+# Feed cache - seconds a fetched feed is served without contacting upstream, and
+# memory bounds (entries / raw ICS bytes) before least recently used feeds are evicted
+ICS_CACHE_TTL = float(os.environ.get('ICS_CACHE_TTL', '60'))
+ICS_CACHE_MAX_ENTRIES = int(os.environ.get('ICS_CACHE_MAX_ENTRIES', '256'))
+ICS_CACHE_MAX_BYTES = int(os.environ.get('ICS_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+# Streaming ingest - feeds larger than ICS_MAX_BYTES are rejected, and one-off events
+# that ended more than ICS_PRUNE_PAST_DAYS before today (and recurring series whose
+# UNTIL has passed) are dropped before parsing. A negative value disables pruning.
+ICS_MAX_BYTES = int(os.environ.get('ICS_MAX_BYTES', str(50 * 1024 * 1024)))
+ICS_PRUNE_PAST_DAYS = int(os.environ.get('ICS_PRUNE_PAST_DAYS', '1'))
+ICS_CHUNK_SIZE = 64 * 1024
+
+# Number of days of occurrences expanded at once when a feed's content is compiled
+COMPILE_HORIZON_DAYS = int(os.environ.get('COMPILE_HORIZON_DAYS', '30'))
+
+# Event series (UIDs) that failed to expand are remembered per feed version, so a
+# malformed event costs one failed attempt per version instead of one per request
+FAILED_SERIES_MAX_ENTRIES = int(os.environ.get('FAILED_SERIES_MAX_ENTRIES', '1024'))
+
+# Expanded event series are kept by UID and content, so after a feed change or a new
+# day only the UIDs that changed are expanded again, even when the previous timeline
+# was evicted or loaded from a snapshot
+EXPANDED_SERIES_MAX_ENTRIES = int(os.environ.get('EXPANDED_SERIES_MAX_ENTRIES', '8192'))
+
+# Shared snapshots - when set, feed bodies, validators and compiled timelines are also
+# stored in SQLite under SNAPSHOT_DIR so other workers and restarted processes start warm
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR')
+
+# Background refresh - feeds seen by /room-status and /multi-room-status are re-fetched
+# every REFRESH_INTERVAL seconds (+/- REFRESH_JITTER as a fraction) so requests can be
+# answered from the latest snapshot. Failing feeds back off exponentially up to
+# REFRESH_MAX_BACKOFF; feeds not polled for REFRESH_IDLE_TIMEOUT are dropped. Snapshots
+# older than REFRESH_MAX_STALENESS (a few missed refreshes) are fetched synchronously;
+# if that fails too the snapshot is still served, with "stale": true in the payload.
+BACKGROUND_REFRESH = os.environ.get('BACKGROUND_REFRESH', 'true').lower() not in ('false', '0', 'no')
+REFRESH_INTERVAL = float(os.environ.get('REFRESH_INTERVAL', '60'))
+REFRESH_JITTER = float(os.environ.get('REFRESH_JITTER', '0.1'))
+REFRESH_MAX_BACKOFF = float(os.environ.get('REFRESH_MAX_BACKOFF', '900'))
+REFRESH_IDLE_TIMEOUT = float(os.environ.get('REFRESH_IDLE_TIMEOUT', '1800'))
+REFRESH_MAX_STALENESS = float(os.environ.get('REFRESH_MAX_STALENESS', str(REFRESH_INTERVAL * 5)))
+REFRESH_WORKERS = int(os.environ.get('REFRESH_WORKERS', '4'))
+
+# /multi-room-status fan-out - worker pool size, per-feed deadline (seconds from when
+# the feed starts processing) and overall request deadline (seconds from request start)
+MULTI_ROOM_MAX_WORKERS = int(os.environ.get('MULTI_ROOM_MAX_WORKERS', '8'))
+MULTI_ROOM_FEED_TIMEOUT = float(os.environ.get('MULTI_ROOM_FEED_TIMEOUT', '15'))
+MULTI_ROOM_DEADLINE = float(os.environ.get('MULTI_ROOM_DEADLINE', '45'))
+
+
+# Diagnostics - SERVER_TIMING adds a Server-Timing header with per-stage durations to
+# /room-status, /multi-room-status, /free-rooms and /debug. PROFILING_ENABLED allows `profile=1` on
+# those endpoints to run the request under cProfile; the PROFILE_TOP hottest functions
+# are returned in the response and, with PROFILE_DIR set, full stats are saved there.
+SERVER_TIMING = os.environ.get('SERVER_TIMING', 'false').lower() in ('true', '1', 'yes')
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() in ('true', '1', 'yes')
+PROFILE_DIR = os.environ.get('PROFILE_DIR')
+PROFILE_TOP = int(os.environ.get('PROFILE_TOP', '25'))
+DIAGNOSTIC_ENDPOINTS = ('room_status', 'multi_room_status', 'free_rooms', 'debug')
+
+# Response compression - JSON responses of at least COMPRESS_MIN_BYTES are sent with
+# brotli (when the optional `brotli` package is installed) or gzip if the client accepts it
+COMPRESS_RESPONSES = os.environ.get('COMPRESS_RESPONSES', 'true').lower() not in ('false', '0', 'no')
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '256'))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Named field selections for `view=`, matching what each TRMNL template renders
+PAYLOAD_VIEWS = {
+    'compact': (
+        'room_name', 'current_time', 'status', 'available_until', 'stale',
+        'current_booking.title', 'current_booking.start_time', 'current_booking.end_time',
+        'next_booking.title', 'next_booking.start_time', 'next_booking.end_time',
+    ),
+    'full': (
+        'room_name', 'current_time', 'current_date', 'status', 'available_until', 'stale',
+        'current_booking.title', 'current_booking.start_time', 'current_booking.end_time',
+        'current_booking.organizer', 'current_booking.minutes_remaining',
+        'next_booking.title', 'next_booking.start_time', 'next_booking.end_time', 'next_booking.organizer',
+    ),
+}
+
+# Metrics - exposed at /metrics in Prometheus text format. The endpoint and feed host
+# labels come from context variables so worker threads inherit them from the request.
+METRICS = Registry()
+FETCH_SECONDS = METRICS.histogram(
+    'room_display_fetch_seconds', 'Time to download an ICS feed, including connect and body', ('endpoint', 'host'))
+DOWNLOAD_BYTES = METRICS.histogram(
+    'room_display_download_bytes', 'Size of downloaded ICS bodies', ('endpoint', 'host'), buckets=SIZE_BUCKETS)
+PARSE_SECONDS = METRICS.histogram(
+    'room_display_parse_seconds', 'Time spent in Calendar.from_ical', ('endpoint', 'host'))
+EXPAND_SECONDS = METRICS.histogram(
+    'room_display_expand_seconds', 'Time spent expanding recurring events', ('endpoint', 'host'))
+STATUS_SECONDS = METRICS.histogram(
+    'room_display_status_seconds', 'Time to compute a room status from a feed snapshot', ('endpoint', 'host'))
+UPSTREAM_ERRORS = METRICS.counter(
+    'room_display_upstream_errors_total', 'Failed feed fetches by error type', ('host', 'type'))
+HEDGED_REQUESTS = METRICS.counter(
+    'room_display_hedged_requests_total', 'Second feed requests sent to a slow fast host, and those that answered first',
+    ('host', 'result'))
+FEED_CACHE_REQUESTS = METRICS.counter(
+    'room_display_feed_cache_requests_total', 'Feed cache lookups by result', ('result',))
+COMPILED_CACHE_REQUESTS = METRICS.counter(
+    'room_display_compiled_cache_requests_total', 'Compiled timeline lookups by result', ('result',))
+FEED_EVENTS = METRICS.gauge(
+    'room_display_feed_events', 'Occurrences in the compiled horizon of a feed', ('feed',))
+SERIES_EXPANSIONS = METRICS.counter(
+    'room_display_series_expansions_total', 'Per-UID event series expanded, reused or extended to a new horizon',
+    ('result',))
+SKIPPED_COMPONENTS = METRICS.gauge(
+    'room_display_feed_skipped_components', 'VEVENTs left out of the compiled horizon of a feed because they failed to expand',
+    ('feed',))
+COALESCED_REQUESTS = METRICS.counter(
+    'room_display_coalesced_requests_total', 'Callers that waited on an identical in-flight fetch or compile', ('kind',))
+RESPONSE_BYTES = METRICS.histogram(
+    'room_display_response_bytes', 'Size of JSON response bodies as sent', ('endpoint', 'encoding'), buckets=SIZE_BUCKETS)
+REQUESTS_IN_FLIGHT = METRICS.gauge(
+    'room_display_requests_in_flight', 'Requests currently being served', ('endpoint',))
+
+_metrics_endpoint: contextvars.ContextVar = contextvars.ContextVar('metrics_endpoint', default='background')
+_metrics_feed: contextvars.ContextVar = contextvars.ContextVar('metrics_feed', default='')
+_request_timings: contextvars.ContextVar = contextvars.ContextVar('request_timings', default=None)
+_profile_lock = threading.Lock()
+
+
+def record_timing(stage: str, seconds: float) -> None:
+    """Add to the current request's Server-Timing stage (summed across feeds and threads)"""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def feed_metrics_context(ics_url: str):
+    """Attribute metrics recorded inside the block to ics_url"""
+    token = _metrics_feed.set(ics_url)
+    try:
+        yield
+    finally:
+        _metrics_feed.reset(token)
+
+
+def _metric_labels(ics_url: Optional[str] = None) -> Dict[str, str]:
+    host = urlsplit(ics_url if ics_url is not None else _metrics_feed.get()).netloc
+    return {'endpoint': _metrics_endpoint.get(), 'host': host or 'unknown'}
+
+
+def _feed_label(ics_url: str) -> str:
+    """Host and path of a feed; query strings often carry access tokens and are left out"""
+    parts = urlsplit(ics_url)
+    return f'{parts.netloc}{parts.path}' or 'unknown'
+
+
+def _upstream_error_type(error: Exception) -> str:
+    if isinstance(error, CircuitOpenError):
+        return 'circuit_open'
+    if isinstance(error, FeedTooLargeError):
+        return 'too_large'
+    if isinstance(error, requests.Timeout):
+        return 'timeout'
+    if isinstance(error, requests.ConnectionError):
+        return 'connection'
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else 0
+        return 'http_5xx' if status >= 500 else 'http_4xx'
+    return 'other'
+
+
+@dataclass
+class FeedCacheEntry:
+    """A parsed feed plus the validators needed to revalidate it upstream"""
+    calendar: Calendar
+    size: int
+    fetched_at: float
+    content_hash: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # Content hash of the version this entry replaced, for incremental re-expansion
+    previous_hash: Optional[str] = None
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class FeedCache:
+    """
+    Thread-safe LRU cache of parsed ICS feeds keyed by URL.
+
+    Entries are bounded by count and by the size of the ICS body they were
+    parsed from; the least recently used feeds are evicted first.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, FeedCacheEntry]' = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[FeedCacheEntry]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def put(self, url: str, entry: FeedCacheEntry) -> None:
+        with self._lock:
+            previous = self._entries.pop(url, None)
+            if previous is not None:
+                self._total_bytes -= previous.size
+            if entry.size > self.max_bytes:
+                return  # Too large to cache at all
+            self._entries[url] = entry
+            self._total_bytes += entry.size
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.size
+
+    def mark_revalidated(self, url: str, fetched_at: Optional[float] = None) -> None:
+        """Restart the TTL of an entry after upstream answered 304 Not Modified"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                entry.fetched_at = time.monotonic() if fetched_at is None else fetched_at
+                self._entries.move_to_end(url)
+
+    def is_fresh(self, entry: FeedCacheEntry) -> bool:
+        return entry.age() < self.ttl
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+FEED_CACHE = FeedCache(ICS_CACHE_TTL, ICS_CACHE_MAX_ENTRIES, ICS_CACHE_MAX_BYTES)
+SNAPSHOTS: Optional[SnapshotStore] = SnapshotStore(SNAPSHOT_DIR) if SNAPSHOT_DIR else None
+
+
+_flight_callbacks_lock = threading.Lock()
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error', '_callbacks')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self._callbacks: Optional[List] = []
+
+    def add_done_callback(self, fn) -> None:
+        """Call fn(flight) once the flight has finished (right away if it has), from the finishing thread"""
+        with _flight_callbacks_lock:
+            if self._callbacks is not None:
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def _finish(self) -> None:
+        with _flight_callbacks_lock:
+            callbacks, self._callbacks = self._callbacks, None
+        self.done.set()
+        for fn in callbacks:
+            fn(self)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller runs the function; callers arriving while it is in
+    flight wait for it and receive the same result or the same exception.
+    Callers that cannot block (the asyncio serving mode) use join() and
+    finish() instead of do(), so they share flights with threaded callers.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._flights: Dict[object, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def join(self, key) -> tuple:
+        """(flight for key, whether the caller leads it and must finish() it)"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            COALESCED_REQUESTS.inc(kind=self.kind)
+        return flight, leader
+
+    def finish(self, key, flight: _Flight, result=None, error: Optional[BaseException] = None) -> None:
+        """Publish the leader's result (or error) to every caller waiting on the flight"""
+        flight.result = result
+        flight.error = error
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight._finish()
+
+    def do(self, key, fn):
+        flight, leader = self.join(key)
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, flight, error=e)
+            raise
+        self.finish(key, flight, result)
+        return result
+
+
+FEED_FLIGHTS = SingleFlight('fetch')
+SNAPSHOT_FLIGHTS = SingleFlight('snapshot')
+COMPILE_FLIGHTS = SingleFlight('compile')
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of contacting a calendar host whose circuit is open"""
+
+
+@dataclass
+class CircuitState:
+    failures: int = 0
+    opened_at: Optional[float] = None
+    trial_in_flight: bool = False
+
+
+class HostCircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After `threshold` consecutive failures a host is rejected immediately for
+    `cooldown` seconds. Once the cooldown has passed a single trial request is
+    let through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._hosts: Dict[str, CircuitState] = {}
+        self._lock = threading.Lock()
+
+    def before_request(self, host: str) -> None:
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None or state.opened_at is None:
+                return
+            remaining = state.opened_at + self.cooldown - time.monotonic()
+            if remaining > 0 or state.trial_in_flight:
+                raise CircuitOpenError(
+                    f"Circuit open for {host} after {state.failures} consecutive failures; "
+                    f"retrying in {max(remaining, 0):.0f}s"
+                )
+            state.trial_in_flight = True
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        with self._lock:
+            state = self._hosts.setdefault(host, CircuitState())
+            state.failures += 1
+            state.trial_in_flight = False
+            if state.failures >= self.threshold:
+                state.opened_at = time.monotonic()
+
+    def release_trial(self, host: str) -> None:
+        """Let another trial through when the last one ended without a verdict"""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is not None:
+                state.trial_in_flight = False
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            state = self._hosts.get(host)
+            return state is not None and state.opened_at is not None
+
+
+class FeedHttpClient:
+    """
+    Shared HTTP client for ICS feeds.
+
+    One requests.Session per process keeps connections alive per host (the
+    session is recreated after a fork). Each host gets at most
+    `max_per_host` concurrent requests and a circuit breaker.
+    """
+
+    def __init__(self, trust_env: bool, max_per_host: int, pool_hosts: int, breaker: HostCircuitBreaker):
+        self.trust_env = trust_env
+        self.max_per_host = max_per_host
+        self.pool_hosts = pool_hosts
+        self.breaker = breaker
+        self._session: Optional[requests.Session] = None
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _reset_after_fork(self) -> None:
+        # Caller holds self._lock; sockets, semaphores and threads must not be shared with a parent process
+        if self._pid != os.getpid():
+            self._session = None
+            self._hedge_executor = None
+            self._slots = {}
+            self._pid = os.getpid()
+
+    @property
+    def session(self) -> requests.Session:
+        with self._lock:
+            self._reset_after_fork()
+            if self._session is None:
+                session = requests.Session()
+                session.trust_env = self.trust_env  # False ignores http/https proxy env vars that can block the feed
+                adapter = HTTPAdapter(pool_connections=self.pool_hosts, pool_maxsize=self.max_per_host)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+
+    @property
+    def hedge_executor(self) -> ThreadPoolExecutor:
+        """Threads running the requests of a hedged fetch"""
+        with self._lock:
+            self._reset_after_fork()
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=self.pool_hosts, thread_name_prefix='hedge')
+            return self._hedge_executor
+
+    def _slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            self._reset_after_fork()
+            slot = self._slots.get(host)
+            if slot is None:
+                slot = self._slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return slot
+
+    def try_extra_slot(self, host: str) -> Optional[threading.BoundedSemaphore]:
+        """One more of the host's concurrency slots if one is free right now (released by the caller)"""
+        slot = self._slot(host)
+        return slot if slot.acquire(blocking=False) else None
+
+    @contextmanager
+    def request_slot(self, url: str, timeout: float):
+        """
+        Guard one upstream request (including reading its body) to url's host
+
+        Fails fast while the host's circuit is open, waits up to `timeout` for
+        one of the host's concurrency slots, and feeds connection errors,
+        timeouts and 5xx responses raised inside the block to the breaker.
+        """
+        host = urlsplit(url).netloc
+        self.breaker.before_request(host)
+        slot = self._slot(host)
+        if not slot.acquire(timeout=timeout):
+            self.breaker.release_trial(host)
+            raise Exception(f"Too many concurrent requests to {host}")
+        try:
+            yield
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+            self.breaker.record_failure(host)
+            raise
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code >= 500:
+                self.breaker.record_failure(host)
+            else:
+                self.breaker.release_trial(host)
+            raise
+        except BaseException:
+            self.breaker.release_trial(host)
+            raise
+        else:
+            self.breaker.record_success(host)
+        finally:
+            slot.release()
+
+
+HTTP_CLIENT = FeedHttpClient(
+    trust_env=USE_PROXY_FOR_ICS,
+    max_per_host=ICS_MAX_PER_HOST,
+    pool_hosts=ICS_POOL_HOSTS,
+    breaker=HostCircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN),
+)
+
+
+class HostLatency:
+    """Rolling response times of one calendar host, and what the fetch layer did about them"""
+
+    def __init__(self, window: int):
+        self.samples: deque = deque(maxlen=window)
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HostLatencyTracker:
+    """
+    Per-host latency profiles behind adaptive timeouts and hedged fetches
+
+    A sample is the time until response headers arrive, which is what the
+    request timeout bounds. A request that times out is recorded as taking
+    the full timeout, so a host that slows down gets longer timeouts again.
+    """
+
+    def __init__(self, window: int, min_samples: int, min_timeout: float, max_timeout: float, p99_factor: float,
+                 hedge: bool, hedge_max_p95: float):
+        self.window = window
+        self.min_samples = min_samples
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.p99_factor = p99_factor
+        self.hedge = hedge
+        self.hedge_max_p95 = hedge_max_p95
+        self._hosts: Dict[str, HostLatency] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host: str) -> HostLatency:
+        # Caller holds self._lock
+        latency = self._hosts.get(host)
+        if latency is None:
+            latency = self._hosts[host] = HostLatency(self.window)
+        return latency
+
+    def record(self, host: str, seconds: float) -> None:
+        with self._lock:
+            self._host(host).samples.append(seconds)
+
+    def record_timeout(self, host: str, timeout: float) -> None:
+        with self._lock:
+            latency = self._host(host)
+            latency.samples.append(timeout)
+            latency.timeouts += 1
+
+    def record_hedge(self, host: str, won: bool) -> None:
+        with self._lock:
+            latency = self._host(host)
+            latency.hedges += 1
+            latency.hedge_wins += won
+
+    def _timeout(self, latency: Optional[HostLatency]) -> float:
+        if latency is None or len(latency.samples) < self.min_samples:
+            return self.max_timeout
+        return max(self.min_timeout, min(self.max_timeout, self.p99_factor * latency.percentile(0.99)))
+
+    def timeout_for(self, host: str) -> float:
+        with self._lock:
+            return self._timeout(self._hosts.get(host))
+
+    def hedge_delay(self, host: str) -> Optional[float]:
+        """Seconds to wait before hedging a request to host, or None when it is not hedged"""
+        if not self.hedge:
+            return None
+        with self._lock:
+            latency = self._hosts.get(host)
+            if latency is None or len(latency.samples) < self.min_samples:
+                return None
+            p95 = latency.percentile(0.95)
+            return p95 if p95 <= self.hedge_max_p95 else None
+
+    def stats(self, host: str) -> Dict:
+        with self._lock:
+            latency = self._hosts.get(host)
+            if latency is None:
+                return {'host': host, 'samples': 0, 'timeout_seconds': self.max_timeout}
+
+            def _ms(q: float) -> Optional[float]:
+                value = latency.percentile(q)
+                return round(value * 1000, 1) if value is not None else None
+
+            return {
+                'host': host,
+                'samples': len(latency.samples),
+                'p50_ms': _ms(0.5),
+                'p95_ms': _ms(0.95),
+                'p99_ms': _ms(0.99),
+                'timeout_seconds': round(self._timeout(latency), 3),
+                'timeouts': latency.timeouts,
+                'hedges': latency.hedges,
+                'hedge_wins': latency.hedge_wins,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hosts.clear()
+
+
+FEED_LATENCY = HostLatencyTracker(
+    window=LATENCY_WINDOW,
+    min_samples=LATENCY_MIN_SAMPLES,
+    min_timeout=ICS_TIMEOUT_MIN,
+    max_timeout=ICS_TIMEOUT,
+    p99_factor=TIMEOUT_P99_FACTOR,
+    hedge=HEDGE_REQUESTS,
+    hedge_max_p95=HEDGE_MAX_P95,
+)
+
+
+def _http_get(url: str, headers: Optional[Dict[str, str]] = None, stream: bool = False,
+              timeout: float = ICS_TIMEOUT) -> requests.Response:
+    """GET an ICS feed over the shared pooled session"""
+    return HTTP_CLIENT.session.get(url, headers=headers, timeout=timeout, stream=stream)
+
+
+def _discard_response(future, slot: Optional[threading.BoundedSemaphore] = None) -> None:
+    """Done callback closing the response of a request whose result is not used, then freeing its host slot"""
+    try:
+        if future.exception() is None:
+            future.result().close()
+    finally:
+        if slot is not None:
+            slot.release()
+
+
+def _latency_sample(host: str, started: float, timeout: float):
+    """Done callback adding a request's time to response headers (or its timeout) to the host's profile"""
+    def record(future) -> None:
+        error = future.exception()
+        if isinstance(error, requests.Timeout):
+            FEED_LATENCY.record_timeout(host, timeout)
+        elif error is None:
+            FEED_LATENCY.record(host, time.perf_counter() - started)
+    return record
+
+
+def _hedged_get(url: str, headers: Dict[str, str], timeout: float, hedge_after: float) -> requests.Response:
+    """
+    GET url, sending a second request if the first has no response after hedge_after seconds
+
+    The first response to arrive is returned and the other is closed. The
+    hedge only goes out if the host has a free concurrency slot; the caller's
+    slot covers the returned response, and the extra one is held until the
+    other request has finished and been closed. Only the first request's
+    latency is recorded, so a winning hedge does not hide a slow host.
+    """
+    host = urlsplit(url).netloc
+    executor = HTTP_CLIENT.hedge_executor
+    first = executor.submit(_http_get, url, headers, True, timeout)
+    first.add_done_callback(_latency_sample(host, time.perf_counter(), timeout))
+    done, _ = wait([first], timeout=hedge_after)
+    extra_slot = None if done else HTTP_CLIENT.try_extra_slot(host)
+    if extra_slot is None:
+        return first.result()
+
+    second = executor.submit(_http_get, url, headers, True, timeout)
+    pending = {first, second}
+    winner = None
+    while pending and winner is None:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        # Both may have finished; prefer the first request's response then
+        for future in sorted(done, key=lambda future: future is second):
+            if future.exception() is None:
+                winner = future
+                break
+    if winner is None:
+        extra_slot.release()
+        FEED_LATENCY.record_hedge(host, False)
+        HEDGED_REQUESTS.inc(host=host, result='lost')
+        return first.result()
+
+    loser = second if winner is first else first
+    loser.add_done_callback(lambda future: _discard_response(future, extra_slot))
+    won = winner is second
+    FEED_LATENCY.record_hedge(host, won)
+    HEDGED_REQUESTS.inc(host=host, result='won' if won else 'lost')
+    return winner.result()
+
+
+def _timed_get(url: str, headers: Dict[str, str]) -> requests.Response:
+    """
+    GET a feed (streamed) with the host's adaptive timeout, hedging fast hosts,
+    and add the time to response headers to the host's latency profile
+    """
+    host = urlsplit(url).netloc
+    timeout = FEED_LATENCY.timeout_for(host)
+    hedge_after = FEED_LATENCY.hedge_delay(host)
+    if hedge_after is not None:
+        return _hedged_get(url, headers, timeout, hedge_after)
+    started = time.perf_counter()
+    try:
+        response = _http_get(url, headers=headers, stream=True, timeout=timeout)
+    except requests.Timeout:
+        FEED_LATENCY.record_timeout(host, timeout)
+        raise
+    FEED_LATENCY.record(host, time.perf_counter() - started)
+    return response
+
+
+class FeedTooLargeError(ValueError):
+    """Raised when an ICS body exceeds ICS_MAX_BYTES"""
+
+
+def _ics_date(value: str) -> date:
+    """Calendar date of an ICS DATE / DATE-TIME value (time and zone ignored)"""
+    return datetime.strptime(value[:8], '%Y%m%d').date()
+
+
+class IcsStreamPruner:
+    """
+    Incrementally splits an ICS body into VEVENT blocks as it downloads.
+
+    Everything outside VEVENTs (calendar properties, VTIMEZONEs) is kept.
+    Each VEVENT is buffered until its END line and dropped if it cannot
+    overlap anything from `cutoff` onwards, so the Calendar built from
+    `finish()` only contains components that matter for current queries.
+    Dates are compared without time zones; the cutoff should leave a day
+    of slack for that.
+    """
+
+    def __init__(self, cutoff: Optional[date], max_bytes: int):
+        self.cutoff = cutoff
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.kept_events = 0
+        self.dropped_events = 0
+        self._hash = hashlib.sha256()
+        self._pending = b''
+        self._out: List[bytes] = []
+        self._block: Optional[List[bytes]] = None
+        self._depth = 0
+
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 of the raw (unpruned) body"""
+        return self._hash.hexdigest()
+
+    def feed(self, chunk: bytes) -> None:
+        self.total_bytes += len(chunk)
+        if self.total_bytes > self.max_bytes:
+            raise FeedTooLargeError(f"ICS feed exceeds {self.max_bytes} bytes")
+        self._hash.update(chunk)
+        lines = (self._pending + chunk).split(b'\n')
+        self._pending = lines.pop()
+        for line in lines:
+            self._line(line.rstrip(b'\r'))
+
+    def finish(self) -> bytes:
+        if self._pending:
+            self._line(self._pending.rstrip(b'\r'))
+            self._pending = b''
+        if self._block is not None:
+            # Unterminated VEVENT - keep it and let the parser decide
+            self._out.extend(self._block)
+            self._block = None
+        return b'\r\n'.join(self._out) + b'\r\n'
+
+    def _line(self, line: bytes) -> None:
+        if self._block is None:
+            if line.strip().upper() == b'BEGIN:VEVENT':
+                self._block = [line]
+                self._depth = 0
+            else:
+                self._out.append(line)
+            return
+
+        self._block.append(line)
+        if line[:6].upper() == b'BEGIN:':
+            self._depth += 1
+        elif line[:4].upper() == b'END:':
+            if self._depth:
+                self._depth -= 1
+                return
+            block, self._block = self._block, None
+            if self._keep(block):
+                self._out.extend(block)
+                self.kept_events += 1
+            else:
+                self.dropped_events += 1
+
+    def _keep(self, block: List[bytes]) -> bool:
+        if self.cutoff is None:
+            return True
+
+        # Unfold continuation lines and collect the top-level date properties
+        logical: List[bytes] = []
+        for line in block[1:-1]:
+            if line[:1] in (b' ', b'\t') and logical:
+                logical[-1] += line[1:]
+            else:
+                logical.append(line)
+        props: Dict[str, str] = {}
+        depth = 0
+        for line in logical:
+            head = line[:6].upper()
+            if head == b'BEGIN:':
+                depth += 1
+            elif line[:4].upper() == b'END:':
+                depth -= 1
+            elif not depth:
+                name = line.split(b':', 1)[0].split(b';', 1)[0].upper().decode('ascii', 'ignore')
+                if name in ('DTSTART', 'DTEND', 'RRULE', 'RDATE', 'RECURRENCE-ID'):
+                    props.setdefault(name, line.rpartition(b':')[2].decode('ascii', 'ignore').strip())
+
+        try:
+            if 'RDATE' in props:
+                return True
+            if 'RRULE' in props:
+                rule = dict(part.split('=', 1) for part in props['RRULE'].split(';') if '=' in part)
+                until = rule.get('UNTIL')
+                return until is None or _ics_date(until) >= self.cutoff
+            if 'DTEND' not in props:
+                return True
+            if 'RECURRENCE-ID' in props and _ics_date(props['RECURRENCE-ID']) >= self.cutoff:
+                return True
+            return _ics_date(props['DTEND']) >= self.cutoff
+        except ValueError:
+            return True
+
+
+def _prune_cutoff() -> Optional[date]:
+    if ICS_PRUNE_PAST_DAYS < 0:
+        return None
+    return datetime.now(TIMEZONE).date() - timedelta(days=ICS_PRUNE_PAST_DAYS)
+
+
+def fetch_ics_feed(ics_url: str) -> Calendar:
+    """Fetch and parse ICS calendar from URL"""
+    return get_feed(ics_url).calendar
+
+
+def get_feed(ics_url: str, revalidate: bool = False) -> FeedCacheEntry:
+    """
+    Fetch and parse ICS calendar from URL, returning it with its cache metadata
+
+    Parsed calendars are cached per URL for ICS_CACHE_TTL seconds. Once stale
+    (or when revalidate is set), the feed is revalidated with If-None-Match /
+    If-Modified-Since so an unchanged feed (304) reuses the cached Calendar
+    without downloading or parsing it again.
+
+    The body is streamed through IcsStreamPruner, so events that ended before
+    the prune cutoff never become icalendar components. Concurrent callers
+    for the same URL share a single upstream fetch.
+    """
+    cached = FEED_CACHE.get(ics_url)
+    if cached is not None and not revalidate and FEED_CACHE.is_fresh(cached):
+        FEED_CACHE_REQUESTS.inc(result='hit')
+        return cached
+    return FEED_FLIGHTS.do(ics_url, lambda: _download_feed(ics_url, revalidate))
+
+
+def _download_feed(ics_url: str, revalidate: bool) -> FeedCacheEntry:
+    """Fetch (or revalidate) and parse a feed, storing the result in FEED_CACHE"""
+    cached = FEED_CACHE.get(ics_url)
+    if cached is not None and not revalidate and FEED_CACHE.is_fresh(cached):
+        # Another flight refreshed the feed between our cache check and this one starting
+        return cached
+    if SNAPSHOTS is not None:
+        # Another worker (or an earlier process) may have fetched it already
+        shared = shared_snapshot(ics_url, cached)
+        if shared is not None:
+            if FEED_CACHE.is_fresh(shared):
+                return shared
+            cached = shared
+    labels = _metric_labels(ics_url)
+
+    try:
+        started = time.perf_counter()
+        with HTTP_CLIENT.request_slot(ics_url, timeout=ICS_TIMEOUT):
+            response = _timed_get(ics_url, conditional_headers(cached))
+            # Headers received: DNS, connect, TLS and server think time
+            headers_at = time.perf_counter()
+            record_timing('upstream_ttfb', headers_at - started)
+            try:
+                if response.status_code == 304 and cached is not None:
+                    mark_feed_revalidated(ics_url)
+                    FETCH_SECONDS.observe(time.perf_counter() - started, **labels)
+                    FEED_CACHE_REQUESTS.inc(result='revalidated')
+                    return cached
+                response.raise_for_status()
+                declared_length = response.headers.get('Content-Length')
+                if declared_length and int(declared_length) > ICS_MAX_BYTES:
+                    raise FeedTooLargeError(f"ICS feed exceeds {ICS_MAX_BYTES} bytes")
+                pruner = IcsStreamPruner(_prune_cutoff(), ICS_MAX_BYTES)
+                for chunk in response.iter_content(chunk_size=ICS_CHUNK_SIZE):
+                    pruner.feed(chunk)
+                body = pruner.finish()
+            finally:
+                response.close()
+        record_timing('download', time.perf_counter() - headers_at)
+        FETCH_SECONDS.observe(time.perf_counter() - started, **labels)
+        DOWNLOAD_BYTES.observe(pruner.total_bytes, **labels)
+        FEED_CACHE_REQUESTS.inc(result='miss')
+    except Exception as e:
+        UPSTREAM_ERRORS.inc(host=labels['host'], type=_upstream_error_type(e))
+        raise Exception(f"Failed to fetch ICS feed: {str(e)}")
+
+    return store_feed(
+        ics_url, body, pruner.content_hash, response.headers.get('ETag'), response.headers.get('Last-Modified')
+    )
+
+
+def conditional_headers(cached: Optional[FeedCacheEntry]) -> Dict[str, str]:
+    """If-None-Match / If-Modified-Since headers for revalidating a cached feed"""
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers['If-None-Match'] = cached.etag
+        if cached.last_modified:
+            headers['If-Modified-Since'] = cached.last_modified
+    return headers
+
+
+def store_feed(
+    ics_url: str, body: bytes, content_hash: str, etag: Optional[str], last_modified: Optional[str]
+) -> FeedCacheEntry:
+    """
+    Parse a downloaded (pruned) ICS body and store it in FEED_CACHE
+
+    A body identical to the cached one (a feed without validators that did not
+    change) reuses the cached Calendar, and with it the compiled timeline, so
+    only its validators and TTL are updated.
+    """
+    previous = FEED_CACHE.get(ics_url)
+    if previous is not None and previous.content_hash == content_hash:
+        entry = FeedCacheEntry(
+            calendar=previous.calendar,
+            size=previous.size,
+            fetched_at=time.monotonic(),
+            content_hash=content_hash,
+            etag=etag,
+            last_modified=last_modified,
+            previous_hash=previous.previous_hash,
+        )
+        FEED_CACHE.put(ics_url, entry)
+        if SNAPSHOTS is not None:
+            _write_snapshot(ics_url, lambda: SNAPSHOTS.save_feed(
+                FeedSnapshot(ics_url, body, content_hash, etag, last_modified, time.time())
+            ))
+        return entry
+
+    labels = _metric_labels(ics_url)
+    try:
+        started = time.perf_counter()
+        cal = Calendar.from_ical(body)
+        PARSE_SECONDS.observe(time.perf_counter() - started, **labels)
+        record_timing('parse', time.perf_counter() - started)
+    except Exception as e:
+        UPSTREAM_ERRORS.inc(host=labels['host'], type='parse')
+        raise Exception(f"Failed to fetch ICS feed: {str(e)}")
+
+    entry = FeedCacheEntry(
+        calendar=cal,
+        size=len(body),
+        fetched_at=time.monotonic(),
+        content_hash=content_hash,
+        etag=etag,
+        last_modified=last_modified,
+        previous_hash=previous.content_hash if previous is not None else None,
+    )
+    FEED_CACHE.put(ics_url, entry)
+    if SNAPSHOTS is not None:
+        _write_snapshot(ics_url, lambda: SNAPSHOTS.save_feed(
+            FeedSnapshot(ics_url, body, content_hash, etag, last_modified, time.time())
+        ))
+    return entry
+
+
+def mark_feed_revalidated(ics_url: str) -> None:
+    """Restart a feed's TTL after a 304, here and in the shared snapshot store"""
+    FEED_CACHE.mark_revalidated(ics_url)
+    if SNAPSHOTS is not None:
+        _write_snapshot(ics_url, lambda: SNAPSHOTS.touch_feed(ics_url, time.time()))
+
+
+def _write_snapshot(ics_url: str, write) -> None:
+    # The snapshot store is an optimisation; a full or locked disk must not fail the request
+    try:
+        write()
+    except sqlite3.Error as e:
+        app.logger.warning(f"Could not write snapshot for {ics_url}: {str(e)}")
+
+
+def cached_feed(ics_url: str) -> Optional[FeedCacheEntry]:
+    """This process's cached entry for a feed, loading the shared snapshot on first use"""
+    cached = FEED_CACHE.get(ics_url)
+    if cached is None and SNAPSHOTS is not None:
+        cached = SNAPSHOT_FLIGHTS.do(ics_url, lambda: FEED_CACHE.get(ics_url) or shared_snapshot(ics_url, None))
+    return cached
+
+
+def shared_snapshot(ics_url: str, cached: Optional[FeedCacheEntry]) -> Optional[FeedCacheEntry]:
+    """
+    The stored snapshot of a feed if it is newer than `cached` (this process's
+    entry, if any), installed in FEED_CACHE; otherwise None
+
+    When the stored content matches `cached` only its age is taken over, so
+    a feed another worker revalidated is not parsed again.
+    """
+    try:
+        info = SNAPSHOTS.feed_info(ics_url)
+        if info is None:
+            return None
+        content_hash, stored_at = info
+        age = max(0.0, time.time() - stored_at)
+        if cached is not None and age >= cached.age():
+            return None
+        if cached is not None and content_hash == cached.content_hash:
+            FEED_CACHE.mark_revalidated(ics_url, time.monotonic() - age)
+            entry = cached
+        else:
+            snapshot = SNAPSHOTS.load_feed(ics_url)
+            if snapshot is None:
+                return None
+            started = time.perf_counter()
+            cal = Calendar.from_ical(snapshot.body)
+            PARSE_SECONDS.observe(time.perf_counter() - started, **_metric_labels(ics_url))
+            record_timing('parse', time.perf_counter() - started)
+            entry = FeedCacheEntry(
+                calendar=cal,
+                size=len(snapshot.body),
+                fetched_at=time.monotonic() - snapshot.age(),
+                content_hash=snapshot.content_hash,
+                etag=snapshot.etag,
+                last_modified=snapshot.last_modified,
+            )
+            FEED_CACHE.put(ics_url, entry)
+    except Exception as e:
+        app.logger.warning(f"Could not read snapshot for {ics_url}: {str(e)}")
+        return None
+    FEED_CACHE_REQUESTS.inc(result='disk')
+    return entry
+
+
+@dataclass
+class RefreshState:
+    """Schedule bookkeeping for one background-refreshed feed"""
+    last_polled: float
+    next_refresh: float
+    failures: int = 0
+    last_error: Optional[str] = None
+
+
+class FeedRefresher:
+    """
+    Re-fetches recently polled feeds on a schedule in a background thread.
+
+    The thread (and its worker pool) is started lazily on first use and
+    restarted after a fork, so gunicorn workers each run their own refresher.
+    """
+
+    def __init__(self, interval: float, jitter: float, max_backoff: float, idle_timeout: float, workers: int):
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.idle_timeout = idle_timeout
+        self.workers = workers
+        self._feeds: Dict[str, RefreshState] = {}
+        self._in_flight: set = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid: Optional[int] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _delay(self, base: float) -> float:
+        return base * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def track(self, url: str) -> None:
+        """Record a poll for url, scheduling it for refresh if it is new"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._feeds.get(url)
+            if state is None:
+                self._feeds[url] = RefreshState(last_polled=now, next_refresh=now + self._delay(self.interval))
+            else:
+                state.last_polled = now
+        self._ensure_started()
+
+    def tracked(self) -> Dict[str, RefreshState]:
+        with self._lock:
+            return dict(self._feeds)
+
+    def due_feeds(self, now: Optional[float] = None) -> List[str]:
+        """Feeds whose refresh is due, after evicting feeds nobody has polled recently"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for url in [u for u, state in self._feeds.items() if now - state.last_polled > self.idle_timeout]:
+                del self._feeds[url]
+            return [
+                url for url, state in self._feeds.items()
+                if state.next_refresh <= now and url not in self._in_flight
+            ]
+
+    def refresh(self, url: str) -> None:
+        """Revalidate one feed and pre-compile today's timeline, rescheduling it"""
+        try:
+            with feed_metrics_context(url):
+                feed = get_feed(url, revalidate=True)
+                get_events(feed, datetime.now(TIMEZONE))
+            error = None
+        except Exception as e:
+            error = str(e)
+            app.logger.warning(f"Background refresh failed for {url}: {error}")
+
+        now = time.monotonic()
+        with self._lock:
+            self._in_flight.discard(url)
+            state = self._feeds.get(url)
+            if state is None:
+                return
+            if error is None:
+                state.failures = 0
+                state.next_refresh = now + self._delay(self.interval)
+            else:
+                state.failures += 1
+                backoff = min(self.interval * (2 ** state.failures), self.max_backoff)
+                state.next_refresh = now + self._delay(backoff)
+            state.last_error = error
+
+    def refresh_due(self, now: Optional[float] = None) -> int:
+        """Synchronously refresh every due feed; returns how many were refreshed"""
+        urls = self.due_feeds(now)
+        for url in urls:
+            self.refresh(url)
+        return len(urls)
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._in_flight.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='feed-refresh')
+            threading.Thread(target=self._run, name='feed-refresher', daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            for url in self.due_feeds():
+                with self._lock:
+                    self._in_flight.add(url)
+                self._executor.submit(self.refresh, url)
+            self._wakeup.wait(1.0)
+
+
+REFRESHER = FeedRefresher(REFRESH_INTERVAL, REFRESH_JITTER, REFRESH_MAX_BACKOFF, REFRESH_IDLE_TIMEOUT, REFRESH_WORKERS)
+
+
+def get_feed_snapshot(ics_url: str) -> FeedCacheEntry:
+    """
+    Latest snapshot of a feed for the request path (stale-while-revalidate)
+
+    With BACKGROUND_REFRESH enabled the feed is registered with the refresher
+    and any cached snapshot younger than REFRESH_MAX_STALENESS is returned
+    immediately; only unknown or badly stale feeds are fetched inline. When
+    that fetch fails, the stale snapshot is served (see is_stale).
+    """
+    if not BACKGROUND_REFRESH:
+        return get_feed(ics_url)
+    REFRESHER.track(ics_url)
+    cached = cached_feed(ics_url)
+    if cached is not None and cached.age() < REFRESH_MAX_STALENESS:
+        FEED_CACHE_REQUESTS.inc(result='snapshot')
+        return cached
+    try:
+        return get_feed(ics_url)
+    except Exception as e:
+        return stale_snapshot(ics_url, cached, e)
+
+
+def stale_snapshot(ics_url: str, cached: Optional[FeedCacheEntry], error: Exception) -> FeedCacheEntry:
+    """The snapshot to serve when fetching a badly stale feed failed, or the error when there is none"""
+    if cached is None:
+        raise error
+    app.logger.warning(f"Serving a {cached.age():.0f}s old snapshot of {ics_url}: {error}")
+    FEED_CACHE_REQUESTS.inc(result='stale')
+    return cached
+
+
+def is_stale(feed: FeedCacheEntry) -> bool:
+    """Whether a feed is older than requests are normally answered from (its refreshes are failing)"""
+    return feed.age() >= (REFRESH_MAX_STALENESS if BACKGROUND_REFRESH else FEED_CACHE.ttl)
+
+
+@dataclass
+class ExpandedSeries:
+    """
+    Occurrences of the master VEVENTs sharing a UID, and the fingerprint they were expanded from
+
+    `skipped` counts the components left out because they failed to expand,
+    with the error in `error`. range_start..range_end is the range expanded.
+    """
+    fingerprint: tuple
+    events: 'EventStore'
+    skipped: int = 0
+    error: Optional[str] = None
+    range_start: Optional[datetime] = None
+    range_end: Optional[datetime] = None
+
+
+@dataclass
+class SeriesFailure:
+    """How a UID revision failed: the error, and whether dropping its broken overrides was enough"""
+    error: str
+    skipped: int
+    degraded: bool
+
+
+class LruCache:
+    """Thread-safe LRU of values keyed by tuples"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[tuple, object]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: tuple, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SeriesFailureCache(LruCache):
+    """Failed series keyed by (feed content hash, UID)"""
+
+
+class ExpandedSeriesCache(LruCache):
+    """
+    Expanded series keyed by (UID, fingerprint)
+
+    The fingerprint covers everything expansion reads, so a series found here
+    is valid for any feed and feed version with the same UID content. Only
+    series that expanded without errors are kept.
+    """
+
+
+FAILED_SERIES = SeriesFailureCache(FAILED_SERIES_MAX_ENTRIES)
+EXPANDED_SERIES = ExpandedSeriesCache(EXPANDED_SERIES_MAX_ENTRIES)
+
+
+def _normalize_dt(dt_value: object, default_end: bool = False) -> datetime:
+    """Convert ical date/datetime to timezone-aware datetime in the service timezone."""
+    if isinstance(dt_value, datetime):
+        if dt_value.tzinfo is None:
+            return TIMEZONE.localize(dt_value)
+        return dt_value.astimezone(TIMEZONE)
+    if isinstance(dt_value, date):
+        base_dt = datetime.combine(dt_value, datetime.max.time() if default_end else datetime.min.time())
+        return TIMEZONE.localize(base_dt)
+    raise ValueError("Unsupported date value")
+
+
+# Everything _iter_series reads from a component, so an edit changes the fingerprint
+# even when the publisher does not bump SEQUENCE, DTSTAMP or LAST-MODIFIED
+_FINGERPRINT_PROPERTIES = ('RECURRENCE-ID', 'SEQUENCE', 'DTSTAMP', 'LAST-MODIFIED', 'DTSTART', 'DTEND', 'RRULE',
+                           'RDATE', 'EXDATE', 'STATUS', 'SUMMARY', 'ORGANIZER')
+
+
+def _fingerprint_value(value) -> object:
+    """Hashable, comparable form of a property value"""
+    if isinstance(value, list):
+        return tuple(_fingerprint_value(item) for item in value)
+    if hasattr(value, 'dts'):
+        return tuple(item.dt for item in value.dts)
+    if hasattr(value, 'dt'):
+        return value.dt
+    if isinstance(value, dict):
+        return tuple((key, _fingerprint_value(item)) for key, item in value.items())
+    return value if value is None or isinstance(value, int) else str(value)
+
+
+def _series_fingerprint(components: List) -> tuple:
+    """
+    What identifies a revision of a UID's master and override components
+
+    Compares the decoded values of the properties expansion uses rather than
+    serialising every component, which costs several times as much.
+    """
+    return tuple(_fingerprint_value(component.get(name))
+                 for component in components for name in _FINGERPRINT_PROPERTIES)
+
+
+def _occurrence(component, start_dt: datetime, end_dt: datetime) -> Dict:
+    return {
+        'summary': str(component.get('SUMMARY', 'Booking')),
+        'start': start_dt,
+        'end': end_dt,
+        'organizer': str(component.get('ORGANIZER', '')).replace('mailto:', '')
+    }
+
+
+def _event_start(event: Dict) -> datetime:
+    return event['start']
+
+
+def _recurrence_set(component, start_dt: datetime):
+    """(dateutil rruleset, timezone its naive wall times are in) for a master with an RRULE"""
+    # Expand recurring instances using dateutil to better handle UNTIL rules in UTC
+    rule_params = dict(component.decoded('RRULE'))
+    rrule_tz = start_dt.tzinfo or TIMEZONE
+    start_for_rrule = start_dt
+
+    # Convert timezone-aware start/UNTIL values to naive datetimes so dateutil keeps wall times across DST
+    if start_dt.tzinfo:
+        start_for_rrule = start_dt.replace(tzinfo=None)
+        if 'UNTIL' in rule_params and rule_params['UNTIL']:
+            until_dt = rule_params['UNTIL'][0]
+            if isinstance(until_dt, datetime):
+                rule_params['UNTIL'] = [until_dt.astimezone(rrule_tz).replace(tzinfo=None)]
+    rule_str = vRecur(rule_params).to_ical().decode()
+    rrule_set = rruleset()
+    rrule_set.rrule(rrulestr(rule_str, dtstart=start_for_rrule))
+
+    # Apply exclusions
+    exdates = component.get('EXDATE') or []
+    if not isinstance(exdates, list):
+        exdates = [exdates]
+    for ex in exdates:
+        for ex_dt in ex.dts:
+            exdate_dt = _normalize_dt(ex_dt.dt)
+            if start_dt.tzinfo:
+                exdate_dt = exdate_dt.replace(tzinfo=None)
+            rrule_set.exdate(exdate_dt)
+
+    # Apply explicit additional dates
+    rdates = component.get('RDATE') or []
+    if not isinstance(rdates, list):
+        rdates = [rdates]
+    for rdate in rdates:
+        for add_dt in rdate.dts:
+            rdate_dt = _normalize_dt(add_dt.dt)
+            if start_dt.tzinfo:
+                rdate_dt = rdate_dt.replace(tzinfo=None)
+            rrule_set.rdate(rdate_dt)
+    return rrule_set, rrule_tz
+
+
+def _iter_master(component, override_map: Dict, lead: timedelta, range_start: datetime, range_end: datetime):
+    """Occurrences of one master VEVENT overlapping the range, lazily and in start order"""
+    start = component.get('DTSTART')
+    end = component.get('DTEND')
+    if not start or not end:
+        return
+
+    start_dt = _normalize_dt(start.dt)
+    end_dt = _normalize_dt(end.dt, default_end=True)
+    duration = end_dt - start_dt
+
+    if not component.get('RRULE'):
+        if start_dt <= range_end and end_dt >= range_start:
+            yield _occurrence(component, start_dt, end_dt)
+        return
+
+    rrule_set, rrule_tz = _recurrence_set(component, start_dt)
+    query_start = range_start
+    query_end = range_end
+    if start_dt.tzinfo:
+        query_start = range_start.astimezone(rrule_tz).replace(tzinfo=None)
+        query_end = range_end.astimezone(rrule_tz).replace(tzinfo=None)
+
+    # An override may move an occurrence up to `lead` before its slot, so occurrences are
+    # held back until the recurrence has passed them by that much
+    pending: List[tuple] = []
+    for order, occurrence in enumerate(rrule_set.xafter(query_start, inc=True)):
+        if occurrence > query_end:
+            break
+        slot_start = rrule_tz.localize(occurrence) if start_dt.tzinfo else occurrence
+        # Use overrides when present
+        override_component = override_map.get(slot_start)
+        if override_component:
+            if str(override_component.get('STATUS', '')).upper() == 'CANCELLED':
+                continue
+            occ_start = _normalize_dt(override_component.get('DTSTART').dt)
+            occ_end = _normalize_dt(override_component.get('DTEND').dt, default_end=True)
+            event = _occurrence(override_component, occ_start, occ_end)
+        else:
+            occ_start = slot_start.astimezone(TIMEZONE)
+            event = _occurrence(component, occ_start, occ_start + duration)
+        if event['start'] <= range_end and event['end'] >= range_start:
+            heapq.heappush(pending, (event['start'], order, event))
+        ready = slot_start - lead
+        while pending and pending[0][0] <= ready:
+            yield heapq.heappop(pending)[2]
+    while pending:
+        yield heapq.heappop(pending)[2]
+
+
+def _iter_series(masters: List, override_components: List, range_start: datetime, range_end: datetime):
+    """
+    Occurrences of one UID's master events between range_start and range_end,
+    with overrides applied, produced lazily in start order
+    """
+    # Exception overrides (RECURRENCE-ID components) keyed by the occurrence they replace
+    override_map: Dict[datetime, object] = {}
+    lead = timedelta(0)
+    for component in override_components:
+        recurrence_id = _normalize_dt(component.get('RECURRENCE-ID').dt)
+        override_map[recurrence_id] = component
+        if component.get('DTSTART'):
+            lead = max(lead, recurrence_id - _normalize_dt(component.get('DTSTART').dt))
+
+    return heapq.merge(
+        *(_iter_master(component, override_map, lead, range_start, range_end) for component in masters),
+        key=_event_start,
+    )
+
+
+def _expand_series(masters: List, override_components: List, range_start: datetime, range_end: datetime) -> List[Dict]:
+    """Occurrences of one UID's master events between range_start and range_end, with overrides applied"""
+    return list(_iter_series(masters, override_components, range_start, range_end))
+
+
+def _usable_override(component) -> bool:
+    """Whether an override has the times _iter_master needs from it"""
+    try:
+        _normalize_dt(component.get('RECURRENCE-ID').dt)
+        if str(component.get('STATUS', '')).upper() != 'CANCELLED':
+            _normalize_dt(component.get('DTSTART').dt)
+            _normalize_dt(component.get('DTEND').dt, default_end=True)
+        return True
+    except Exception:
+        return False
+
+
+def _record_series_failure(uid: str, key: Optional[tuple], masters: List, override_components: List, error: Exception,
+                           degraded: bool) -> SeriesFailure:
+    usable = [component for component in override_components if _usable_override(component)] if degraded else []
+    skipped = len(override_components) - len(usable) if degraded else len(masters) + len(override_components)
+    failure = SeriesFailure(str(error) or type(error).__name__, skipped, degraded)
+    if key is not None:
+        FAILED_SERIES.put(key, failure)
+    outcome = f"without {skipped} broken override(s)" if degraded else "skipped"
+    app.logger.warning(f"Could not expand event {uid}: {failure.error}; {outcome}")
+    return failure
+
+
+def _expand_uid(uid: str, masters: List, override_components: List, fingerprint: tuple,
+                range_start: datetime, range_end: datetime, content_hash: Optional[str] = None) -> ExpandedSeries:
+    """
+    Expand one UID, isolating failures to it
+
+    When expansion raises, the UID is expanded again without the overrides
+    that are missing usable times; when that fails too (or there were none
+    to drop) the whole UID is skipped. Given the feed's content_hash, the
+    outcome is remembered in FAILED_SERIES for that version of the feed.
+    """
+    key = (content_hash, uid) if content_hash else None
+    failure = FAILED_SERIES.get(key) if key else None
+    if failure is None:
+        try:
+            return ExpandedSeries(fingerprint, EventStore.from_events(
+                _iter_series(masters, override_components, range_start, range_end)),
+                range_start=range_start, range_end=range_end)
+        except Exception as e:
+            degraded = not all(_usable_override(component) for component in override_components)
+            failure = _record_series_failure(uid, key, masters, override_components, e, degraded)
+
+    if failure.degraded:
+        usable = [component for component in override_components if _usable_override(component)]
+        try:
+            return ExpandedSeries(fingerprint, EventStore.from_events(
+                _iter_series(masters, usable, range_start, range_end)), failure.skipped, failure.error,
+                range_start, range_end)
+        except Exception as e:
+            failure = _record_series_failure(uid, key, masters, override_components, e, degraded=False)
+    return ExpandedSeries(fingerprint, EventStore.from_events([]), failure.skipped, failure.error, range_start, range_end)
+
+
+def _extend_series(reused: ExpandedSeries, masters: List, override_components: List, range_start: datetime,
+                   range_end: datetime) -> Optional[ExpandedSeries]:
+    """
+    `reused` clipped and extended to range_start..range_end, or None when it has to be expanded again
+
+    Occurrences before the range `reused` was expanded over are not in it, so
+    the new range must start inside it; occurrences after it are expanded and
+    appended. Overrides can move an occurrence across the end of the old
+    range, so a series with overrides is only clipped, never extended. A
+    failed series is only reused over the same range.
+    """
+    if (reused.range_start, reused.range_end) == (range_start, range_end):
+        return reused
+    if reused.error is not None or reused.range_start is None or range_start < reused.range_start:
+        return None
+    if range_end > reused.range_end and override_components:
+        return None
+    events = reused.events.overlapping(range_start.timestamp(), range_end.timestamp())
+    if range_end > reused.range_end:
+        expanded_until = reused.range_end
+        tail = EventStore.from_events(
+            event for event in _iter_series(masters, override_components, expanded_until, range_end)
+            if event['start'] > expanded_until)
+        events = EventStore.merge([events, tail])
+    return ExpandedSeries(reused.fingerprint, events, range_start=range_start, range_end=range_end)
+
+
+def _guarded_series(uid: str, masters: List, override_components: List, range_start: datetime, range_end: datetime,
+                    content_hash: Optional[str] = None):
+    """_iter_series for lazy expansion, with the same per-UID failure handling as _expand_uid"""
+    key = (content_hash, uid) if content_hash else None
+    failure = FAILED_SERIES.get(key) if key else None
+    if failure is not None:
+        if not failure.degraded:
+            return
+        override_components = [component for component in override_components if _usable_override(component)]
+    try:
+        yield from _iter_series(masters, override_components, range_start, range_end)
+    except Exception as e:
+        # Occurrences already yielded stay; the rest of this series is left out
+        degraded = failure is None and not all(_usable_override(component) for component in override_components)
+        _record_series_failure(uid, key, masters, override_components, e, degraded)
+
+
+def _components_by_uid(cal: Calendar) -> tuple:
+    """({uid: master VEVENTs}, {uid: RECURRENCE-ID overrides})"""
+    masters: Dict[str, List] = {}
+    overrides: Dict[str, List] = {}
+    for component in cal.walk('VEVENT'):
+        uid = str(component.get('UID'))
+        if component.get('RECURRENCE-ID'):
+            overrides.setdefault(uid, []).append(component)
+        else:
+            masters.setdefault(uid, []).append(component)
+    return masters, overrides
+
+
+def series_failures(feed: 'FeedCacheEntry') -> List[Dict]:
+    """UIDs of a feed version that failed to expand so far, with how many components were left out"""
+    masters, _ = _components_by_uid(feed.calendar)
+    failures = []
+    for uid in masters:
+        failure = FAILED_SERIES.get((feed.content_hash, uid))
+        if failure is not None:
+            failures.append({'uid': uid, 'error': failure.error, 'skipped_components': failure.skipped,
+                             'degraded': failure.degraded})
+    return failures
+
+
+def iter_occurrences(cal: Calendar, range_start: datetime, range_end: datetime, content_hash: Optional[str] = None):
+    """
+    Every occurrence in a calendar overlapping range_start..range_end, in start order
+
+    Occurrences are expanded only as they are consumed, and memory held is
+    per series rather than per occurrence, so callers can page through or
+    stream arbitrarily long ranges.
+    """
+    masters, overrides = _components_by_uid(cal)
+    return heapq.merge(
+        *(_guarded_series(uid, components, overrides.get(uid, []), range_start, range_end, content_hash)
+          for uid, components in masters.items()),
+        key=_event_start,
+    )
+
+
+def expand_series(
+    cal: Calendar, range_start: datetime, range_end: datetime, previous: Optional[Dict[str, ExpandedSeries]] = None,
+    content_hash: Optional[str] = None
+) -> Dict[str, ExpandedSeries]:
+    """
+    Expand a calendar per UID, reusing unchanged UIDs from `previous` or EXPANDED_SERIES
+
+    A UID is only expanded again when its masters or overrides were added,
+    removed or changed (see _series_fingerprint); a reused series expanded
+    over another range is clipped and extended to this one (see
+    _extend_series). A UID that fails to expand is skipped or degraded on its
+    own (see _expand_uid).
+    """
+    masters, overrides = _components_by_uid(cal)
+    series: Dict[str, ExpandedSeries] = {}
+    for uid, components in masters.items():
+        uid_overrides = overrides.get(uid, [])
+        fingerprint = _series_fingerprint(components + uid_overrides)
+        reused = previous.get(uid) if previous else None
+        if reused is None or reused.fingerprint != fingerprint:
+            reused = EXPANDED_SERIES.get((uid, fingerprint))
+        adapted = None
+        if reused is not None:
+            try:
+                adapted = _extend_series(reused, components, uid_overrides, range_start, range_end)
+            except Exception:
+                adapted = None
+        if adapted is not None:
+            SERIES_EXPANSIONS.inc(result='reused' if adapted is reused else 'extended')
+            series[uid] = adapted
+            if adapted.error is not None and content_hash:
+                # Carry the failure over so this version does not retry the UID either
+                degraded = adapted.skipped < len(components) + len(uid_overrides)
+                FAILED_SERIES.put((content_hash, uid), SeriesFailure(adapted.error, adapted.skipped, degraded))
+        else:
+            SERIES_EXPANSIONS.inc(result='expanded')
+            series[uid] = _expand_uid(uid, components, uid_overrides, fingerprint, range_start, range_end, content_hash)
+        if series[uid].error is None:
+            # Failures stay per feed version (FAILED_SERIES), so a new version retries them
+            EXPANDED_SERIES.put((uid, fingerprint), series[uid])
+    return series
+
+
+def expand_calendar(
+    cal: Calendar, now: datetime, start_date: Optional[date] = None, end_date: Optional[date] = None,
+    previous: Optional[Dict[str, ExpandedSeries]] = None, content_hash: Optional[str] = None
+) -> tuple:
+    """
+    (EventStore sorted by start, per-UID series) for the inclusive date range
+    """
+    started = time.perf_counter()
+
+    # Compute the date range in local timezone
+    start_date = start_date or now.date()
+    end_date = end_date or start_date
+    range_start = TIMEZONE.localize(datetime.combine(start_date, datetime.min.time()))
+    range_end = TIMEZONE.localize(datetime.combine(end_date, datetime.max.time()))
+
+    series = expand_series(cal, range_start, range_end, previous, content_hash)
+    events = EventStore.merge([expanded.events for expanded in series.values()])
+    EXPAND_SECONDS.observe(time.perf_counter() - started, **_metric_labels())
+    record_timing('expand', time.perf_counter() - started)
+
+    app.logger.info(f"Found {len(events)} events for today")
+    # Listing every occurrence builds a dict per event, so only do it when it will be logged
+    if app.logger.isEnabledFor(logging.INFO):
+        for event in events:
+            app.logger.info(f"  - {event['summary']}: {event['start'].strftime('%I:%M %p')} - {event['end'].strftime('%I:%M %p')}")
+
+    return events, series
+
+
+def parse_events_with_recurrence(
+    cal: Calendar, now: datetime, start_date: Optional[date] = None, end_date: Optional[date] = None
+) -> List[Dict]:
+    """
+    Parse calendar events including recurring events
+
+    start_date/end_date allow callers (e.g., /debug) to inspect a wider range of days
+    instead of just the current date. Dates are inclusive.
+    """
+    return list(expand_calendar(cal, now, start_date, end_date)[0])
+
+
+class EventStore:
+    """
+    Compact, read-only sequence of occurrences sorted by start time
+
+    Start and end times are kept as parallel arrays of epoch seconds, and each
+    occurrence refers to a (summary, organizer) label shared by the whole
+    series, so a cached timeline costs a few machine words per occurrence
+    instead of a dict and two datetimes. Indexing yields the usual event dict,
+    built on demand for the events a response actually shows.
+    """
+
+    __slots__ = ('starts', 'ends', 'label_ids', 'labels')
+
+    def __init__(self, starts: array, ends: array, label_ids: array, labels: List[tuple]):
+        self.starts = starts
+        self.ends = ends
+        self.label_ids = label_ids
+        self.labels = labels
+
+    @classmethod
+    def from_events(cls, events) -> 'EventStore':
+        """Store for an iterable of event dicts, keeping their order"""
+        starts, ends, label_ids = array('d'), array('d'), array('I')
+        labels: List[tuple] = []
+        interned: Dict[tuple, int] = {}
+        for event in events:
+            label = (event['summary'], event['organizer'])
+            label_id = interned.get(label)
+            if label_id is None:
+                label_id = interned[label] = len(labels)
+                labels.append(label)
+            starts.append(event['start'].timestamp())
+            ends.append(event['end'].timestamp())
+            label_ids.append(label_id)
+        return cls(starts, ends, label_ids, labels)
+
+    @classmethod
+    def merge(cls, stores: List['EventStore']) -> 'EventStore':
+        """One store with every occurrence of `stores`, sorted by start (stable)"""
+        starts, ends, label_ids = array('d'), array('d'), array('I')
+        labels: List[tuple] = []
+        for store in stores:
+            offset = len(labels)
+            starts.extend(store.starts)
+            ends.extend(store.ends)
+            label_ids.extend(array('I', (label_id + offset for label_id in store.label_ids)))
+            labels.extend(store.labels)
+        order = sorted(range(len(starts)), key=starts.__getitem__)
+        return cls(
+            array('d', [starts[i] for i in order]),
+            array('d', [ends[i] for i in order]),
+            array('I', [label_ids[i] for i in order]),
+            labels,
+        )
+
+    def overlapping(self, start: float, end: float) -> 'EventStore':
+        """Store with the occurrences overlapping start..end (epoch seconds), sharing this one's labels"""
+        keep = [i for i in range(len(self.starts)) if self.starts[i] <= end and self.ends[i] >= start]
+        return EventStore(
+            array('d', [self.starts[i] for i in keep]),
+            array('d', [self.ends[i] for i in keep]),
+            array('I', [self.label_ids[i] for i in keep]),
+            self.labels,
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, i: int) -> Dict:
+        summary, organizer = self.labels[self.label_ids[i]]
+        return {
+            'summary': summary,
+            'start': datetime.fromtimestamp(self.starts[i], TIMEZONE),
+            'end': datetime.fromtimestamp(self.ends[i], TIMEZONE),
+            'organizer': organizer,
+        }
+
+    def __iter__(self):
+        for i in range(len(self.starts)):
+            yield self[i]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, EventStore):
+            other = list(other)
+        return list(self) == other
+
+
+class EventIndex:
+    """
+    Interval index over events sorted by start time.
+
+    Keeps parallel arrays of start times, end times and the running maximum of
+    end times (epoch seconds) so "what is on at T", "what starts next" and
+    "when does the status next change" are bisect lookups rather than scans.
+    A window shares the arrays of the index it was taken from.
+    """
+
+    def __init__(self, events):
+        self.events = events
+        if isinstance(events, EventStore):
+            self._starts = events.starts
+            self._ends = events.ends
+        else:
+            self._starts = array('d', [event['start'].timestamp() for event in events])
+            self._ends = array('d', [event['end'].timestamp() for event in events])
+        # Running maximum of end times lets us bisect for the first event that can
+        # still overlap a time even when long events are mixed with short ones
+        self._max_ends = array('d', itertools.accumulate(self._ends, max))
+        self._lo = 0
+        self._hi = len(events)
+        self._range_start = float('-inf')
+
+    def window(self, range_start: datetime, range_end: datetime) -> 'EventIndex':
+        """View of the events overlapping [range_start, range_end]"""
+        view = copy.copy(self)
+        view._lo = bisect_left(self._max_ends, range_start.timestamp(), self._lo, self._hi)
+        view._hi = max(view._lo, bisect_right(self._starts, range_end.timestamp(), self._lo, self._hi))
+        # Events inside [lo, hi) that ended before range_start are skipped when listing
+        view._range_start = max(self._range_start, range_start.timestamp())
+        return view
+
+    def __iter__(self):
+        for i in range(self._lo, self._hi):
+            if self._ends[i] >= self._range_start:
+                yield self.events[i]
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def current(self, at: datetime, early_start: timedelta = timedelta(minutes=1)) -> Optional[Dict]:
+        """First event (in start order) in progress at `at`, treating events as starting early_start early"""
+        t = at.timestamp()
+        i = bisect_right(self._max_ends, t, self._lo, self._hi)
+        # Only possible when `at` precedes a window, whose running maximum may come from earlier events
+        while i < self._hi and self._ends[i] <= t:
+            i += 1
+        if i < self._hi and self._starts[i] - early_start.total_seconds() <= t:
+            return self.events[i]
+        return None
+
+    def next_after(self, at: datetime) -> Optional[Dict]:
+        """First event starting strictly after `at`"""
+        i = bisect_right(self._starts, at.timestamp(), self._lo, self._hi)
+        return self.events[i] if i < self._hi else None
+
+    def next_transition(self, at: datetime, early_start: timedelta = timedelta(minutes=1)) -> Optional[datetime]:
+        """
+        Next time after `at` when determine_room_status would pick a different
+        current or next event: the current event ending, an event entering its
+        early-start buffer, or the next event starting.
+        """
+        t = at.timestamp()
+        candidates = []
+        current = self.current(at, early_start)
+        if current is not None:
+            candidates.append(current['end'].timestamp())
+        i = bisect_right(self._starts, t + early_start.total_seconds(), self._lo, self._hi)
+        if i < self._hi:
+            candidates.append(self._starts[i] - early_start.total_seconds())
+        i = bisect_right(self._starts, t, self._lo, self._hi)
+        if i < self._hi:
+            candidates.append(self._starts[i])
+        if not candidates:
+            return None
+        return datetime.fromtimestamp(min(candidates), TIMEZONE)
+
+
+class CompiledCalendar:
+    """
+    Every occurrence of a feed over a date horizon, sorted by start time.
+
+    Built once per distinct feed content so requests for any day (or range of
+    days) inside the horizon are answered by slicing instead of re-expanding.
+    """
+
+    def __init__(self, events, horizon_start: date, horizon_end: date,
+                 series: Optional[Dict[str, ExpandedSeries]] = None):
+        self.events = events if isinstance(events, EventStore) else EventStore.from_events(events)
+        self.horizon_start = horizon_start
+        self.horizon_end = horizon_end
+        self.index = EventIndex(self.events)
+        # Per-UID expansion, reused when the next version of the feed is compiled
+        self.series = series
 
+    @property
+    def skipped_components(self) -> int:
+        """VEVENTs that failed to expand and are missing from the timeline"""
+        return sum(expanded.skipped for expanded in self.series.values()) if self.series else 0
 
-def fetch_ics_feed(ics_url: str) -> Calendar:
-    """Fetch and parse ICS calendar from URL"""
-    try:
-        if USE_PROXY_FOR_ICS:
-            response = requests.get(ics_url, timeout=10)
-        else:
-            session = requests.Session()
-            session.trust_env = False  # Ignore http/https proxy env vars that can block the feed
-            response = session.get(ics_url, timeout=10)
-        response.raise_for_status()
-        cal = Calendar.from_ical(response.content)
-        return cal
-    except Exception as e:
-        raise Exception(f"Failed to fetch ICS feed: {str(e)}")
+    def covers(self, start_date: date, end_date: date) -> bool:
+        return self.horizon_start <= start_date and end_date <= self.horizon_end
 
+    def index_between(self, start_date: date, end_date: date) -> EventIndex:
+        """Index window over events overlapping the inclusive local date range"""
+        range_start = TIMEZONE.localize(datetime.combine(start_date, datetime.min.time()))
+        range_end = TIMEZONE.localize(datetime.combine(end_date, datetime.max.time()))
+        return self.index.window(range_start, range_end)
 
-def parse_events_with_recurrence(
-    cal: Calendar, now: datetime, start_date: Optional[date] = None, end_date: Optional[date] = None
-) -> List[Dict]:
+    def events_between(self, start_date: date, end_date: date) -> List[Dict]:
+        """Events overlapping the inclusive local date range"""
+        return list(self.index_between(start_date, end_date))
+
+
+class CompiledCalendarCache:
+    """Thread-safe LRU of compiled calendars keyed by feed content hash"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, CompiledCalendar]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, content_hash: str) -> Optional[CompiledCalendar]:
+        with self._lock:
+            compiled = self._entries.get(content_hash)
+            if compiled is not None:
+                self._entries.move_to_end(content_hash)
+            return compiled
+
+    def put(self, content_hash: str, compiled: CompiledCalendar) -> None:
+        with self._lock:
+            self._entries[content_hash] = compiled
+            self._entries.move_to_end(content_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+COMPILED_CACHE = CompiledCalendarCache(ICS_CACHE_MAX_ENTRIES)
+
+
+def compile_calendar(
+    cal: Calendar, now: datetime, start_date: date, end_date: date, previous: Optional[CompiledCalendar] = None,
+    content_hash: Optional[str] = None
+) -> CompiledCalendar:
     """
-    Parse calendar events including recurring events
-    Uses recurring-ical-events to expand RRULE entries
+    Expand a calendar over at least COMPILE_HORIZON_DAYS starting at start_date
 
-    start_date/end_date allow callers (e.g., /debug) to inspect a wider range of days
-    instead of just the current date. Dates are inclusive.
+    Only UIDs that changed since `previous` (the compiled form of an earlier
+    version of the same feed) or since they were last expanded are expanded
+    again, whatever horizon that was over. `content_hash` identifies the feed
+    version that UIDs failing to expand are remembered for.
     """
-    events = []
+    horizon_end = max(end_date, start_date + timedelta(days=COMPILE_HORIZON_DAYS - 1))
+    events, series = expand_calendar(cal, now, start_date=start_date, end_date=horizon_end,
+                                     previous=previous.series if previous is not None else None,
+                                     content_hash=content_hash)
+    return CompiledCalendar(events, start_date, horizon_end, series)
 
-    # Compute the date range in local timezone
-    start_date = start_date or now.date()
-    end_date = end_date or start_date
-    range_start = TIMEZONE.localize(datetime.combine(start_date, datetime.min.time()))
-    range_end = TIMEZONE.localize(datetime.combine(end_date, datetime.max.time()))
 
-    def _normalize_dt(dt_value: object, default_end: bool = False) -> datetime:
-        """Convert ical date/datetime to timezone-aware datetime in the service timezone."""
-        if isinstance(dt_value, datetime):
-            if dt_value.tzinfo is None:
-                return TIMEZONE.localize(dt_value)
-            return dt_value.astimezone(TIMEZONE)
-        if isinstance(dt_value, date):
-            base_dt = datetime.combine(dt_value, datetime.max.time() if default_end else datetime.min.time())
-            return TIMEZONE.localize(base_dt)
-        raise ValueError("Unsupported date value")
-
-    # Build a lookup for exception overrides (RECURRENCE-ID components)
-    overrides: Dict[str, Dict[datetime, object]] = {}
-    for component in cal.walk('VEVENT'):
-        recurrence_id = component.get('RECURRENCE-ID')
-        if recurrence_id:
-            uid = str(component.get('UID'))
-            rec_dt = _normalize_dt(recurrence_id.dt)
-            overrides.setdefault(uid, {})[rec_dt] = component
+def get_compiled_calendar(
+    feed: FeedCacheEntry, now: datetime, start_date: date, end_date: date
+) -> CompiledCalendar:
+    """
+    The feed's compiled timeline covering the inclusive date range
 
-    def _add_event(component, start_dt: datetime, end_dt: datetime):
-        if start_dt <= range_end and end_dt >= range_start:
-            events.append({
-                'summary': str(component.get('SUMMARY', 'Booking')),
-                'start': start_dt,
-                'end': end_dt,
-                'organizer': str(component.get('ORGANIZER', '')).replace('mailto:', '')
-            })
+    Only rebuilt when the feed content changes or the range falls outside the
+    compiled horizon.
+    """
+    compiled = COMPILED_CACHE.get(feed.content_hash)
+    if compiled is not None and compiled.covers(start_date, end_date):
+        COMPILED_CACHE_REQUESTS.inc(result='hit')
+        return compiled
 
-    try:
-        for component in cal.walk('VEVENT'):
-            if component.get('RECURRENCE-ID'):
-                # Handled via overrides when processing the master event
-                continue
+    def _compile() -> CompiledCalendar:
+        stored = _load_timeline(feed.content_hash) if SNAPSHOTS is not None else None
+        if stored is not None and stored.covers(start_date, end_date):
+            COMPILED_CACHE_REQUESTS.inc(result='disk')
+            result = stored
+        else:
+            COMPILED_CACHE_REQUESTS.inc(result='miss')
+            previous = COMPILED_CACHE.get(feed.previous_hash) if feed.previous_hash else None
+            result = compile_calendar(feed.calendar, now, start_date, end_date, previous, feed.content_hash)
+            if SNAPSHOTS is not None:
+                _write_snapshot(_metrics_feed.get(), lambda: SNAPSHOTS.save_timeline(
+                    feed.content_hash, result.horizon_start.isoformat(), result.horizon_end.isoformat(),
+                    _events_json(result.events),
+                ))
+        COMPILED_CACHE.put(feed.content_hash, result)
+        FEED_EVENTS.set(len(result.events), feed=_feed_label(_metrics_feed.get()))
+        SKIPPED_COMPONENTS.set(result.skipped_components, feed=_feed_label(_metrics_feed.get()))
+        return result
 
-            start = component.get('DTSTART')
-            end = component.get('DTEND')
-            if not start or not end:
-                continue
+    compiled = COMPILE_FLIGHTS.do(feed.content_hash, _compile)
+    if not compiled.covers(start_date, end_date):
+        # Joined a compile for a different range
+        compiled = _compile()
+    return compiled
 
-            start_dt = _normalize_dt(start.dt)
-            end_dt = _normalize_dt(end.dt, default_end=True)
-            duration = end_dt - start_dt
 
-            rrule = component.get('RRULE')
-            if not rrule:
-                _add_event(component, start_dt, end_dt)
-                continue
+def _events_json(events: List[Dict]) -> str:
+    return json.dumps([
+        {**event, 'start': event['start'].isoformat(), 'end': event['end'].isoformat()} for event in events
+    ])
 
-            # Expand recurring instances using dateutil to better handle UNTIL rules in UTC
-            rule_params = dict(component.decoded('RRULE'))
-            rrule_tz = start_dt.tzinfo or TIMEZONE
-            start_for_rrule = start_dt
 
-            # Convert timezone-aware start/UNTIL values to naive datetimes so dateutil keeps wall times across DST
-            if start_dt.tzinfo:
-                start_for_rrule = start_dt.replace(tzinfo=None)
-                if 'UNTIL' in rule_params and rule_params['UNTIL']:
-                    until_dt = rule_params['UNTIL'][0]
-                    if isinstance(until_dt, datetime):
-                        rule_params['UNTIL'] = [until_dt.astimezone(rrule_tz).replace(tzinfo=None)]
-            rule_str = vRecur(rule_params).to_ical().decode()
-            rrule_set = rruleset()
-            rrule_set.rrule(rrulestr(rule_str, dtstart=start_for_rrule))
-
-            # Apply exclusions
-            exdates = component.get('EXDATE') or []
-            if not isinstance(exdates, list):
-                exdates = [exdates]
-            for ex in exdates:
-                for ex_dt in ex.dts:
-                    exdate_dt = _normalize_dt(ex_dt.dt)
-                    if start_dt.tzinfo:
-                        exdate_dt = exdate_dt.replace(tzinfo=None)
-                    rrule_set.exdate(exdate_dt)
-
-            # Apply explicit additional dates
-            rdates = component.get('RDATE') or []
-            if not isinstance(rdates, list):
-                rdates = [rdates]
-            for rdate in rdates:
-                for add_dt in rdate.dts:
-                    rdate_dt = _normalize_dt(add_dt.dt)
-                    if start_dt.tzinfo:
-                        rdate_dt = rdate_dt.replace(tzinfo=None)
-                    rrule_set.rdate(rdate_dt)
-
-            uid = str(component.get('UID'))
-            override_map = overrides.get(uid, {})
-
-            query_start = range_start
-            query_end = range_end
-            if start_dt.tzinfo:
-                query_start = range_start.astimezone(rrule_tz).replace(tzinfo=None)
-                query_end = range_end.astimezone(rrule_tz).replace(tzinfo=None)
-
-            for occurrence in rrule_set.between(query_start, query_end, inc=True):
-                # Use overrides when present
-                occurrence_key = occurrence
-                if start_dt.tzinfo:
-                    occurrence_key = rrule_tz.localize(occurrence)
-                override_component = override_map.get(occurrence_key)
-                if override_component:
-                    if str(override_component.get('STATUS', '')).upper() == 'CANCELLED':
-                        continue
-                    occ_start = _normalize_dt(override_component.get('DTSTART').dt)
-                    occ_end = _normalize_dt(override_component.get('DTEND').dt, default_end=True)
-                    _add_event(override_component, occ_start, occ_end)
-                else:
-                    occ_start = occurrence if not start_dt.tzinfo else rrule_tz.localize(occurrence)
-                    occ_start = occ_start.astimezone(TIMEZONE)
-                    occ_end = occ_start + duration
-                    _add_event(component, occ_start, occ_end)
+def _load_timeline(content_hash: str) -> Optional[CompiledCalendar]:
+    """Compiled timeline stored by any process for this feed content"""
+    try:
+        stored = SNAPSHOTS.load_timeline(content_hash)
+        if stored is None:
+            return None
+        horizon_start, horizon_end, events = stored
+        return CompiledCalendar(
+            [
+                {
+                    **event,
+                    'start': datetime.fromisoformat(event['start']).astimezone(TIMEZONE),
+                    'end': datetime.fromisoformat(event['end']).astimezone(TIMEZONE),
+                }
+                for event in json.loads(events)
+            ],
+            date.fromisoformat(horizon_start),
+            date.fromisoformat(horizon_end),
+        )
     except Exception as e:
-        app.logger.error(f"Error expanding recurring events: {str(e)}")
-        return parse_events_fallback(cal, now, start_date=start_date, end_date=end_date)
+        app.logger.warning(f"Could not read compiled timeline {content_hash}: {str(e)}")
+        return None
 
-    # Sort by start time
-    events.sort(key=lambda x: x['start'])
 
-    app.logger.info(f"Found {len(events)} events for today")
-    for event in events:
-        app.logger.info(f"  - {event['summary']}: {event['start'].strftime('%I:%M %p')} - {event['end'].strftime('%I:%M %p')}")
+def get_events(
+    feed: FeedCacheEntry, now: datetime, start_date: Optional[date] = None, end_date: Optional[date] = None
+) -> List[Dict]:
+    """Events for a feed overlapping the inclusive date range (default: today)"""
+    start_date = start_date or now.date()
+    end_date = end_date or start_date
+    return get_compiled_calendar(feed, now, start_date, end_date).events_between(start_date, end_date)
 
-    return events
 
+def get_event_index(
+    feed: FeedCacheEntry, now: datetime, start_date: Optional[date] = None, end_date: Optional[date] = None
+) -> EventIndex:
+    """Interval index over a feed's events in the inclusive date range (default: today)"""
+    start_date = start_date or now.date()
+    end_date = end_date or start_date
+    return get_compiled_calendar(feed, now, start_date, end_date).index_between(start_date, end_date)
 
-def parse_events_fallback(
-    cal: Calendar, now: datetime, start_date: Optional[date] = None, end_date: Optional[date] = None
-) -> List[Dict]:
+
+class OccupancyBitmap:
     """
-    Fallback parser without recurring event support
-    Used if recurring-ical-events fails
+    Minute-resolution occupancy of one room as a Python int bitset
+
+    Bit i is set when minute i after `start` is booked. Python ints give
+    arbitrary-width bitwise operations implemented in C, so "free for the
+    next N minutes" and "earliest N free minutes" over a whole week are a
+    handful of shifts and masks instead of per-minute loops.
     """
-    events = []
-    start_date = start_date or now.date()
-    end_date = end_date or start_date
-    date_range_start = TIMEZONE.localize(datetime.combine(start_date, datetime.min.time()))
-    date_range_end = TIMEZONE.localize(datetime.combine(end_date, datetime.max.time()))
 
-    for component in cal.walk('VEVENT'):
-        try:
-            # Skip recurring events (they won't work in fallback mode)
-            if component.get('RRULE'):
-                continue
-                
-            summary = str(component.get('SUMMARY', 'Booking'))
-            start = component.get('DTSTART').dt
-            end = component.get('DTEND').dt
-            
-            if isinstance(start, date) and not isinstance(start, datetime):
-                start = datetime.combine(start, datetime.min.time())
-                start = TIMEZONE.localize(start)
-            if isinstance(end, date) and not isinstance(end, datetime):
-                end = datetime.combine(end, datetime.max.time())
-                end = TIMEZONE.localize(end)
-            
-            if start.tzinfo is None:
-                start = TIMEZONE.localize(start)
-            if end.tzinfo is None:
-                end = TIMEZONE.localize(end)
-            
-            start = start.astimezone(TIMEZONE)
-            end = end.astimezone(TIMEZONE)
-            
-            if start <= date_range_end and end >= date_range_start:
-                events.append({
-                    'summary': summary,
-                    'start': start,
-                    'end': end,
-                    'organizer': str(component.get('ORGANIZER', '')).replace('mailto:', '')
-                })
-        except Exception as e:
-            continue
-    
-    events.sort(key=lambda x: x['start'])
-    return events
+    def __init__(self, start: datetime, minutes: int, events=()):
+        self.start = start
+        self.minutes = minutes
+        self.bits = 0
+        for event in events:
+            self.add(event['start'], event['end'])
 
+    def _offset(self, at: datetime) -> float:
+        return (at - self.start).total_seconds() / 60
+
+    def add(self, start: datetime, end: datetime) -> None:
+        """Mark every minute touched by [start, end) as booked"""
+        first = max(0, int(self._offset(start)))
+        last = min(self.minutes, -int(-self._offset(end) // 1))
+        if last > first:
+            self.bits |= ((1 << (last - first)) - 1) << first
+
+    def free_run(self, offset: int = 0) -> int:
+        """Free minutes starting at offset, up to the end of the window"""
+        booked = self.bits >> offset
+        if booked == 0:
+            return max(0, self.minutes - offset)
+        return (booked & -booked).bit_length() - 1
+
+    def earliest_free(self, duration: int, offset: int = 0) -> Optional[int]:
+        """Offset of the first run of `duration` free minutes at or after offset"""
+        if duration > self.minutes - offset:
+            return None
+        free = ~self.bits & ((1 << self.minutes) - 1)
+        # After folding, bit i survives only if minutes i .. i + duration - 1 are all free
+        length = 1
+        while length < duration:
+            step = min(length, duration - length)
+            free &= free >> step
+            length += step
+        free = (free >> offset) << offset
+        free &= (1 << (self.minutes - duration + 1)) - 1
+        if free == 0:
+            return None
+        return (free & -free).bit_length() - 1
+
+
+def _booking_payload(event: Dict) -> Dict:
+    return {
+        'title': event['summary'],
+        'start_time': event['start'].strftime('%-I:%M %p'),
+        'end_time': event['end'].strftime('%-I:%M %p'),
+        'organizer': event['organizer']
+    }
+
+
+def determine_room_status(events, now: datetime) -> Dict:
+    """
+    Determine current room status and next booking
+
+    Accepts a list of events sorted by start time or an EventIndex; an index
+    shared across polls answers both lookups in O(log n).
+    """
+    index = events if isinstance(events, EventIndex) else EventIndex(events)
+
+    # Meeting is current if now is between start and end, using a small
+    # buffer (1 minute) for clock skew
+    current_event = index.current(now)
+    next_event = index.next_after(now)
+    next_booking = _booking_payload(next_event) if next_event else None
 
-def determine_room_status(events: List[Dict], now: datetime) -> Dict:
-    """Determine current room status and next booking"""
-    
-    # Find current event - check if we're within the meeting time
-    current_event = None
-    for event in events:
-        # Meeting is current if now is between start and end
-        # Use a small buffer (1 minute) for clock skew
-        start_buffer = event['start'] - timedelta(minutes=1)
-        if start_buffer <= now < event['end']:
-            current_event = event
-            break
-    
-    # Find next event
-    next_event = None
-    for event in events:
-        if event['start'] > now:
-            next_event = event
-            break
-    
     # Determine status
     if current_event:
         # Room is currently occupied
-        minutes_until_free = int((current_event['end'] - now).total_seconds() / 60)
         return {
             'status': 'OCCUPIED',
             'status_text': 'OCCUPIED',
             'available_until': None,
             'minutes_available': None,
-            'current_booking': {
-                'title': current_event['summary'],
-                'start_time': current_event['start'].strftime('%-I:%M %p'),
-                'end_time': current_event['end'].strftime('%-I:%M %p'),
-                'organizer': current_event['organizer']
-            },
-            'next_booking': {
-                'title': next_event['summary'],
-                'start_time': next_event['start'].strftime('%-I:%M %p'),
-                'end_time': next_event['end'].strftime('%-I:%M %p'),
-                'organizer': next_event['organizer']
-            } if next_event else None
+            'current_booking': _booking_payload(current_event),
+            'next_booking': next_booking
         }
     elif next_event:
         # Room is available until next meeting
@@ -288,12 +2170,7 @@ def determine_room_status(events: List[Dict], now: datetime) -> Dict:
             'available_until': next_event['start'].strftime('%-I:%M %p'),
             'minutes_available': minutes_until_next,
             'current_booking': None,
-            'next_booking': {
-                'title': next_event['summary'],
-                'start_time': next_event['start'].strftime('%-I:%M %p'),
-                'end_time': next_event['end'].strftime('%-I:%M %p'),
-                'organizer': next_event['organizer']
-            }
+            'next_booking': next_booking
         }
     else:
         # Room is available for rest of day
@@ -307,6 +2184,147 @@ def determine_room_status(events: List[Dict], now: datetime) -> Dict:
         }
 
 
+@app.before_request
+def _track_request_start():
+    g.metrics_endpoint = request.endpoint or 'unknown'
+    g.metrics_token = _metrics_endpoint.set(g.metrics_endpoint)
+    REQUESTS_IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+
+
+@app.before_request
+def _start_diagnostics():
+    if request.endpoint not in DIAGNOSTIC_ENDPOINTS:
+        return
+    if SERVER_TIMING:
+        g.request_started = time.perf_counter()
+        g.timings_token = _request_timings.set({})
+    # Only one request per process is profiled at a time; others run normally
+    if PROFILING_ENABLED and request.args.get('profile') == '1' and _profile_lock.acquire(blocking=False):
+        import cProfile  # Only loaded when profiling is used
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+def _profile_summary(profiler, endpoint: str) -> Dict:
+    """Hottest functions of a finished profile, optionally saving the full stats to PROFILE_DIR"""
+    import pstats
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    summary = {'top_functions': []}
+    for (filename, line, function), (_, calls, total, cumulative, _) in sorted(
+        stats.stats.items(), key=lambda item: item[1][3], reverse=True
+    )[:PROFILE_TOP]:
+        summary['top_functions'].append({
+            'function': function,
+            'location': f'{filename}:{line}',
+            'calls': calls,
+            'total_ms': round(total * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        })
+    if PROFILE_DIR:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{datetime.now(TIMEZONE).strftime('%Y%m%dT%H%M%S%f')}-{endpoint}.prof")
+        stats.dump_stats(path)
+        summary['stored_at'] = path
+    return summary
+
+
+# after_request hooks run in reverse order of registration, so this one runs last and
+# compresses the body after diagnostics have added to it
+@app.after_request
+def _compress_response(response: Response) -> Response:
+    if response.mimetype != 'application/json' or response.direct_passthrough:
+        return response
+    if COMPRESS_RESPONSES:
+        response.vary.add('Accept-Encoding')
+    # A body something else already encoded is sent as it is
+    accept_encoding = '' if 'Content-Encoding' in response.headers else request.headers.get('Accept-Encoding', '')
+    body, encoding = encode_json_body(response.get_data(), response.status_code, accept_encoding,
+                                      request.endpoint or 'unknown')
+    if encoding is not None:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+
+def _profile_stream(response: Response, profiler, endpoint: str) -> None:
+    """
+    Keep profiling a streamed response until its body has been sent
+
+    The work of a streamed response (format=ndjson) happens while the body is
+    iterated, after after_request. The profile ends when the body is
+    exhausted or closed; NDJSON bodies get it as a last {"profile": ...} line.
+    The request context is gone by then, so the endpoint is passed in.
+    """
+    finished = []
+
+    def _finish() -> None:
+        if not finished:
+            finished.append(True)
+            profiler.disable()
+            _profile_lock.release()
+
+    def _body(body):
+        yield from body
+        _finish()
+        if response.mimetype == 'application/x-ndjson':
+            yield json.dumps({'profile': _profile_summary(profiler, endpoint)}) + '\n'
+
+    response.response = ClosingIterator(_body(response.response), _finish)
+
+
+@app.after_request
+def _finish_diagnostics(response: Response) -> Response:
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        if response.is_streamed:
+            _profile_stream(response, profiler, request.endpoint)
+        else:
+            profiler.disable()
+            _profile_lock.release()
+            summary = _profile_summary(profiler, request.endpoint)
+            payload = response.get_json(silent=True)
+            if isinstance(payload, dict):
+                payload['profile'] = summary
+                response.set_data(json.dumps(payload))
+        # Profiled responses are diagnostics, never cache them
+        response.headers.pop('ETag', None)
+        response.cache_control.no_store = True
+        response.cache_control.max_age = None
+
+    timings = _request_timings.get() if 'timings_token' in g else None
+    if timings is not None:
+        # A streamed body is produced after the headers are sent, so only the time to them is known
+        stage = 'headers' if response.is_streamed else 'total'
+        timings[stage] = time.perf_counter() - g.request_started
+        response.headers['Server-Timing'] = ', '.join(
+            f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in timings.items()
+        )
+    return response
+
+
+@app.teardown_request
+def _track_request_end(exc=None):
+    if 'metrics_endpoint' in g:
+        REQUESTS_IN_FLIGHT.dec(endpoint=g.metrics_endpoint)
+        _metrics_endpoint.reset(g.metrics_token)
+    if 'timings_token' in g:
+        _request_timings.reset(g.timings_token)
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        # The request failed before after_request could finish the profile
+        profiler.disable()
+        _profile_lock.release()
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics for this worker process"""
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
@@ -319,9 +2337,20 @@ def health():
 
 def build_room_status_response(ics_url: str, room_name: str, now: datetime) -> Dict:
     """Fetch calendar data and return a room status payload."""
-    cal = fetch_ics_feed(ics_url)
-    events = parse_events_with_recurrence(cal, now)
-    status = determine_room_status(events, now)
+    with feed_metrics_context(ics_url):
+        feed = get_feed_snapshot(ics_url)
+        return room_status_payload(feed, ics_url, room_name, now)
+
+
+def room_status_payload(feed: FeedCacheEntry, ics_url: str, room_name: str, now: datetime) -> Dict:
+    """Room status payload for a feed snapshot that has already been fetched"""
+    with feed_metrics_context(ics_url):
+        started = time.perf_counter()
+        index = get_event_index(feed, now)
+        status = determine_room_status(index, now)
+        next_change = index.next_transition(now)
+        STATUS_SECONDS.observe(time.perf_counter() - started, **_metric_labels())
+        record_timing('status', time.perf_counter() - started)
 
     return {
         'room_name': room_name,
@@ -334,13 +2363,392 @@ def build_room_status_response(ics_url: str, room_name: str, now: datetime) -> D
         'minutes_available': status['minutes_available'],
         'current_booking': status['current_booking'],
         'next_booking': status['next_booking'],
-        'last_updated': now.isoformat()
+        'next_status_change': next_change.isoformat() if next_change else None,
+        'last_updated': now.isoformat(),
+        'data_age_seconds': int(feed.age()),
+        'stale': is_stale(feed),
+    }
+
+
+# Fields that change on every request without changing what a display shows
+VOLATILE_FIELDS = ('last_updated', 'data_age_seconds', 'generated_at')
+
+
+def _semantic_payload(payload):
+    """Payload with per-request fields removed, for ETag computation"""
+    if isinstance(payload, dict):
+        return {key: _semantic_payload(value) for key, value in payload.items() if key not in VOLATILE_FIELDS}
+    if isinstance(payload, list):
+        return [_semantic_payload(value) for value in payload]
+    return payload
+
+
+def _seconds_until_stale(rooms: List[Dict], now: datetime) -> int:
+    """
+    Seconds until the earliest of the next minute rollover (current_time and
+    minutes_available tick over) and any room's next status transition
+    """
+    remaining = 60 - now.second - now.microsecond / 1_000_000
+    for room in rooms:
+        next_change = room.get('next_status_change')
+        if next_change:
+            remaining = min(remaining, (datetime.fromisoformat(next_change) - now).total_seconds())
+    return max(0, int(remaining))
+
+
+def payload_etag(payload: Dict) -> str:
+    """Strong ETag value for a payload, ignoring VOLATILE_FIELDS"""
+    return hashlib.sha256(
+        json.dumps(_semantic_payload(payload), sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()[:32]
+
+
+def parse_field_selection(fields: Optional[str], view: Optional[str]) -> Optional[Dict]:
+    """
+    Field tree for a `fields=` list and/or a named `view=`, or None for the whole payload
+
+    Fields are comma separated; dotted paths such as `current_booking.title` pick
+    keys of a nested object. Raises ValueError for an unknown view.
+    """
+    paths = []
+    if view:
+        if view not in PAYLOAD_VIEWS:
+            raise ValueError(f"view must be one of: {', '.join(PAYLOAD_VIEWS)}")
+        paths.extend(PAYLOAD_VIEWS[view])
+    if fields:
+        paths.extend(path.strip() for path in fields.split(',') if path.strip())
+    if not paths:
+        return None
+
+    selection: Dict = {}
+    for path in paths:
+        node = selection
+        *parents, leaf = path.split('.')
+        for key in parents:
+            child = node.get(key, {})
+            if child is None:
+                break  # A parent was already selected whole
+            node = node.setdefault(key, child)
+        else:
+            node[leaf] = None
+    return selection
+
+
+def select_fields(payload, selection: Optional[Dict]):
+    """Copy of payload restricted to a parse_field_selection tree; unknown keys are skipped"""
+    if selection is None or not isinstance(payload, dict):
+        return payload
+    return {
+        key: select_fields(payload[key], subtree)
+        for key, subtree in selection.items() if key in payload
+    }
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred content encoding the client accepts ('br' or 'gzip'), or None for identity"""
+    if not COMPRESS_RESPONSES or not accept_encoding:
+        return None
+    accepted = parse_accept_header(accept_encoding)
+    candidates = [('br', 2), ('gzip', 1)] if brotli is not None else [('gzip', 1)]
+    quality, _, encoding = max((accepted.quality(name), rank, name) for name, rank in candidates)
+    return encoding if quality > 0 else None
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def encoded_etags(digest: str) -> List[str]:
+    """ETag values of every representation of a payload; each content encoding gets its own"""
+    return [digest] + [f'{digest}-{encoding}' for encoding in ('gzip', 'br')]
+
+
+def matched_etag(digest: str, holds) -> Optional[str]:
+    """The representation of a payload a client already holds (`holds(etag)` tests If-None-Match), or None"""
+    return next((tag for tag in encoded_etags(digest) if holds(tag)), None)
+
+
+def cache_control(rooms: List[Dict], now: datetime, cacheable: bool = True) -> str:
+    """Cache-Control for room statuses: reusable until they would next change, or not at all"""
+    return f'max-age={_seconds_until_stale(rooms, now)}' if cacheable else 'no-cache'
+
+
+def encode_json_body(body: bytes, status: int, accept_encoding: str, endpoint: str) -> tuple:
+    """
+    (body, content encoding or None) to send for a JSON response
+
+    Only 200s of at least COMPRESS_MIN_BYTES are compressed, with the
+    encoding choose_encoding picks. The bytes sent are recorded.
+    """
+    encoding = choose_encoding(accept_encoding) if status == 200 else None
+    if encoding is not None and len(body) >= COMPRESS_MIN_BYTES:
+        body = compress_body(body, encoding)
+    else:
+        encoding = None
+    RESPONSE_BYTES.observe(len(body), endpoint=endpoint, encoding=encoding or 'identity')
+    return body, encoding
+
+
+def conditional_json(payload: Dict, rooms: List[Dict], now: datetime, cacheable: bool = True) -> Response:
+    """
+    JSON response with a strong ETag over the semantic payload
+
+    Answers a matching If-None-Match with 304 and lets clients and proxies
+    reuse the response until the payload would next change. The body is
+    compressed later, in _compress_response, which also tags the ETag with
+    the encoding; a 304 echoes whichever representation the client holds.
+    """
+    digest = payload_etag(payload)
+    matched = matched_etag(digest, request.if_none_match.contains)
+    if matched is not None:
+        response = Response(status=304)
+        digest = matched
+    else:
+        started = time.perf_counter()
+        response = jsonify(payload)
+        record_timing('serialize', time.perf_counter() - started)
+    response.set_etag(digest)
+    if COMPRESS_RESPONSES:
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = cache_control(rooms, now, cacheable)
+    return response
+
+
+_multi_room_executor: Optional[ThreadPoolExecutor] = None
+_multi_room_executor_lock = threading.Lock()
+
+
+def _get_multi_room_executor() -> ThreadPoolExecutor:
+    """Shared worker pool, created lazily so it is never inherited across a gunicorn fork"""
+    global _multi_room_executor
+    with _multi_room_executor_lock:
+        if _multi_room_executor is None:
+            _multi_room_executor = ThreadPoolExecutor(
+                max_workers=MULTI_ROOM_MAX_WORKERS, thread_name_prefix='multi-room'
+            )
+        return _multi_room_executor
+
+
+def build_room_status_responses(rooms: List[tuple], now: datetime, build=None) -> tuple:
+    """
+    Build room status payloads for (ics_url, room_name) pairs concurrently
+
+    Each feed gets MULTI_ROOM_FEED_TIMEOUT seconds once it starts processing and
+    the batch as a whole gets MULTI_ROOM_DEADLINE seconds. Feeds that fail or miss
+    a deadline are reported in the errors list; results keep the input order.
+    `build(ics_url, room_name, now)` defaults to build_room_status_response.
+    """
+    executor = _get_multi_room_executor()
+    batch_deadline = time.monotonic() + MULTI_ROOM_DEADLINE
+    started: Dict[int, float] = {}
+    build = build or build_room_status_response
+
+    def _run(index: int, ics_url: str, room_name: str) -> Dict:
+        started[index] = time.monotonic()
+        return build(ics_url, room_name, now)
+
+    # Each task runs in a copy of the request's context so metrics keep the endpoint label
+    futures = {
+        executor.submit(contextvars.copy_context().run, _run, index, ics_url, room_name): index
+        for index, (ics_url, room_name) in enumerate(rooms)
+    }
+    outcomes: Dict[int, tuple] = {}
+    pending = set(futures)
+
+    while pending:
+        current = time.monotonic()
+        next_wake = batch_deadline
+        for future in list(pending):
+            index = futures[future]
+            if current >= batch_deadline:
+                reason = f"Request deadline of {MULTI_ROOM_DEADLINE:g}s exceeded"
+            elif index in started and current >= started[index] + MULTI_ROOM_FEED_TIMEOUT:
+                reason = f"Feed timed out after {MULTI_ROOM_FEED_TIMEOUT:g}s"
+            else:
+                if index in started:
+                    next_wake = min(next_wake, started[index] + MULTI_ROOM_FEED_TIMEOUT)
+                continue
+            # Running feeds cannot be interrupted; they finish in the background
+            future.cancel()
+            pending.discard(future)
+            app.logger.error(f"Error processing ICS feed {rooms[index][0]}: {reason}")
+            outcomes[index] = (None, reason)
+        if not pending:
+            break
+        # Wake at the earliest deadline, but re-check regularly for feeds that have started
+        timeout = max(0.0, min(next_wake - current, 0.25))
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.discard(future)
+            index = futures[future]
+            try:
+                outcomes[index] = (future.result(), None)
+            except Exception as e:
+                app.logger.error(f"Error processing ICS feed {rooms[index][0]}: {str(e)}", exc_info=e)
+                outcomes[index] = (None, str(e))
+
+    results = []
+    errors = []
+    for index, (ics_url, room_name) in enumerate(rooms):
+        result, error = outcomes[index]
+        if error is None:
+            results.append(result)
+        else:
+            errors.append({'ics_url': ics_url, 'room_name': room_name, 'error': error})
+    return results, errors
+
+
+def build_room_occupancy(ics_url: str, room_name: str, now: datetime, window_end: datetime) -> Dict:
+    """Occupancy bitmap of a room from the start of the current minute until window_end"""
+    window_start = now.replace(second=0, microsecond=0)
+    minutes = int((window_end - window_start).total_seconds() // 60)
+    with feed_metrics_context(ics_url):
+        feed = get_feed_snapshot(ics_url)
+        started = time.perf_counter()
+        index = get_event_index(feed, now, start_date=window_start.date(), end_date=window_end.date())
+        occupancy = OccupancyBitmap(window_start, minutes, index.window(window_start, window_end))
+        record_timing('status', time.perf_counter() - started)
+    return {'room_name': room_name, 'ics_url': ics_url, 'occupancy': occupancy}
+
+
+def rank_free_rooms(rooms: List[Dict], duration: int) -> Dict:
+    """
+    Rooms free for the next `duration` minutes (longest availability first)
+    and each room's earliest free slot of that length (soonest first)
+    """
+    available_now = []
+    earliest = []
+    for order, room in enumerate(rooms):
+        occupancy = room['occupancy']
+        free_minutes = occupancy.free_run()
+        if free_minutes >= duration:
+            available_now.append((-free_minutes, order, {
+                'room_name': room['room_name'],
+                'ics_url': room['ics_url'],
+                'free_minutes': free_minutes,
+                'free_until': (occupancy.start + timedelta(minutes=free_minutes)).isoformat(),
+            }))
+        offset = occupancy.earliest_free(duration)
+        if offset is not None:
+            run = occupancy.free_run(offset)
+            earliest.append((offset, -run, order, {
+                'room_name': room['room_name'],
+                'ics_url': room['ics_url'],
+                'start': (occupancy.start + timedelta(minutes=offset)).isoformat(),
+                'free_minutes': run,
+                'free_until': (occupancy.start + timedelta(minutes=offset + run)).isoformat(),
+            }))
+    return {
+        'available_now': [item[-1] for item in sorted(available_now, key=lambda item: item[:2])],
+        'earliest_slots': [item[-1] for item in sorted(earliest, key=lambda item: item[:3])],
+    }
+
+
+def requested_rooms(ics_urls: List[str], room_names: List[str]) -> List[tuple]:
+    """
+    (ics_url, room_name) pairs for /multi-room-status query parameters
+
+    Room names align with ICS URLs by index; missing names fall back to
+    "Schedule N". A single comma-separated ics_url is split into several.
+    """
+    if len(ics_urls) == 1 and ',' in ics_urls[0]:
+        ics_urls = [u.strip() for u in ics_urls[0].split(',') if u.strip()]
+    return [
+        (ics_url, room_names[index] if index < len(room_names) and room_names[index] else f"Schedule {index + 1}")
+        for index, ics_url in enumerate(ics_urls)
+    ]
+
+
+def multi_room_payload(results: List[Dict], errors: List[Dict], now: datetime) -> Dict:
+    """/multi-room-status body for the rooms that succeeded and those that failed"""
+    response = {
+        'generated_at': now.isoformat(),
+        'timezone': str(TIMEZONE),
+        'rooms': results,
+    }
+    if errors:
+        response['errors'] = errors
+    return response
+
+
+# /debug paging - ranges up to DEBUG_MAX_DAYS, DEBUG_PAGE_SIZE events per JSON page by default
+DEBUG_MAX_DAYS = 366
+DEBUG_PAGE_SIZE = 20
+DEBUG_MAX_PAGE_SIZE = 1000
+
+
+def _debug_event(event: Dict, now: datetime) -> Dict:
+    return {
+        'summary': event['summary'],
+        'start_iso': event['start'].isoformat(),
+        'start_display': event['start'].strftime('%Y-%m-%d %-I:%M %p'),
+        'end_iso': event['end'].isoformat(),
+        'end_display': event['end'].strftime('%Y-%m-%d %-I:%M %p'),
+        'is_current': event['start'] <= now < event['end'],
+        'is_future': event['start'] > now,
+        'minutes_until': int((event['start'] - now).total_seconds() / 60)
     }
 
 
+def parse_debug_cursor(cursor: Optional[str]) -> Optional[tuple]:
+    """(start timestamp, events with that start already returned) from a next_cursor value"""
+    if not cursor:
+        return None
+    start, _, skip = cursor.partition('-')
+    return int(start), int(skip)
+
+
+def advance_debug_cursor(cursor: Optional[tuple], event: Dict) -> tuple:
+    """Cursor resuming after `event`, given the cursor that resumed at it"""
+    start = int(event['start'].timestamp())
+    return start, cursor[1] + 1 if cursor is not None and cursor[0] == start else 1
+
+
+def iter_debug_events(feed: FeedCacheEntry, range_start: datetime, range_end: datetime,
+                      cursor: Optional[tuple] = None):
+    """
+    Occurrences of a feed overlapping the range in start order, resuming at a cursor
+
+    A compiled timeline that already covers the range is sliced; otherwise
+    occurrences are expanded lazily from the parsed feed, starting at the
+    cursor, so a page never costs more than the events before it on the same
+    start time.
+    """
+    if cursor is not None:
+        resume_at = max(range_start, datetime.fromtimestamp(cursor[0], TIMEZONE))
+    else:
+        resume_at = range_start
+    compiled = COMPILED_CACHE.get(feed.content_hash)
+    if compiled is not None and compiled.covers(range_start.date(), range_end.date()):
+        events = compiled.index.window(range_start, range_end).window(resume_at, range_end)
+    else:
+        events = iter_occurrences(feed.calendar, resume_at, range_end, feed.content_hash)
+
+    skip = cursor[1] if cursor is not None else 0
+    for event in events:
+        if cursor is not None:
+            start = int(event['start'].timestamp())
+            if start < cursor[0]:
+                continue  # Already returned: started before the cursor but still running at it
+            if start == cursor[0] and skip:
+                skip -= 1
+                continue
+        yield event
+
+
 @app.route('/debug')
 def debug():
-    """Debug endpoint to see parsed events"""
+    """
+    Debug endpoint to see parsed events
+
+    Parameters:
+    - ics_url: URL to the ICS calendar feed
+    - days: days to list, starting today (default 1, max DEBUG_MAX_DAYS)
+    - limit: events per page (default DEBUG_PAGE_SIZE); pass the returned next_cursor as `cursor` for the next page
+    - format=ndjson: stream every event in the range (or `limit` events) as one JSON object per line
+    """
     ics_url = request.args.get('ics_url')
     if not ics_url:
         return jsonify({'error': 'ics_url parameter required'}), 400
@@ -349,15 +2757,34 @@ def debug():
         now = datetime.now(TIMEZONE)
         days = request.args.get('days', default='1')
         try:
-            days_int = max(1, min(int(days), 30))  # Clamp between 1 and 30 days
+            days_int = max(1, min(int(days), DEBUG_MAX_DAYS))
         except ValueError:
             return jsonify({'error': 'days must be an integer'}), 400
+        stream = request.args.get('format') == 'ndjson'
+        limit = request.args.get('limit', type=int, default=None if stream else DEBUG_PAGE_SIZE)
+        try:
+            cursor = parse_debug_cursor(request.args.get('cursor'))
+        except ValueError:
+            return jsonify({'error': 'cursor must be the next_cursor of a previous response'}), 400
+        if limit is not None:
+            limit = max(1, min(limit, DEBUG_MAX_PAGE_SIZE))
 
         start_date = now.date()
         end_date = start_date + timedelta(days=days_int - 1)
+        range_start = TIMEZONE.localize(datetime.combine(start_date, datetime.min.time()))
+        range_end = TIMEZONE.localize(datetime.combine(end_date, datetime.max.time()))
+
+        with feed_metrics_context(ics_url):
+            feed = get_feed(ics_url)
 
-        cal = fetch_ics_feed(ics_url)
-        events = parse_events_with_recurrence(cal, now, start_date=start_date, end_date=end_date)
+        if stream:
+            def _lines():
+                with feed_metrics_context(ics_url):
+                    events = iter_debug_events(feed, range_start, range_end, cursor)
+                    for event in itertools.islice(events, limit):
+                        yield json.dumps(_debug_event(event, now)) + '\n'
+
+            return Response(stream_with_context(_lines()), mimetype='application/x-ndjson')
 
         debug_info = {
             'current_time': now.isoformat(),
@@ -365,22 +2792,30 @@ def debug():
             'timezone': str(TIMEZONE),
             'range_start': start_date.isoformat(),
             'range_end': end_date.isoformat(),
-            'events': []
+            'events': [],
+            'next_cursor': None,
         }
 
-        for event in events[:20]:  # Show first 20 events in range
-            debug_info['events'].append({
-                'summary': event['summary'],
-                'start_iso': event['start'].isoformat(),
-                'start_display': event['start'].strftime('%Y-%m-%d %-I:%M %p'),
-                'end_iso': event['end'].isoformat(),
-                'end_display': event['end'].strftime('%Y-%m-%d %-I:%M %p'),
-                'is_current': event['start'] <= now < event['end'],
-                'is_future': event['start'] > now,
-                'minutes_until': int((event['start'] - now).total_seconds() / 60)
-            })
-
-        return jsonify(debug_info)
+        started = time.perf_counter()
+        with feed_metrics_context(ics_url):
+            # One event beyond the page tells whether there is a next page
+            page = list(itertools.islice(iter_debug_events(feed, range_start, range_end, cursor), limit + 1))
+        record_timing('expand', time.perf_counter() - started)
+
+        position = cursor
+        for event in page[:limit]:
+            debug_info['events'].append(_debug_event(event, now))
+            position = advance_debug_cursor(position, event)
+        if len(page) > limit:
+            debug_info['next_cursor'] = '%d-%d' % position
+        debug_info['failed_events'] = series_failures(feed)
+        debug_info['skipped_components'] = sum(failure['skipped_components'] for failure in debug_info['failed_events'])
+        debug_info['upstream'] = FEED_LATENCY.stats(urlsplit(ics_url).netloc)
+
+        started = time.perf_counter()
+        response = jsonify(debug_info)
+        record_timing('serialize', time.perf_counter() - started)
+        return response
     except Exception as e:
         app.logger.error(f"Debug error: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
@@ -393,6 +2828,7 @@ def room_status():
     Expected parameters:
     - ics_url: URL to the ICS calendar feed
     - room_name: Optional room name to display
+    - fields / view: Optional subset of the payload to return (see PAYLOAD_VIEWS)
     """
     
     ics_url = request.args.get('ics_url')
@@ -400,12 +2836,17 @@ def room_status():
 
     if not ics_url:
         return jsonify({'error': 'ics_url parameter required'}), 400
+    try:
+        selection = parse_field_selection(request.args.get('fields'), request.args.get('view'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     try:
         # Get current time in configured timezone
         now = datetime.now(TIMEZONE)
 
-        return jsonify(build_room_status_response(ics_url, room_name, now))
+        payload = build_room_status_response(ics_url, room_name, now)
+        return conditional_json(select_fields(payload, selection), [payload], now)
 
     except Exception as e:
         app.logger.error(f"Error: {str(e)}", exc_info=True)
@@ -425,28 +2866,53 @@ def multi_room_status():
     Accepts repeated `ics_url` and `room_name` query parameters. Room names
     align with ICS URLs by index; missing names fall back to "Schedule N".
     You can also pass a single comma-separated `ics_url` value for convenience.
+    `fields` / `view` select the keys returned for each room.
     """
 
-    ics_urls = request.args.getlist('ics_url')
-    room_names = request.args.getlist('room_name')
+    rooms = requested_rooms(request.args.getlist('ics_url'), request.args.getlist('room_name'))
+    if not rooms:
+        return jsonify({'error': 'at least one ics_url parameter is required'}), 400
+    try:
+        selection = parse_field_selection(request.args.get('fields'), request.args.get('view'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    now = datetime.now(TIMEZONE)
+    results, errors = build_room_status_responses(rooms, now)
+
+    if not results:
+        return jsonify({'error': 'No calendars could be processed', 'details': errors}), 500
+
+    response = multi_room_payload([select_fields(result, selection) for result in results], errors, now)
+    # Failed rooms should be retried on the next poll rather than cached
+    return conditional_json(response, results, now, cacheable=not errors)
 
-    if len(ics_urls) == 1 and ',' in ics_urls[0]:
-        ics_urls = [u.strip() for u in ics_urls[0].split(',') if u.strip()]
 
-    if not ics_urls:
+@app.route('/free-rooms')
+def free_rooms():
+    """
+    Find rooms that are free now, or the earliest free slot, across several feeds.
+
+    Accepts the same `ics_url` / `room_name` parameters as /multi-room-status plus:
+    - duration: minutes the room must stay free (default 30)
+    - days: how many days, starting today, to search for the earliest slot (default 1, max 7)
+    """
+    rooms = requested_rooms(request.args.getlist('ics_url'), request.args.getlist('room_name'))
+    if not rooms:
         return jsonify({'error': 'at least one ics_url parameter is required'}), 400
+    try:
+        duration = int(request.args.get('duration', '30'))
+        days = max(1, min(int(request.args.get('days', '1')), 7))
+    except ValueError:
+        return jsonify({'error': 'duration and days must be integers'}), 400
+    if not 1 <= duration <= days * 24 * 60:
+        return jsonify({'error': 'duration must be between 1 minute and the search window'}), 400
 
     now = datetime.now(TIMEZONE)
-    results = []
-    errors = []
-
-    for index, ics_url in enumerate(ics_urls):
-        room_name = room_names[index] if index < len(room_names) and room_names[index] else f"Schedule {index + 1}"
-        try:
-            results.append(build_room_status_response(ics_url, room_name, now))
-        except Exception as e:
-            app.logger.error(f"Error processing ICS feed {ics_url}: {str(e)}", exc_info=True)
-            errors.append({'ics_url': ics_url, 'room_name': room_name, 'error': str(e)})
+    window_end = TIMEZONE.localize(datetime.combine(now.date() + timedelta(days=days), datetime.min.time()))
+    results, errors = build_room_status_responses(
+        rooms, now, build=lambda ics_url, room_name, now: build_room_occupancy(ics_url, room_name, now, window_end)
+    )
 
     if not results:
         return jsonify({'error': 'No calendars could be processed', 'details': errors}), 500
@@ -454,12 +2920,91 @@ def multi_room_status():
     response = {
         'generated_at': now.isoformat(),
         'timezone': str(TIMEZONE),
-        'rooms': results,
+        'duration_minutes': duration,
+        'search_until': window_end.isoformat(),
+        **rank_free_rooms(results, duration),
     }
     if errors:
         response['errors'] = errors
+    return conditional_json(response, [], now, cacheable=not errors)
+
+
+# A small feed touching the same code paths as real ones: TZID times, a daily RRULE
+# with EXDATE and a moved instance, a UTC UNTIL and an all-day event
+WARM_UP_ICS = b"""BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//Room Display//Warm-up//EN
+BEGIN:VEVENT
+UID:warm-up-daily
+DTSTAMP:20240101T000000Z
+SUMMARY:Daily
+DTSTART;TZID=America/Chicago:20240101T090000
+DTEND;TZID=America/Chicago:20240101T093000
+RRULE:FREQ=DAILY
+EXDATE;TZID=America/Chicago:20240102T090000
+END:VEVENT
+BEGIN:VEVENT
+UID:warm-up-daily
+DTSTAMP:20240101T000000Z
+RECURRENCE-ID;TZID=America/Chicago:20240103T090000
+SUMMARY:Moved
+DTSTART;TZID=America/Chicago:20240103T100000
+DTEND;TZID=America/Chicago:20240103T103000
+END:VEVENT
+BEGIN:VEVENT
+UID:warm-up-weekly
+DTSTAMP:20240101T000000Z
+SUMMARY:Weekly
+DTSTART:20240101T150000Z
+DTEND:20240101T160000Z
+RRULE:FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20991231T235959Z
+END:VEVENT
+BEGIN:VEVENT
+UID:warm-up-all-day
+DTSTAMP:20240101T000000Z
+SUMMARY:All day
+DTSTART;VALUE=DATE:20240101
+DTEND;VALUE=DATE:20240102
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def warm_up() -> float:
+    """
+    Run a built-in feed through the request path once and return the seconds taken
 
-    return jsonify(response)
+    Loads timezone data, lazily imported modules and parser caches before
+    gunicorn forks (see gunicorn.conf.py), so workers share them instead of
+    paying for them on their first request. Nothing is cached or fetched (the
+    series caches are swapped out while it runs), and metrics recorded here
+    carry endpoint="warm_up".
+    """
+    global EXPANDED_SERIES, FAILED_SERIES
+    started = time.perf_counter()
+    token = _metrics_endpoint.set('warm_up')
+    series_caches = EXPANDED_SERIES, FAILED_SERIES
+    EXPANDED_SERIES = ExpandedSeriesCache(EXPANDED_SERIES.max_entries)
+    FAILED_SERIES = SeriesFailureCache(FAILED_SERIES.max_entries)
+    try:
+        now = datetime.now(TIMEZONE)
+        pruner = IcsStreamPruner(_prune_cutoff(), ICS_MAX_BYTES)
+        pruner.feed(WARM_UP_ICS)
+        cal = Calendar.from_ical(pruner.finish())
+        compiled = compile_calendar(cal, now, now.date(), now.date())
+        index = compiled.index_between(now.date(), now.date())
+        payload = {
+            'status': determine_room_status(index, now),
+            'next_status_change': index.next_transition(now),
+            'last_updated': now.isoformat(),
+        }
+        payload_etag(payload)
+        with app.test_request_context('/room-status'):
+            jsonify(payload)
+    finally:
+        EXPANDED_SERIES, FAILED_SERIES = series_caches
+        _metrics_endpoint.reset(token)
+    return time.perf_counter() - started
 
 
 if __name__ == '__main__':
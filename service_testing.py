@@ -0,0 +1,28 @@
+"""Helpers shared by the room_availability_service tests"""
+
+import unittest
+from unittest import mock
+
+import room_availability_service as service
+
+
+EMPTY_ICS = b"""BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//Test Calendar//EN
+END:VCALENDAR
+"""
+
+
+def make_response(body: bytes = EMPTY_ICS, status_code: int = 200, headers=None) -> mock.Mock:
+    """Stand-in for the streamed requests.Response that _http_get returns"""
+    response = mock.Mock(status_code=status_code, headers=headers or {})
+    response.iter_content = mock.Mock(return_value=iter([body]))
+    return response
+
+
+def patch_service(test: unittest.TestCase, **values) -> None:
+    """Replace room_availability_service attributes (caches, settings) until the test finishes"""
+    for name, value in values.items():
+        patcher = mock.patch.object(service, name, value)
+        patcher.start()
+        test.addCleanup(patcher.stop)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Static snapshot publisher for the Room Availability Service
+
+Takes Python out of the poll path: for every room in a registry the
+/room-status payload is computed with the same feed cache, recurrence
+expansion and status logic as the web service and written to
+`<output>/rooms/<id>.json`, with every room together in `<output>/rooms.json`
+(the /multi-room-status shape). nginx then serves the directory directly.
+
+    {"rooms": [{"id": "board-room", "room_name": "Board Room", "ics_url": "https://..."}]}
+
+Files are replaced atomically (write to a temporary file, then rename) and
+only when their content changes, ignoring per-request fields such as
+`last_updated`. Rooms are recomputed at every minute boundary, when
+`current_time` and `minutes_available` roll over, and at any earlier status
+transition; feed updates fetched by the background refresher show up at
+the next of those. A `.json.gz` copy is kept next to each file large enough
+to compress, for nginx's gzip_static. Published files leave out `ics_url`,
+since the directory is meant to be served without authentication. Run with:
+
+    python snapshot_publisher.py rooms.json /var/www/room-display
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import room_availability_service as service
+from room_availability_service import (
+    TIMEZONE,
+    compress_body,
+    multi_room_payload,
+    payload_etag,
+)
+
+PUBLISH_WORKERS = int(os.environ.get('PUBLISH_WORKERS', '8'))
+
+ROOM_ID_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]*$')
+AGGREGATE_NAME = 'rooms.json'
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RegisteredRoom:
+    room_id: str
+    room_name: str
+    ics_url: str
+
+    def __post_init__(self):
+        if not ROOM_ID_PATTERN.match(self.room_id):
+            raise ValueError(f"Room id {self.room_id!r} must be letters, digits, '.', '_' or '-'")
+
+
+def load_registry(path: str) -> List[RegisteredRoom]:
+    with open(path) as f:
+        config = json.load(f)
+    rooms = [
+        RegisteredRoom(str(room['id']), room.get('room_name') or str(room['id']), room['ics_url'])
+        for room in config['rooms']
+    ]
+    if len({room.room_id for room in rooms}) != len(rooms):
+        raise ValueError('Room ids in the registry must be unique')
+    return rooms
+
+
+def encode_json(payload: Dict) -> bytes:
+    # Same encoding as Flask's jsonify, so files match what the web service would send
+    return (json.dumps(payload, sort_keys=True, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def write_atomic(path: str, body: bytes) -> None:
+    """Replace path with body so readers see either the old or the new file, never a partial one"""
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(body)
+    os.replace(temporary, path)
+
+
+class SnapshotPublisher:
+    """
+    Writes room status files for a registry into `directory`
+
+    `clock` returns the current time as an aware datetime; replaceable for tests.
+    """
+
+    def __init__(self, rooms: List[RegisteredRoom], directory: str,
+                 clock: Callable[[], datetime] = lambda: datetime.now(TIMEZONE)):
+        self.rooms = rooms
+        self.directory = directory
+        self.rooms_directory = os.path.join(directory, 'rooms')
+        self.clock = clock
+        self.written: Dict[str, str] = {}
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=PUBLISH_WORKERS, thread_name_prefix='publish')
+        os.makedirs(self.rooms_directory, exist_ok=True)
+        feeds = len({room.ics_url for room in rooms})
+        if feeds > service.FEED_CACHE.max_entries:
+            logger.warning(f"{feeds} feeds but ICS_CACHE_MAX_ENTRIES is {service.FEED_CACHE.max_entries}; "
+                           f"evicted feeds are downloaded and expanded again on every pass")
+
+    def _write(self, path: str, payload: Dict) -> bool:
+        """Write payload (and its gzip copy) unless the file already holds the same content"""
+        digest = payload_etag(payload)
+        if self.written.get(path) == digest:
+            return False
+        body = encode_json(payload)
+        if service.COMPRESS_RESPONSES and len(body) >= service.COMPRESS_MIN_BYTES:
+            write_atomic(f'{path}.gz', compress_body(body, 'gzip'))
+        elif os.path.exists(f'{path}.gz'):
+            os.remove(f'{path}.gz')
+        write_atomic(path, body)
+        self.written[path] = digest
+        return True
+
+    def remove_unregistered(self) -> int:
+        """Delete published files of rooms no longer in the registry"""
+        registered = {f'{room.room_id}.json' for room in self.rooms}
+        removed = 0
+        for name in os.listdir(self.rooms_directory):
+            base = name[:-3] if name.endswith('.gz') else name
+            if base.endswith('.json') and base not in registered:
+                os.remove(os.path.join(self.rooms_directory, name))
+                removed += 1
+        return removed
+
+    def _room_payload(self, room: RegisteredRoom, now: datetime) -> tuple:
+        try:
+            return service.build_room_status_response(room.ics_url, room.room_name, now), None
+        except Exception as e:
+            return None, str(e)
+
+    def publish(self, now: Optional[datetime] = None) -> tuple:
+        """
+        Recompute every room and write the files whose content changed
+
+        Returns (files written, earliest next_status_change as a datetime or None).
+        Rooms whose feed fails keep their previous file. Unlike /multi-room-status
+        there is no deadline: a slow pass is followed by the next one straight away.
+        """
+        now = now or self.clock()
+        outcomes = self._executor.map(lambda room: self._room_payload(room, now), self.rooms)
+
+        written = 0
+        published = []
+        failed = []
+        next_change = None
+        for room, (payload, error) in zip(self.rooms, outcomes):
+            if error is not None:
+                logger.warning(f"Could not publish {room.room_id}: {error}")
+                failed.append({'room_id': room.room_id, 'room_name': room.room_name, 'error': error})
+                continue
+            payload = {key: value for key, value in payload.items() if key != 'ics_url'}
+            payload['room_id'] = room.room_id
+            published.append(payload)
+            written += self._write(os.path.join(self.rooms_directory, f'{room.room_id}.json'), payload)
+            if payload['next_status_change']:
+                change = datetime.fromisoformat(payload['next_status_change'])
+                next_change = change if next_change is None else min(next_change, change)
+
+        written += self._write(os.path.join(self.directory, AGGREGATE_NAME), multi_room_payload(published, failed, now))
+        return written, next_change
+
+    def seconds_until_next_publish(self, now: datetime, next_change: Optional[datetime]) -> float:
+        """Time until the next minute boundary or status transition, whichever is sooner"""
+        remaining = 60 - now.second - now.microsecond / 1_000_000
+        if next_change is not None:
+            remaining = min(remaining, (next_change - now).total_seconds())
+        return max(0.0, remaining)
+
+    def run(self) -> None:
+        self.remove_unregistered()
+        while not self._stop.is_set():
+            started = self.clock()
+            try:
+                written, next_change = self.publish(started)
+                logger.info(f"Published {len(self.rooms)} rooms, {written} files changed")
+            except Exception as e:
+                logger.error(f"Publishing failed: {str(e)}", exc_info=True)
+                next_change = None
+            self._stop.wait(self.seconds_until_next_publish(self.clock(), next_change))
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('registry', help='JSON file listing room ids, names and ICS URLs')
+    parser.add_argument('output', help='directory to write the JSON files into')
+    parser.add_argument('--once', action='store_true', help='publish once and exit')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    publisher = SnapshotPublisher(load_registry(args.registry), args.output)
+    if args.once:
+        publisher.remove_unregistered()
+        written, _ = publisher.publish()
+        logger.info(f"Published {len(publisher.rooms)} rooms, {written} files changed")
+    else:
+        publisher.run()
+
+
+if __name__ == '__main__':
+    main()
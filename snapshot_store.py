@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+On-disk feed snapshots shared by every worker process
+
+One SQLite database in WAL mode holds, per feed URL, the ICS body that was
+parsed, its upstream validators and the wall-clock time it was fetched, and
+per feed content hash the compiled event timeline. Every write is a single
+transaction, so a reader in another process sees either the previous
+snapshot or the new one, never a torn mix; WAL lets those readers proceed
+while a writer commits.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feeds (
+    url TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    content_hash TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS timelines (
+    content_hash TEXT PRIMARY KEY,
+    horizon_start TEXT NOT NULL,
+    horizon_end TEXT NOT NULL,
+    events TEXT NOT NULL,
+    stored_at REAL NOT NULL
+);
+"""
+
+
+@dataclass
+class FeedSnapshot:
+    """A stored feed body and its validators; stored_at is a time.time() timestamp"""
+    url: str
+    body: bytes
+    content_hash: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+    def age(self) -> float:
+        return max(0.0, time.time() - self.stored_at)
+
+
+class SnapshotStore:
+    """
+    SQLite-backed snapshot store under `directory`
+
+    Connections are opened lazily per thread and per process, so a store
+    created before gunicorn forks is safe to use in every worker.
+    """
+
+    def __init__(self, directory: str, filename: str = 'snapshots.sqlite3', busy_timeout: float = 5.0):
+        self.directory = directory
+        self.path = os.path.join(directory, filename)
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(self.directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def feed_info(self, url: str) -> Optional[Tuple[str, float]]:
+        """(content_hash, stored_at) of a stored feed without reading its body"""
+        row = self._connection().execute(
+            'SELECT content_hash, stored_at FROM feeds WHERE url = ?', (url,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def load_feed(self, url: str) -> Optional[FeedSnapshot]:
+        row = self._connection().execute(
+            'SELECT body, content_hash, etag, last_modified, stored_at FROM feeds WHERE url = ?', (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return FeedSnapshot(url, bytes(row[0]), row[1], row[2], row[3], row[4])
+
+    def save_feed(self, snapshot: FeedSnapshot) -> None:
+        """Replace a feed's snapshot and drop timelines no stored feed refers to any more"""
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO feeds (url, body, content_hash, etag, last_modified, stored_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (snapshot.url, snapshot.body, snapshot.content_hash, snapshot.etag, snapshot.last_modified,
+                 snapshot.stored_at),
+            )
+            connection.execute(
+                'DELETE FROM timelines WHERE content_hash NOT IN (SELECT content_hash FROM feeds)'
+            )
+
+    def touch_feed(self, url: str, stored_at: float) -> None:
+        """Record that a stored feed was revalidated upstream (304) at stored_at"""
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                'UPDATE feeds SET stored_at = MAX(stored_at, ?) WHERE url = ?', (stored_at, url)
+            )
+
+    def load_timeline(self, content_hash: str) -> Optional[Tuple[str, str, str]]:
+        """(horizon_start, horizon_end, events JSON) compiled for a feed content hash"""
+        row = self._connection().execute(
+            'SELECT horizon_start, horizon_end, events FROM timelines WHERE content_hash = ?', (content_hash,)
+        ).fetchone()
+        return (row[0], row[1], row[2]) if row else None
+
+    def save_timeline(self, content_hash: str, horizon_start: str, horizon_end: str, events: str) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO timelines (content_hash, horizon_start, horizon_end, events, stored_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (content_hash, horizon_start, horizon_end, events, time.time()),
+            )
@@ -0,0 +1,169 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+import room_availability_service as service
+from room_availability_service import FeedCache, FeedHttpClient, HostCircuitBreaker, HostLatencyTracker, app, get_feed
+from service_testing import make_response, patch_service
+
+
+URL = 'https://calendar.example.com/room.ics'
+HOST = 'calendar.example.com'
+
+def make_tracker(**options):
+    settings = dict(window=20, min_samples=5, min_timeout=0.5, max_timeout=10, p99_factor=3, hedge=True,
+                    hedge_max_p95=1)
+    settings.update(options)
+    return HostLatencyTracker(**settings)
+
+
+class HostLatencyTrackerTests(unittest.TestCase):
+    def test_timeout_follows_observed_latency_within_bounds(self):
+        tracker = make_tracker()
+        self.assertEqual(tracker.timeout_for('fast'), 10)
+
+        for _ in range(5):
+            tracker.record('fast', 0.2)
+            tracker.record('slow', 6)
+            tracker.record('instant', 0.01)
+        self.assertAlmostEqual(tracker.timeout_for('fast'), 0.6)
+        self.assertEqual(tracker.timeout_for('slow'), 10)
+        self.assertEqual(tracker.timeout_for('instant'), 0.5)
+
+    def test_timeouts_lengthen_the_next_timeout(self):
+        tracker = make_tracker(window=5)
+        for _ in range(5):
+            tracker.record(HOST, 0.2)
+        tracker.record_timeout(HOST, 0.6)
+        self.assertAlmostEqual(tracker.timeout_for(HOST), 1.8)
+        self.assertEqual(tracker.stats(HOST)['timeouts'], 1)
+
+    def test_only_fast_hosts_are_hedged(self):
+        tracker = make_tracker()
+        for _ in range(5):
+            tracker.record('fast', 0.2)
+            tracker.record('slow', 6)
+        self.assertEqual(tracker.hedge_delay('fast'), 0.2)
+        self.assertIsNone(tracker.hedge_delay('slow'))
+        self.assertIsNone(tracker.hedge_delay('unknown'))
+        self.assertIsNone(make_tracker(hedge=False).hedge_delay('fast'))
+
+
+class HedgedFetchTests(unittest.TestCase):
+    def setUp(self):
+        self.tracker = make_tracker(min_samples=1)
+        patch_service(
+            self,
+            FEED_LATENCY=self.tracker,
+            FEED_CACHE=FeedCache(ttl=60, max_entries=10, max_bytes=1024 * 1024),
+            HTTP_CLIENT=FeedHttpClient(trust_env=False, max_per_host=2, pool_hosts=4,
+                                       breaker=HostCircuitBreaker(threshold=3, cooldown=60)),
+        )
+        self.tracker.record(HOST, 0.05)
+
+    def test_request_uses_the_adaptive_timeout(self):
+        with mock.patch.object(service, '_http_get', side_effect=lambda *a, **k: make_response()) as http_get, \
+                mock.patch.object(self.tracker, 'hedge', False):
+            get_feed(URL)
+        self.assertEqual(http_get.call_args.kwargs['timeout'], 0.5)
+        self.assertEqual(self.tracker.stats(HOST)['samples'], 2)
+
+    def test_hedge_answers_when_the_first_request_stalls(self):
+        release = threading.Event()
+        responses = []
+
+        def http_get(*args, **kwargs):
+            response = make_response()
+            responses.append(response)
+            if len(responses) == 1:
+                release.wait(5)
+            return response
+
+        with mock.patch.object(service, '_http_get', side_effect=http_get):
+            started = time.perf_counter()
+            get_feed(URL)
+            elapsed = time.perf_counter() - started
+            time.sleep(0.2)
+            release.set()
+            time.sleep(0.05)
+
+        self.assertLess(elapsed, 1)
+        stats = self.tracker.stats(HOST)
+        self.assertEqual((stats['hedges'], stats['hedge_wins']), (1, 1))
+        responses[0].close.assert_called_once()
+        # The stalled request's latency is sampled, not the hedge's
+        self.assertEqual(stats['samples'], 2)
+        self.assertGreaterEqual(self.tracker.stats(HOST)['p99_ms'], 200)
+
+    def test_hedge_slot_is_held_until_the_other_request_is_closed(self):
+        release = threading.Event()
+        responses = []
+
+        def http_get(*args, **kwargs):
+            response = make_response()
+            responses.append(response)
+            if len(responses) == 1:
+                release.wait(5)
+            return response
+
+        with mock.patch.object(service, '_http_get', side_effect=http_get):
+            get_feed(URL)
+            caller_slot = service.HTTP_CLIENT.try_extra_slot(HOST)
+            self.assertIsNotNone(caller_slot)
+            self.addCleanup(caller_slot.release)
+            self.assertIsNone(service.HTTP_CLIENT.try_extra_slot(HOST))
+
+            release.set()
+            time.sleep(0.05)
+        responses[0].close.assert_called_once()
+        freed = service.HTTP_CLIENT.try_extra_slot(HOST)
+        self.assertIsNotNone(freed)
+        freed.release()
+
+    def test_every_response_is_closed_when_both_arrive_together(self):
+        arrived = threading.Barrier(2, timeout=5)
+        responses = []
+
+        def http_get(*args, **kwargs):
+            response = make_response()
+            responses.append(response)
+            arrived.wait()
+            return response
+
+        with mock.patch.object(service, '_http_get', side_effect=http_get):
+            get_feed(URL)
+            time.sleep(0.05)
+
+        self.assertEqual(len(responses), 2)
+        for response in responses:
+            response.close.assert_called_once()
+
+    def test_no_hedge_without_a_free_host_slot(self):
+        slots = [service.HTTP_CLIENT.try_extra_slot(HOST)]
+        self.addCleanup(slots[0].release)
+        with mock.patch.object(service, '_http_get', side_effect=lambda *a, **k: time.sleep(0.2) or make_response()) \
+                as http_get:
+            get_feed(URL)
+        self.assertEqual(http_get.call_count, 1)
+        self.assertEqual(self.tracker.stats(HOST)['hedges'], 0)
+
+    def test_timeout_is_recorded(self):
+        with mock.patch.object(service, '_http_get', side_effect=requests.Timeout('slow')), \
+                mock.patch.object(self.tracker, 'hedge', False):
+            with self.assertRaises(Exception):
+                get_feed(URL)
+        self.assertEqual(self.tracker.stats(HOST)['timeouts'], 1)
+
+    def test_debug_shows_the_host_profile(self):
+        with mock.patch.object(service, '_http_get', side_effect=lambda *a, **k: make_response()):
+            payload = app.test_client().get(f'/debug?ics_url={URL}').get_json()
+        self.assertEqual(payload['upstream']['host'], HOST)
+        self.assertEqual(payload['upstream']['timeout_seconds'], 0.5)
+        self.assertIn('hedge_wins', payload['upstream'])
+
+
+if __name__ == "__main__":
+    unittest.main()
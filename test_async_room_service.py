@@ -0,0 +1,165 @@
+import asyncio
+import gzip
+import json
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+import async_room_service
+import room_availability_service as service
+from benchmarks.feed_server import FeedServer
+from benchmarks.ics_generator import generate_calendar
+from room_availability_service import CompiledCalendarCache, FeedCache, SingleFlight, TIMEZONE
+from service_testing import EMPTY_ICS, patch_service
+
+
+# Fields that depend on the wall clock at the moment each request ran
+CLOCK_FIELDS = service.VOLATILE_FIELDS + ('current_time', 'minutes_available')
+
+
+def without_clock_fields(payload):
+    return {key: value for key, value in payload.items() if key not in CLOCK_FIELDS}
+
+
+class AsyncRoomServiceTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        patch_service(
+            self,
+            FEED_CACHE=FeedCache(ttl=60, max_entries=100, max_bytes=16 * 1024 * 1024),
+            COMPILED_CACHE=CompiledCalendarCache(100),
+            FEED_FLIGHTS=SingleFlight('fetch'),
+            BACKGROUND_REFRESH=False,
+            USE_PROXY_FOR_ICS=False,
+            ICS_MAX_PER_HOST=64,
+            MULTI_ROOM_FEED_TIMEOUT=1.0,
+            MULTI_ROOM_DEADLINE=3.0,
+        )
+
+        self.upstream_requests = 0
+        self.upstream_in_flight = 0
+        self.upstream_peak = 0
+        # Requests with ?gate=N are held until N upstream requests are in flight (or 5s pass)
+        self.gate_open = asyncio.Event()
+        upstream = web.Application()
+        upstream.router.add_get('/{name}.ics', self._slow_feed)
+        self.upstream = TestServer(upstream)
+        await self.upstream.start_server()
+        self.client = TestClient(TestServer(async_room_service.create_app()))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.upstream.close()
+
+    async def _slow_feed(self, request):
+        self.upstream_requests += 1
+        self.upstream_in_flight += 1
+        self.upstream_peak = max(self.upstream_peak, self.upstream_in_flight)
+        try:
+            if 'gate' in request.query:
+                if self.upstream_in_flight >= int(request.query['gate']):
+                    self.gate_open.set()
+                try:
+                    await asyncio.wait_for(self.gate_open.wait(), 5)
+                except asyncio.TimeoutError:
+                    pass
+            await asyncio.sleep(float(request.query.get('delay', '0.3')))
+        finally:
+            self.upstream_in_flight -= 1
+        return web.Response(body=EMPTY_ICS, content_type='text/calendar')
+
+    def feed_url(self, name, delay=0.3):
+        return str(self.upstream.make_url(f'/{name}.ics').with_query(delay=str(delay)))
+
+    async def test_room_status_matches_flask_app(self):
+        body = generate_calendar(one_off=40, daily=4, weekly=6, overrides=2, cancellations=1,
+                                 today=datetime.now(TIMEZONE).date())
+        with FeedServer() as server:
+            url = server.set_feed('room', body)
+            response = await self.client.get('/room-status', params={'ics_url': url, 'room_name': 'Board Room'})
+            async_payload = await response.json()
+
+            service.FEED_CACHE.clear()
+            service.COMPILED_CACHE.clear()
+            # aiohttp's client asks for gzip by default; the Flask request asks for the same
+            flask_response = service.app.test_client().get(f'/room-status?ics_url={url}&room_name=Board Room',
+                                                           headers={'Accept-Encoding': 'gzip, deflate'})
+
+        self.assertEqual(response.status, 200)
+        flask_payload = json.loads(gzip.decompress(flask_response.data))
+        self.assertEqual(without_clock_fields(async_payload), without_clock_fields(flask_payload))
+        self.assertEqual(response.headers['ETag'], flask_response.headers['ETag'])
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+
+    async def test_slow_feeds_are_fetched_concurrently(self):
+        urls = [str(self.upstream.make_url(f'/room-{index}.ics').with_query(gate='20', delay='0'))
+                for index in range(20)]
+        with mock.patch.object(service, 'MULTI_ROOM_FEED_TIMEOUT', 30.0), \
+                mock.patch.object(service, 'MULTI_ROOM_DEADLINE', 60.0):
+            response = await self.client.get('/multi-room-status', params=[('ics_url', url) for url in urls])
+            payload = await response.json()
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(len(payload['rooms']), 20)
+        self.assertNotIn('errors', payload)
+        # Every download was in flight at once
+        self.assertEqual(self.upstream_peak, 20)
+
+    async def test_slow_feed_times_out_without_failing_the_batch(self):
+        response = await self.client.get('/multi-room-status', params=[
+            ('ics_url', self.feed_url('fast', delay=0)),
+            ('ics_url', self.feed_url('stuck', delay=5)),
+        ])
+        payload = await response.json()
+
+        self.assertEqual([room['room_name'] for room in payload['rooms']], ['Schedule 1'])
+        self.assertEqual(payload['errors'][0]['error'], 'Feed timed out after 1s')
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+
+    async def test_concurrent_requests_share_one_download(self):
+        url = self.feed_url('shared')
+        responses = await asyncio.gather(*(
+            self.client.get('/room-status', params={'ics_url': url}) for _ in range(10)
+        ))
+
+        self.assertTrue(all(response.status == 200 for response in responses))
+        self.assertEqual(self.upstream_requests, 1)
+
+    async def test_requests_join_a_threaded_refresh_in_flight(self):
+        url = self.feed_url('refreshed', delay=0.5)
+        refresh = asyncio.get_running_loop().run_in_executor(None, lambda: service.get_feed(url, revalidate=True))
+        await asyncio.sleep(0.1)
+        response = await self.client.get('/room-status', params={'ics_url': url})
+        await refresh
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.upstream_requests, 1)
+
+    async def test_etag_answers_304(self):
+        url = self.feed_url('cached', delay=0)
+        first = await self.client.get('/room-status', params={'ics_url': url})
+        second = await self.client.get('/room-status', params={'ics_url': url},
+                                       headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(second.status, 304)
+
+    async def test_compact_view_is_selected(self):
+        response = await self.client.get('/room-status', params={'ics_url': self.feed_url('compact', delay=0),
+                                                                 'view': 'compact'})
+        payload = await response.json()
+
+        self.assertEqual(set(payload), {'room_name', 'current_time', 'status', 'available_until', 'stale',
+                                        'current_booking', 'next_booking'})
+        bad = await self.client.get('/room-status', params={'ics_url': 'x', 'view': 'tiny'})
+        self.assertEqual(bad.status, 400)
+
+    async def test_missing_ics_url_is_rejected(self):
+        response = await self.client.get('/room-status')
+        self.assertEqual(response.status, 400)
+        self.assertEqual(await response.json(), {'error': 'ics_url parameter required'})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import time
+import unittest
+from unittest import mock
+
+from icalendar import Calendar
+
+import room_availability_service as service
+from room_availability_service import FeedCache, FeedCacheEntry, FeedRefresher, get_feed_snapshot
+from service_testing import patch_service
+
+
+EMPTY_ICS = b"""BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//Test Calendar//EN
+END:VCALENDAR
+"""
+
+URL = 'https://example.com/room.ics'
+
+
+def make_entry(age=0.0):
+    return FeedCacheEntry(
+        calendar=Calendar.from_ical(EMPTY_ICS),
+        size=len(EMPTY_ICS),
+        fetched_at=time.monotonic() - age,
+        content_hash='hash',
+    )
+
+
+class BackgroundRefreshTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = FeedCache(ttl=60, max_entries=10, max_bytes=1024 * 1024)
+        self.refresher = FeedRefresher(interval=60, jitter=0, max_backoff=600, idle_timeout=300, workers=1)
+        patch_service(
+            self,
+            FEED_CACHE=self.cache,
+            REFRESHER=self.refresher,
+            BACKGROUND_REFRESH=True,
+            REFRESH_MAX_STALENESS=300,
+        )
+        patcher = mock.patch.object(FeedRefresher, '_ensure_started')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_stale_snapshot_is_served_without_blocking(self):
+        stale = make_entry(age=120)
+        self.cache.put(URL, stale)
+
+        with mock.patch.object(service, 'get_feed') as get_feed:
+            snapshot = get_feed_snapshot(URL)
+
+        self.assertIs(snapshot, stale)
+        get_feed.assert_not_called()
+        self.assertIn(URL, self.refresher.tracked())
+
+    def test_snapshot_older_than_max_staleness_is_fetched_inline(self):
+        self.cache.put(URL, make_entry(age=600))
+        fresh = make_entry()
+
+        with mock.patch.object(service, 'get_feed', return_value=fresh) as get_feed:
+            self.assertIs(get_feed_snapshot(URL), fresh)
+        get_feed.assert_called_once_with(URL)
+
+    def test_snapshot_is_served_marked_stale_when_the_inline_fetch_fails(self):
+        stale = make_entry(age=600)
+        self.cache.put(URL, stale)
+
+        with mock.patch.object(service, 'get_feed', side_effect=Exception('upstream down')), \
+                self.assertLogs(service.app.logger, 'WARNING'):
+            snapshot = get_feed_snapshot(URL)
+        self.assertIs(snapshot, stale)
+        self.assertTrue(service.is_stale(snapshot))
+        self.assertFalse(service.is_stale(make_entry(age=120)))
+
+        self.cache.clear()
+        with mock.patch.object(service, 'get_feed', side_effect=Exception('upstream down')):
+            with self.assertRaisesRegex(Exception, 'upstream down'):
+                get_feed_snapshot(URL)
+
+    def test_due_feeds_are_revalidated_and_failures_back_off(self):
+        self.refresher.track(URL)
+        now = time.monotonic()
+        self.assertEqual(self.refresher.refresh_due(now), 0)
+
+        with mock.patch.object(service, 'get_feed', side_effect=Exception('upstream down')) as get_feed:
+            self.assertEqual(self.refresher.refresh_due(now + 61), 1)
+            get_feed.assert_called_once_with(URL, revalidate=True)
+            state = self.refresher.tracked()[URL]
+            self.assertEqual(state.failures, 1)
+            self.assertGreaterEqual(state.next_refresh - time.monotonic(), 119)
+
+            self.refresher.refresh_due(time.monotonic() + 121)
+            state = self.refresher.tracked()[URL]
+            self.assertEqual(state.failures, 2)
+            self.assertGreaterEqual(state.next_refresh - time.monotonic(), 239)
+
+        with mock.patch.object(service, 'get_feed', return_value=make_entry()):
+            self.refresher.refresh_due(time.monotonic() + 241)
+        state = self.refresher.tracked()[URL]
+        self.assertEqual(state.failures, 0)
+        self.assertIsNone(state.last_error)
+
+    def test_idle_feeds_are_evicted(self):
+        self.refresher.track(URL)
+        self.assertEqual(self.refresher.due_feeds(time.monotonic() + 301), [])
+        self.assertNotIn(URL, self.refresher.tracked())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,214 @@
+import unittest
+from datetime import datetime, date, timedelta
+from unittest import mock
+
+from icalendar import Calendar
+
+import room_availability_service as service
+from room_availability_service import (
+    CompiledCalendarCache, ExpandedSeriesCache, FeedCacheEntry, compile_calendar, expand_series, get_events,
+    parse_events_with_recurrence, TIMEZONE
+)
+from service_testing import patch_service
+
+
+TIMELINE_ICS = b"""BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//Test Calendar//EN
+BEGIN:VEVENT
+UID:daily@example.com
+DTSTAMP:20241201T200000Z
+SUMMARY:Daily Standup
+DTSTART;TZID=America/Chicago:20241202T090000
+DTEND;TZID=America/Chicago:20241202T091500
+RRULE:FREQ=DAILY;COUNT=10
+EXDATE;TZID=America/Chicago:20241204T090000
+END:VEVENT
+BEGIN:VEVENT
+UID:daily@example.com
+DTSTAMP:20241201T200000Z
+RECURRENCE-ID;TZID=America/Chicago:20241205T090000
+SUMMARY:Moved Standup
+DTSTART;TZID=America/Chicago:20241205T100000
+DTEND;TZID=America/Chicago:20241205T101500
+END:VEVENT
+BEGIN:VEVENT
+UID:offsite@example.com
+DTSTAMP:20241201T200000Z
+SUMMARY:Offsite
+DTSTART;TZID=America/Chicago:20241203T080000
+DTEND;TZID=America/Chicago:20241205T170000
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def make_feed(content_hash='hash-1', body=TIMELINE_ICS, previous_hash=None):
+    cal = Calendar.from_ical(body)
+    return FeedCacheEntry(calendar=cal, size=len(body), fetched_at=0.0, content_hash=content_hash,
+                          previous_hash=previous_hash)
+
+
+# The offsite moves (new DTSTAMP / SEQUENCE), the standup is untouched and a review is added
+UPDATED_ICS = TIMELINE_ICS.replace(
+    b"""DTSTAMP:20241201T200000Z
+SUMMARY:Offsite
+DTSTART;TZID=America/Chicago:20241203T080000""",
+    b"""DTSTAMP:20241202T120000Z
+SEQUENCE:1
+SUMMARY:Offsite
+DTSTART;TZID=America/Chicago:20241203T100000""",
+).replace(b"END:VCALENDAR", b"""BEGIN:VEVENT
+UID:review@example.com
+DTSTAMP:20241202T120000Z
+SUMMARY:Review
+DTSTART;TZID=America/Chicago:20241206T140000
+DTEND;TZID=America/Chicago:20241206T150000
+END:VEVENT
+END:VCALENDAR""")
+
+
+# The 11 January standup is moved back to the afternoon of the 10th
+MOVED_EARLIER_ICS = b"""BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//Test Calendar//EN
+BEGIN:VEVENT
+UID:standup@example.com
+DTSTAMP:20241201T200000Z
+SUMMARY:Standup
+DTSTART;TZID=America/Chicago:20250101T090000
+DTEND;TZID=America/Chicago:20250101T091500
+RRULE:FREQ=DAILY
+END:VEVENT
+BEGIN:VEVENT
+UID:standup@example.com
+DTSTAMP:20241201T200000Z
+RECURRENCE-ID;TZID=America/Chicago:20250111T090000
+SUMMARY:Standup (moved)
+DTSTART;TZID=America/Chicago:20250110T150000
+DTEND;TZID=America/Chicago:20250110T151500
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def day_bounds(first, last):
+    return (TIMEZONE.localize(datetime.combine(first, datetime.min.time())),
+            TIMEZONE.localize(datetime.combine(last, datetime.max.time())))
+
+
+class CompiledTimelineTests(unittest.TestCase):
+    def setUp(self):
+        patch_service(
+            self,
+            COMPILED_CACHE=CompiledCalendarCache(8),
+            EXPANDED_SERIES=ExpandedSeriesCache(64),
+        )
+        self.now = TIMEZONE.localize(datetime(2024, 12, 2, 8, 0))
+
+    def test_slices_match_direct_expansion(self):
+        feed = make_feed()
+        for offset in range(8):
+            day = date(2024, 12, 2) + timedelta(days=offset)
+            expected = parse_events_with_recurrence(feed.calendar, self.now, start_date=day, end_date=day)
+            actual = get_events(feed, self.now, start_date=day, end_date=day)
+            self.assertEqual(
+                [(e['summary'], e['start'], e['end']) for e in actual],
+                [(e['summary'], e['start'], e['end']) for e in expected],
+                f"mismatch on {day}",
+            )
+
+    def test_expansion_runs_once_per_content(self):
+        feed = make_feed()
+        with mock.patch.object(service, 'expand_calendar', wraps=service.expand_calendar) as parse:
+            get_events(feed, self.now)
+            get_events(feed, self.now, start_date=date(2024, 12, 3), end_date=date(2024, 12, 9))
+            get_events(make_feed('hash-1'), self.now)
+            self.assertEqual(parse.call_count, 1)
+
+            get_events(make_feed('hash-2'), self.now)
+            self.assertEqual(parse.call_count, 2)
+
+    def test_update_only_expands_changed_uids(self):
+        get_events(make_feed('v1'), self.now)
+        expanded = service.SERIES_EXPANSIONS.value(result='expanded')
+        reused = service.SERIES_EXPANSIONS.value(result='reused')
+
+        updated = make_feed('v2', body=UPDATED_ICS, previous_hash='v1')
+        events = get_events(updated, self.now, start_date=date(2024, 12, 2), end_date=date(2024, 12, 8))
+
+        self.assertEqual(service.SERIES_EXPANSIONS.value(result='expanded'), expanded + 2)
+        self.assertEqual(service.SERIES_EXPANSIONS.value(result='reused'), reused + 1)
+        expected = parse_events_with_recurrence(
+            updated.calendar, self.now, start_date=date(2024, 12, 2), end_date=date(2024, 12, 8)
+        )
+        self.assertEqual(events, expected)
+        self.assertIn(('Offsite', TIMEZONE.localize(datetime(2024, 12, 3, 10, 0))),
+                      [(e['summary'], e['start']) for e in events])
+
+    def test_changed_override_re_expands_its_series(self):
+        previous = compile_calendar(make_feed().calendar, self.now, date(2024, 12, 2), date(2024, 12, 2))
+        cancelled = TIMELINE_ICS.replace(b"SUMMARY:Moved Standup", b"SEQUENCE:2\nSTATUS:CANCELLED\nSUMMARY:Moved Standup")
+        compiled = compile_calendar(Calendar.from_ical(cancelled), self.now, date(2024, 12, 2), date(2024, 12, 2),
+                                    previous=previous)
+
+        self.assertIs(compiled.series['offsite@example.com'], previous.series['offsite@example.com'])
+        self.assertIsNot(compiled.series['daily@example.com'], previous.series['daily@example.com'])
+        self.assertNotIn('Moved Standup', [e['summary'] for e in compiled.events])
+
+    def expansions(self):
+        return {result: service.SERIES_EXPANSIONS.value(result=result) for result in ('expanded', 'reused', 'extended')}
+
+    def test_next_day_extends_the_previous_expansion(self):
+        previous = compile_calendar(make_feed().calendar, self.now, date(2024, 12, 1), date(2024, 12, 1))
+        before = self.expansions()
+        compiled = compile_calendar(make_feed().calendar, self.now, date(2024, 12, 2), date(2024, 12, 2),
+                                    previous=previous)
+
+        # The standup has an override, so only the offsite is extended
+        after = self.expansions()
+        self.assertEqual((after['expanded'], after['extended']), (before['expanded'] + 1, before['extended'] + 1))
+        with mock.patch.object(service, 'EXPANDED_SERIES', ExpandedSeriesCache(64)):
+            expected = compile_calendar(make_feed().calendar, self.now, date(2024, 12, 2), date(2024, 12, 2))
+        self.assertEqual(compiled.events, expected.events)
+
+    def test_unchanged_uids_are_reused_without_the_previous_timeline(self):
+        get_events(make_feed('v1'), self.now)
+        before = self.expansions()
+        service.COMPILED_CACHE.clear()
+        get_events(make_feed('v2', body=UPDATED_ICS, previous_hash='v1'), self.now)
+
+        after = self.expansions()
+        self.assertEqual((after['expanded'], after['reused']), (before['expanded'] + 2, before['reused'] + 1))
+
+    def test_edit_without_a_new_dtstamp_re_expands_its_series(self):
+        previous = compile_calendar(make_feed().calendar, self.now, date(2024, 12, 2), date(2024, 12, 2))
+        edited = TIMELINE_ICS.replace(b"EXDATE;TZID=America/Chicago:20241204T090000",
+                                      b"EXDATE;TZID=America/Chicago:20241203T090000")
+        compiled = compile_calendar(Calendar.from_ical(edited), self.now, date(2024, 12, 2), date(2024, 12, 2),
+                                    previous=previous)
+
+        self.assertIsNot(compiled.series['daily@example.com'], previous.series['daily@example.com'])
+        starts = [e['start'] for e in compiled.events if e['summary'] == 'Daily Standup']
+        self.assertIn(TIMEZONE.localize(datetime(2024, 12, 4, 9, 0)), starts)
+        self.assertNotIn(TIMEZONE.localize(datetime(2024, 12, 3, 9, 0)), starts)
+
+    def test_extended_series_matches_a_fresh_expansion(self):
+        cal = Calendar.from_ical(MOVED_EARLIER_ICS)
+        previous = expand_series(cal, *day_bounds(date(2025, 1, 1), date(2025, 1, 10)))
+        extended = expand_series(cal, *day_bounds(date(2025, 1, 2), date(2025, 1, 12)), previous=previous)
+        with mock.patch.object(service, 'EXPANDED_SERIES', ExpandedSeriesCache(64)):
+            fresh = expand_series(cal, *day_bounds(date(2025, 1, 2), date(2025, 1, 12)))
+
+        uid = 'standup@example.com'
+        self.assertEqual(extended[uid].events, fresh[uid].events)
+        self.assertIn(('Standup (moved)', TIMEZONE.localize(datetime(2025, 1, 10, 15, 0))),
+                      [(e['summary'], e['start']) for e in extended[uid].events])
+
+    def test_long_event_overlapping_range_is_included(self):
+        events = get_events(make_feed(), self.now, start_date=date(2024, 12, 4), end_date=date(2024, 12, 4))
+        self.assertEqual([e['summary'] for e in events], ['Offsite'])
+
+
+if __name__ == "__main__":
+    unittest.main()
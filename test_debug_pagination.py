@@ -0,0 +1,144 @@
+import itertools
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import room_availability_service as service
+from benchmarks.ics_generator import generate_calendar
+from room_availability_service import (
+    Calendar, CompiledCalendarCache, FeedCache, TIMEZONE, app, expand_calendar, iter_occurrences,
+)
+from service_testing import make_response, patch_service
+
+
+URL = 'https://calendar.example.com/room.ics'
+
+# Two series starting at the same time every day, plus one occurrence moved a day earlier
+TIED_ICS = b"""BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//Test Calendar//EN
+BEGIN:VEVENT
+UID:standup@example.com
+DTSTAMP:20240101T000000Z
+SUMMARY:Standup
+DTSTART;TZID=America/Chicago:20240101T090000
+DTEND;TZID=America/Chicago:20240101T091500
+RRULE:FREQ=DAILY
+END:VEVENT
+BEGIN:VEVENT
+UID:sync@example.com
+DTSTAMP:20240101T000000Z
+SUMMARY:Sync
+DTSTART;TZID=America/Chicago:20240101T090000
+DTEND;TZID=America/Chicago:20240101T100000
+RRULE:FREQ=DAILY
+END:VEVENT
+BEGIN:VEVENT
+UID:review@example.com
+DTSTAMP:20240101T000000Z
+SUMMARY:Review
+DTSTART;TZID=America/Chicago:20240101T140000
+DTEND;TZID=America/Chicago:20240101T150000
+RRULE:FREQ=DAILY
+END:VEVENT
+BEGIN:VEVENT
+UID:review@example.com
+DTSTAMP:20240101T000000Z
+RECURRENCE-ID;TZID=America/Chicago:20240110T140000
+SUMMARY:Review (moved)
+DTSTART;TZID=America/Chicago:20240109T080000
+DTEND;TZID=America/Chicago:20240109T083000
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def day_range(start_date, days):
+    return (TIMEZONE.localize(datetime.combine(start_date, datetime.min.time())),
+            TIMEZONE.localize(datetime.combine(start_date + timedelta(days=days - 1), datetime.max.time())))
+
+
+class IterOccurrencesTests(unittest.TestCase):
+    def test_lazy_expansion_matches_compiled_expansion(self):
+        today = datetime.now(TIMEZONE).date()
+        cal = Calendar.from_ical(generate_calendar(one_off=200, daily=6, weekly=20, overrides=15, cancellations=5,
+                                                   today=today))
+        range_start, range_end = day_range(today, 21)
+        lazy = list(iter_occurrences(cal, range_start, range_end))
+        compiled = expand_calendar(cal, range_start, today, range_end.date())[0]
+
+        self.assertEqual([event['start'] for event in lazy], sorted(event['start'] for event in lazy))
+        self.assertEqual(sorted(map(repr, lazy)), sorted(map(repr, compiled)))
+
+    def test_override_moved_before_an_earlier_occurrence_stays_in_order(self):
+        cal = Calendar.from_ical(TIED_ICS)
+        range_start, range_end = day_range(datetime(2024, 1, 8).date(), 4)
+        summaries = [(event['start'].day, event['summary']) for event in iter_occurrences(cal, range_start, range_end)
+                     if event['summary'].startswith('Review')]
+        self.assertEqual(summaries, [(8, 'Review'), (9, 'Review (moved)'), (9, 'Review'), (11, 'Review')])
+
+    def test_unbounded_series_are_only_expanded_as_far_as_consumed(self):
+        cal = Calendar.from_ical(TIED_ICS)
+        range_start, range_end = day_range(datetime(2024, 1, 1).date(), 365 * 200)
+        first = list(itertools.islice(iter_occurrences(cal, range_start, range_end), 4))
+        self.assertEqual([event['summary'] for event in first], ['Standup', 'Sync', 'Review', 'Standup'])
+
+
+class DebugPaginationTests(unittest.TestCase):
+    def setUp(self):
+        patch_service(
+            self,
+            FEED_CACHE=FeedCache(ttl=60, max_entries=10, max_bytes=1024 * 1024),
+            COMPILED_CACHE=CompiledCalendarCache(8),
+            _http_get=mock.Mock(side_effect=lambda *a, **k: make_response(TIED_ICS)),
+        )
+        self.client = app.test_client()
+
+    def pages(self, query):
+        cursor = None
+        while True:
+            payload = self.client.get(f'/debug?ics_url={URL}&{query}' + (f'&cursor={cursor}' if cursor else '')).get_json()
+            yield payload
+            cursor = payload['next_cursor']
+            if cursor is None:
+                return
+
+    def test_pages_cover_the_range_once_in_order(self):
+        pages = list(self.pages('days=10&limit=4'))
+        events = [(event['start_iso'], event['summary']) for page in pages for event in page['events']]
+
+        self.assertEqual(len(events), 30)
+        self.assertEqual(len(set(events)), 30)
+        self.assertEqual(events, sorted(events, key=lambda event: event[0]))
+        self.assertEqual(len(pages), 8)
+
+    def test_compiled_timeline_is_sliced_when_it_covers_the_range(self):
+        service.get_events(service.get_feed(URL), datetime.now(TIMEZONE))
+        with mock.patch.object(service, 'iter_occurrences') as lazy:
+            payload = self.client.get(f'/debug?ics_url={URL}&days=3&limit=5').get_json()
+        lazy.assert_not_called()
+        self.assertEqual(len(payload['events']), 5)
+
+    def test_default_page_does_not_compile_the_feed(self):
+        with mock.patch.object(service, 'compile_calendar') as compile_calendar:
+            payload = self.client.get(f'/debug?ics_url={URL}&days=366').get_json()
+        compile_calendar.assert_not_called()
+        self.assertEqual(len(payload['events']), 20)
+        self.assertIsNotNone(payload['next_cursor'])
+
+    def test_ndjson_streams_every_event(self):
+        response = self.client.get(f'/debug?ics_url={URL}&days=5&format=ndjson')
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual(len(lines), 15)
+        paged = [event for page in self.pages('days=5&limit=7') for event in page['events']]
+        self.assertEqual([line['start_iso'] for line in lines], [event['start_iso'] for event in paged])
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.client.get(f'/debug?ics_url={URL}&cursor=soon').status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import room_availability_service as service
+from room_availability_service import app, FeedCache, CompiledCalendarCache
+from service_testing import make_response, patch_service
+
+
+SIMPLE_ICS = b"""BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//Test Calendar//EN
+BEGIN:VEVENT
+UID:diag@example.com
+DTSTAMP:20241201T200000Z
+SUMMARY:Daily
+DTSTART;TZID=America/Chicago:20240101T090000
+DTEND;TZID=America/Chicago:20240101T100000
+RRULE:FREQ=DAILY
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+class DiagnosticsTests(unittest.TestCase):
+    def setUp(self):
+        patch_service(
+            self,
+            FEED_CACHE=FeedCache(ttl=60, max_entries=10, max_bytes=1024 * 1024),
+            COMPILED_CACHE=CompiledCalendarCache(8),
+            BACKGROUND_REFRESH=False,
+            _http_get=mock.Mock(side_effect=lambda *a, **k: make_response(SIMPLE_ICS)),
+        )
+        self.client = app.test_client()
+
+    def test_server_timing_reports_request_stages(self):
+        with mock.patch.object(service, 'SERVER_TIMING', True):
+            response = self.client.get('/room-status?ics_url=https://example.com/room.ics')
+
+        stages = [part.split(';')[0] for part in response.headers['Server-Timing'].split(', ')]
+        for stage in ('upstream_ttfb', 'download', 'parse', 'expand', 'status', 'serialize', 'total'):
+            self.assertIn(stage, stages)
+
+    def test_server_timing_is_off_by_default(self):
+        with mock.patch.object(service, 'SERVER_TIMING', False):
+            response = self.client.get('/room-status?ics_url=https://example.com/room.ics')
+        self.assertNotIn('Server-Timing', response.headers)
+
+    def test_profile_mode_returns_and_stores_hot_functions(self):
+        with tempfile.TemporaryDirectory() as profile_dir, \
+                mock.patch.object(service, 'PROFILING_ENABLED', True), \
+                mock.patch.object(service, 'PROFILE_DIR', profile_dir):
+            response = self.client.get('/debug?ics_url=https://example.com/room.ics&profile=1')
+            profile = response.get_json()['profile']
+
+            self.assertTrue(profile['top_functions'])
+            self.assertTrue(profile['stored_at'].startswith(profile_dir))
+        self.assertIn('no-store', response.headers['Cache-Control'])
+
+    def test_streamed_response_is_profiled_until_its_body_is_sent(self):
+        with tempfile.TemporaryDirectory() as profile_dir, \
+                mock.patch.object(service, 'PROFILING_ENABLED', True), \
+                mock.patch.object(service, 'PROFILE_DIR', profile_dir), \
+                mock.patch.object(service, 'SERVER_TIMING', True):
+            response = self.client.get('/debug?ics_url=https://example.com/room.ics&days=3&format=ndjson&profile=1')
+            lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+            self.assertEqual([line['summary'] for line in lines[:-1]], ['Daily'] * 3)
+            profile = lines[-1]['profile']
+            functions = [entry['function'] for entry in profile['top_functions']]
+            self.assertTrue(any('iter_debug_events' in function for function in functions))
+            self.assertTrue(profile['stored_at'].startswith(profile_dir))
+            self.assertTrue(os.path.exists(profile['stored_at']))
+            self.assertIn('headers;dur=', response.headers['Server-Timing'])
+            # The profiler was released, so the next request is profiled too
+            again = self.client.get('/debug?ics_url=https://example.com/room.ics&profile=1')
+            self.assertIn('profile', again.get_json())
+
+    def test_profile_parameter_is_ignored_unless_enabled(self):
+        with mock.patch.object(service, 'PROFILING_ENABLED', False):
+            response = self.client.get('/room-status?ics_url=https://example.com/room.ics&profile=1')
+        self.assertNotIn('profile', response.get_json())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from room_availability_service import EventIndex, EventStore, determine_room_status, TIMEZONE
+
+
+def make_event(summary, start, minutes):
+    return {'summary': summary, 'start': start, 'end': start + timedelta(minutes=minutes), 'organizer': ''}
+
+
+def linear_current(events, now):
+    for event in events:
+        if event['start'] - timedelta(minutes=1) <= now < event['end']:
+            return event
+    return None
+
+
+def linear_next(events, now):
+    for event in events:
+        if event['start'] > now:
+            return event
+    return None
+
+
+class EventIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.day = TIMEZONE.localize(datetime(2024, 12, 2, 0, 0))
+        rng = random.Random(42)
+        events = []
+        for i in range(200):
+            start = self.day + timedelta(minutes=rng.randrange(0, 24 * 60, 5))
+            events.append(make_event(f'Meeting {i}', start, rng.choice([15, 30, 60, 240])))
+        events.sort(key=lambda e: e['start'])
+        self.events = events
+        self.index = EventIndex(events)
+
+    def test_lookups_match_linear_scan(self):
+        for minute in range(0, 24 * 60, 7):
+            now = self.day + timedelta(minutes=minute, seconds=30)
+            self.assertIs(self.index.current(now), linear_current(self.events, now))
+            self.assertIs(self.index.next_after(now), linear_next(self.events, now))
+
+    def test_window_matches_overlap_filter(self):
+        range_start = self.day + timedelta(hours=9)
+        range_end = self.day + timedelta(hours=12)
+        expected = [e for e in self.events if e['start'] <= range_end and e['end'] >= range_start]
+        window = self.index.window(range_start, range_end)
+        self.assertEqual(list(window), expected)
+
+        now = self.day + timedelta(hours=10)
+        in_range = [e for e in self.events if e['start'] <= range_end and e['end'] >= range_start]
+        self.assertIs(window.current(now), linear_current(in_range, now))
+        self.assertIs(window.next_after(now), linear_next(in_range, now))
+
+    def test_next_transition(self):
+        events = [
+            make_event('Standup', self.day + timedelta(hours=9), 15),
+            make_event('Review', self.day + timedelta(hours=11), 60),
+        ]
+        index = EventIndex(events)
+
+        self.assertEqual(index.next_transition(self.day + timedelta(hours=8)),
+                         self.day + timedelta(hours=8, minutes=59))
+        self.assertEqual(index.next_transition(self.day + timedelta(hours=9, minutes=5)),
+                         self.day + timedelta(hours=9, minutes=15))
+        self.assertEqual(index.next_transition(self.day + timedelta(hours=11, minutes=30)),
+                         self.day + timedelta(hours=12))
+        self.assertIsNone(index.next_transition(self.day + timedelta(hours=13)))
+
+    def test_determine_room_status_accepts_index_or_list(self):
+        now = self.day + timedelta(hours=10, minutes=3)
+        self.assertEqual(determine_room_status(self.index, now), determine_room_status(self.events, now))
+
+
+class EventStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.day = TIMEZONE.localize(datetime(2024, 12, 2, 0, 0))
+
+    def test_round_trips_events_and_shares_labels(self):
+        events = [make_event('Standup', self.day + timedelta(days=i, hours=9), 15) for i in range(5)]
+        events.append({**make_event('All day', self.day, 0), 'end': self.day.replace(hour=23, minute=59, second=59,
+                                                                                   microsecond=999999)})
+        store = EventStore.from_events(events)
+
+        self.assertEqual(list(store), events)
+        self.assertEqual(len(store.labels), 2)
+        self.assertEqual(store[5]['end'].microsecond, 999999)
+
+    def test_merge_sorts_by_start_keeping_ties_in_order(self):
+        first = EventStore.from_events([make_event('A', self.day + timedelta(hours=h), 30) for h in (9, 11)])
+        second = EventStore.from_events([make_event('B', self.day + timedelta(hours=h), 30) for h in (8, 9)])
+        merged = EventStore.merge([first, second])
+        self.assertEqual([(e['start'].hour, e['summary']) for e in merged], [(8, 'B'), (9, 'A'), (9, 'B'), (11, 'A')])
+
+    def test_index_over_store_matches_index_over_dicts(self):
+        rng = random.Random(7)
+        events = sorted((make_event(f'Meeting {i % 4}', self.day + timedelta(minutes=rng.randrange(0, 24 * 60, 5)),
+                                    rng.choice([15, 30, 240])) for i in range(100)), key=lambda e: e['start'])
+        by_dicts = EventIndex(events)
+        by_store = EventIndex(EventStore.from_events(events))
+        for minute in range(0, 24 * 60, 11):
+            now = self.day + timedelta(minutes=minute)
+            self.assertEqual(by_store.current(now), by_dicts.current(now))
+            self.assertEqual(by_store.next_after(now), by_dicts.next_after(now))
+            self.assertEqual(by_store.next_transition(now), by_dicts.next_transition(now))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+from datetime import date, datetime
+from unittest import mock
+
+from icalendar import Calendar
+
+import room_availability_service as service
+from room_availability_service import (
+    CompiledCalendarCache, FeedCache, SeriesFailureCache, TIMEZONE, app, compile_calendar, iter_occurrences,
+)
+from service_testing import make_response, patch_service
+
+
+URL = 'https://calendar.example.com/room.ics'
+
+HEADER = b"""BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//Test Calendar//EN
+BEGIN:VEVENT
+UID:daily@example.com
+DTSTAMP:20240101T000000Z
+SUMMARY:Daily Standup
+DTSTART;TZID=America/Chicago:20240101T090000
+DTEND;TZID=America/Chicago:20240101T091500
+RRULE:FREQ=DAILY
+END:VEVENT
+BEGIN:VEVENT
+UID:offsite@example.com
+DTSTAMP:20240101T000000Z
+SUMMARY:Offsite
+DTSTART;TZID=America/Chicago:20241202T130000
+DTEND;TZID=America/Chicago:20241202T150000
+END:VEVENT
+"""
+
+# RDATE periods are not supported by the expansion, so this series cannot be expanded at all
+BROKEN_SERIES_ICS = HEADER + b"""BEGIN:VEVENT
+UID:broken@example.com
+DTSTAMP:20240101T000000Z
+SUMMARY:Broken
+DTSTART;TZID=America/Chicago:20240101T110000
+DTEND;TZID=America/Chicago:20240101T120000
+RRULE:FREQ=DAILY
+RDATE;VALUE=PERIOD:20241203T090000Z/PT1H
+END:VEVENT
+END:VCALENDAR
+"""
+
+# The override of the 2 December review has no DTSTART, so only that override is dropped
+BROKEN_OVERRIDE_ICS = HEADER + b"""BEGIN:VEVENT
+UID:review@example.com
+DTSTAMP:20240101T000000Z
+SUMMARY:Review
+DTSTART;TZID=America/Chicago:20240101T160000
+DTEND;TZID=America/Chicago:20240101T170000
+RRULE:FREQ=DAILY
+END:VEVENT
+BEGIN:VEVENT
+UID:review@example.com
+DTSTAMP:20240101T000000Z
+RECURRENCE-ID;TZID=America/Chicago:20241202T160000
+SUMMARY:Review (moved)
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+class FaultIsolationTests(unittest.TestCase):
+    def setUp(self):
+        self.now = TIMEZONE.localize(datetime(2024, 12, 2, 8, 0))
+        patch_service(self, FAILED_SERIES=SeriesFailureCache(16))
+
+    def summaries(self, compiled, day=date(2024, 12, 2)):
+        return [event['summary'] for event in compiled.events_between(day, day)]
+
+    def test_broken_series_is_skipped_on_its_own(self):
+        with self.assertLogs(app.logger, 'WARNING'):
+            compiled = compile_calendar(Calendar.from_ical(BROKEN_SERIES_ICS), self.now, date(2024, 12, 2),
+                                        date(2024, 12, 2), content_hash='v1')
+
+        self.assertEqual(self.summaries(compiled), ['Daily Standup', 'Offsite'])
+        self.assertEqual(compiled.skipped_components, 1)
+        self.assertEqual(compiled.series['broken@example.com'].error, 'Unsupported date value')
+
+    def test_broken_override_degrades_only_that_override(self):
+        with self.assertLogs(app.logger, 'WARNING'):
+            compiled = compile_calendar(Calendar.from_ical(BROKEN_OVERRIDE_ICS), self.now, date(2024, 12, 2),
+                                        date(2024, 12, 3), content_hash='v1')
+
+        self.assertEqual(self.summaries(compiled), ['Daily Standup', 'Offsite', 'Review'])
+        self.assertEqual(self.summaries(compiled, date(2024, 12, 3)), ['Daily Standup', 'Review'])
+        self.assertEqual(compiled.skipped_components, 1)
+
+    def test_failure_is_not_retried_for_the_same_feed_version(self):
+        cal = Calendar.from_ical(BROKEN_SERIES_ICS)
+        with self.assertLogs(app.logger, 'WARNING'):
+            compile_calendar(cal, self.now, date(2024, 12, 2), date(2024, 12, 2), content_hash='v1')
+
+        with mock.patch.object(service, '_iter_series', wraps=service._iter_series) as iter_series:
+            compiled = compile_calendar(cal, self.now, date(2024, 12, 3), date(2024, 12, 3), content_hash='v1')
+            lazy = list(iter_occurrences(cal, *[TIMEZONE.localize(datetime(2024, 12, 3, h)) for h in (0, 23)], 'v1'))
+        expanded = {str(call.args[0][0].get('UID')) for call in iter_series.call_args_list}
+        self.assertEqual(expanded, {'daily@example.com', 'offsite@example.com'})
+        self.assertEqual(compiled.skipped_components, 1)
+        self.assertEqual([event['summary'] for event in lazy], ['Daily Standup'])
+
+        with self.assertLogs(app.logger, 'WARNING'):
+            compile_calendar(cal, self.now, date(2024, 12, 3), date(2024, 12, 3), content_hash='v2')
+
+    def test_debug_reports_skipped_components(self):
+        patch_service(
+            self,
+            FEED_CACHE=FeedCache(ttl=60, max_entries=10, max_bytes=1024 * 1024),
+            COMPILED_CACHE=CompiledCalendarCache(8),
+        )
+        with mock.patch.object(service, '_http_get', side_effect=lambda *a, **k: make_response(BROKEN_SERIES_ICS)):
+            service.get_events(service.get_feed(URL), datetime.now(TIMEZONE))
+            payload = app.test_client().get(f'/debug?ics_url={URL}').get_json()
+
+        self.assertEqual(payload['skipped_components'], 1)
+        self.assertEqual(payload['failed_events'][0]['uid'], 'broken@example.com')
+        self.assertFalse(payload['failed_events'][0]['degraded'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from unittest import mock
+
+import room_availability_service as service
+from room_availability_service import FeedCache, fetch_ics_feed
+from service_testing import make_response, patch_service
+
+
+SIMPLE_ICS = b"""BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//Test Calendar//EN
+BEGIN:VEVENT
+UID:cache-event@example.com
+DTSTAMP:20241201T200000Z
+SUMMARY:Cached Event
+DTSTART;TZID=America/Chicago:20241201T141500
+DTEND;TZID=America/Chicago:20241201T151500
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+class FeedCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = FeedCache(ttl=60, max_entries=10, max_bytes=10 * 1024 * 1024)
+        patch_service(self, FEED_CACHE=self.cache)
+
+    def test_fresh_entry_skips_upstream(self):
+        with mock.patch.object(service, '_http_get', return_value=make_response(SIMPLE_ICS)) as http_get:
+            first = fetch_ics_feed('https://example.com/room.ics')
+            second = fetch_ics_feed('https://example.com/room.ics')
+
+        self.assertIs(first, second)
+        self.assertEqual(http_get.call_count, 1)
+
+    def test_not_modified_reuses_parsed_calendar(self):
+        url = 'https://example.com/room.ics'
+        validators = {'ETag': '"v1"', 'Last-Modified': 'Sun, 01 Dec 2024 20:00:00 GMT'}
+        with mock.patch.object(service, '_http_get', return_value=make_response(SIMPLE_ICS, headers=validators)):
+            first = fetch_ics_feed(url)
+
+        self.cache.ttl = 0
+        with mock.patch.object(service, '_http_get', return_value=make_response(b'', 304)) as http_get, \
+                mock.patch.object(service.Calendar, 'from_ical') as from_ical:
+            second = fetch_ics_feed(url)
+
+        self.assertIs(first, second)
+        from_ical.assert_not_called()
+        headers = http_get.call_args.kwargs['headers']
+        self.assertEqual(headers['If-None-Match'], '"v1"')
+        self.assertEqual(headers['If-Modified-Since'], 'Sun, 01 Dec 2024 20:00:00 GMT')
+
+    def test_unchanged_body_without_validators_is_not_parsed_again(self):
+        url = 'https://example.com/room.ics'
+        with mock.patch.object(service, '_http_get', return_value=make_response(SIMPLE_ICS)):
+            first = fetch_ics_feed(url)
+
+        self.cache.ttl = 0
+        refetched = make_response(SIMPLE_ICS, headers={'ETag': '"v2"'})
+        with mock.patch.object(service, '_http_get', return_value=refetched), \
+                mock.patch.object(service.Calendar, 'from_ical') as from_ical:
+            second = fetch_ics_feed(url)
+
+        self.assertIs(first, second)
+        from_ical.assert_not_called()
+        self.assertEqual(self.cache.get(url).etag, '"v2"')
+        self.assertIsNone(self.cache.get(url).previous_hash)
+
+    def test_lru_eviction_respects_byte_budget(self):
+        with mock.patch.object(service, '_http_get', side_effect=lambda *a, **kw: make_response(SIMPLE_ICS)):
+            fetch_ics_feed('https://example.com/a.ics')
+            self.cache.max_bytes = self.cache.get('https://example.com/a.ics').size * 2
+            fetch_ics_feed('https://example.com/b.ics')
+            fetch_ics_feed('https://example.com/a.ics')  # a becomes most recently used
+            fetch_ics_feed('https://example.com/c.ics')
+
+        self.assertIsNotNone(self.cache.get('https://example.com/a.ics'))
+        self.assertIsNone(self.cache.get('https://example.com/b.ics'))
+        self.assertIsNotNone(self.cache.get('https://example.com/c.ics'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import room_availability_service as service
+from room_availability_service import OccupancyBitmap, TIMEZONE, app, rank_free_rooms
+
+
+START = TIMEZONE.localize(datetime(2024, 12, 2, 9, 0))
+
+
+def booking(start_minute, end_minute):
+    return {'start': START + timedelta(minutes=start_minute), 'end': START + timedelta(minutes=end_minute)}
+
+
+def room(name, *bookings, minutes=480):
+    return {'room_name': name, 'ics_url': f'https://example.com/{name}.ics',
+            'occupancy': OccupancyBitmap(START, minutes, bookings)}
+
+
+class OccupancyBitmapTests(unittest.TestCase):
+    def test_partial_minutes_count_as_booked(self):
+        occupancy = OccupancyBitmap(START, 60, [
+            {'start': START + timedelta(minutes=10, seconds=30), 'end': START + timedelta(minutes=20, seconds=1)},
+        ])
+        self.assertEqual(occupancy.bits, ((1 << 11) - 1) << 10)
+
+    def test_bookings_outside_the_window_are_clipped(self):
+        occupancy = OccupancyBitmap(START, 60, [booking(-30, 5), booking(55, 120)])
+        self.assertEqual(occupancy.free_run(), 0)
+        self.assertEqual(occupancy.free_run(5), 50)
+        self.assertEqual(occupancy.bits >> 60, 0)
+
+    def test_earliest_free_matches_a_minute_scan(self):
+        occupancy = OccupancyBitmap(START, 300, [booking(0, 20), booking(40, 95), booking(110, 130), booking(200, 260)])
+        for duration in (1, 15, 20, 30, 45, 70, 100):
+            expected = next(
+                (m for m in range(300 - duration + 1)
+                 if not any(occupancy.bits >> minute & 1 for minute in range(m, m + duration))),
+                None,
+            )
+            self.assertEqual(occupancy.earliest_free(duration), expected, duration)
+
+    def test_no_slot_when_duration_does_not_fit(self):
+        occupancy = OccupancyBitmap(START, 60, [booking(10, 45)])
+        self.assertIsNone(occupancy.earliest_free(20))
+        self.assertEqual(occupancy.earliest_free(15), 45)
+        self.assertEqual(occupancy.earliest_free(5, offset=8), 45)
+        self.assertIsNone(occupancy.earliest_free(61))
+
+
+class RankFreeRoomsTests(unittest.TestCase):
+    def test_rooms_are_ranked(self):
+        ranked = rank_free_rooms([
+            room('short', booking(50, 60)),
+            room('long', booking(200, 260)),
+            room('busy', booking(0, 30)),
+            room('full', booking(0, 480)),
+        ], duration=45)
+
+        self.assertEqual([r['room_name'] for r in ranked['available_now']], ['long', 'short'])
+        self.assertEqual(ranked['available_now'][0]['free_minutes'], 200)
+        self.assertEqual([r['room_name'] for r in ranked['earliest_slots']], ['long', 'short', 'busy'])
+        self.assertEqual(ranked['earliest_slots'][2]['start'], (START + timedelta(minutes=30)).isoformat())
+
+
+class FreeRoomsEndpointTests(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_endpoint_returns_ranked_rooms_and_errors(self):
+        def fake_occupancy(ics_url, room_name, now, window_end):
+            if ics_url == 'down':
+                raise Exception('Failed to fetch ICS feed: refused')
+            start = now.replace(second=0, microsecond=0)
+            minutes = int((window_end - start).total_seconds() // 60)
+            busy = [] if ics_url == 'a' else [{'start': start, 'end': start + timedelta(minutes=90)}]
+            return {'room_name': room_name, 'ics_url': ics_url, 'occupancy': OccupancyBitmap(start, minutes, busy)}
+
+        with mock.patch.object(service, 'build_room_occupancy', side_effect=fake_occupancy):
+            response = self.client.get('/free-rooms?ics_url=a,b,down&room_name=A&room_name=B&duration=15&days=2')
+        payload = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['room_name'] for r in payload['available_now']], ['A'])
+        self.assertEqual([r['room_name'] for r in payload['earliest_slots']], ['A', 'B'])
+        self.assertEqual(payload['errors'][0]['ics_url'], 'down')
+        self.assertTrue(response.cache_control.no_cache)
+
+    def test_invalid_duration_is_rejected(self):
+        self.assertEqual(self.client.get('/free-rooms?ics_url=a&duration=soon').status_code, 400)
+        self.assertEqual(self.client.get('/free-rooms?ics_url=a&duration=0').status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import room_availability_service as service
+from room_availability_service import app, TIMEZONE, _seconds_until_stale
+
+
+def fake_room_status(next_change_in=None):
+    def _build(ics_url, room_name, now):
+        next_change = now + timedelta(seconds=next_change_in) if next_change_in is not None else None
+        return {
+            'room_name': room_name,
+            'ics_url': ics_url,
+            'status': 'AVAILABLE',
+            'next_status_change': next_change.isoformat() if next_change else None,
+            'last_updated': now.isoformat(),
+            'data_age_seconds': 3,
+        }
+    return _build
+
+
+class HttpCachingTests(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_etag_ignores_volatile_fields_and_answers_304(self):
+        with mock.patch.object(service, 'build_room_status_response', side_effect=fake_room_status(None)):
+            first = self.client.get('/room-status?ics_url=a')
+            second = self.client.get('/room-status?ics_url=a', headers={'If-None-Match': first.headers['ETag']})
+            other_room = self.client.get('/room-status?ics_url=a&room_name=Other',
+                                         headers={'If-None-Match': first.headers['ETag']})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertFalse(first.headers['ETag'].startswith('W/'))
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b'')
+        self.assertEqual(second.headers['ETag'], first.headers['ETag'])
+        self.assertEqual(other_room.status_code, 200)
+
+    def test_max_age_stops_at_next_transition(self):
+        with mock.patch.object(service, 'build_room_status_response', side_effect=fake_room_status(5)):
+            response = self.client.get('/room-status?ics_url=a')
+        self.assertLessEqual(response.cache_control.max_age, 5)
+
+    def test_multi_room_errors_are_not_cached(self):
+        results = ([fake_room_status(None)('a', 'A', datetime.now(TIMEZONE))], [{'ics_url': 'b', 'error': 'down'}])
+        with mock.patch.object(service, 'build_room_status_responses', return_value=results):
+            response = self.client.get('/multi-room-status?ics_url=a&ics_url=b')
+        self.assertTrue(response.cache_control.no_cache)
+        self.assertIn('ETag', response.headers)
+
+    def test_seconds_until_stale_uses_minute_rollover(self):
+        now = TIMEZONE.localize(datetime(2024, 12, 2, 9, 0, 45))
+        self.assertEqual(_seconds_until_stale([], now), 15)
+        rooms = [{'next_status_change': (now + timedelta(seconds=4)).isoformat()}, {'next_status_change': None}]
+        self.assertEqual(_seconds_until_stale(rooms, now), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+import room_availability_service as service
+from room_availability_service import CircuitOpenError, FeedHttpClient, HostCircuitBreaker, FeedCache, get_feed
+from service_testing import patch_service
+
+
+URL = 'https://calendar.example.com/room.ics'
+
+
+class HttpClientTests(unittest.TestCase):
+    def setUp(self):
+        self.client = FeedHttpClient(
+            trust_env=False, max_per_host=2, pool_hosts=4, breaker=HostCircuitBreaker(threshold=3, cooldown=0.2)
+        )
+        patch_service(
+            self,
+            HTTP_CLIENT=self.client,
+            FEED_CACHE=FeedCache(ttl=60, max_entries=10, max_bytes=1024 * 1024),
+        )
+
+    def test_session_is_shared_and_respects_trust_env(self):
+        self.assertIs(self.client.session, self.client.session)
+        self.assertFalse(self.client.session.trust_env)
+        adapter = self.client.session.get_adapter(URL)
+        self.assertEqual(adapter._pool_maxsize, 2)
+
+    def test_circuit_opens_after_consecutive_failures_and_recovers(self):
+        with mock.patch.object(service, '_http_get', side_effect=requests.ConnectionError('refused')) as http_get:
+            for _ in range(3):
+                with self.assertRaises(Exception):
+                    get_feed(URL)
+            self.assertEqual(http_get.call_count, 3)
+
+            with self.assertRaises(Exception) as raised:
+                get_feed(URL)
+            self.assertIn('Circuit open', str(raised.exception))
+            self.assertEqual(http_get.call_count, 3)
+
+        time.sleep(0.25)
+        self.client.breaker.before_request('calendar.example.com')  # half-open trial
+        with self.assertRaises(CircuitOpenError):
+            self.client.breaker.before_request('calendar.example.com')
+        self.client.breaker.record_success('calendar.example.com')
+        self.assertFalse(self.client.breaker.is_open('calendar.example.com'))
+
+    def test_client_errors_do_not_trip_the_breaker(self):
+        response = mock.Mock(status_code=404)
+        response.raise_for_status.side_effect = requests.HTTPError('not found', response=response)
+        with mock.patch.object(service, '_http_get', return_value=response):
+            for _ in range(5):
+                with self.assertRaises(Exception):
+                    get_feed(URL)
+        self.assertFalse(self.client.breaker.is_open('calendar.example.com'))
+
+    def test_concurrent_requests_are_capped_per_host(self):
+        lock = threading.Lock()
+        active = {'now': 0, 'max': 0}
+
+        def hold_slot():
+            with self.client.request_slot(URL, timeout=5):
+                with lock:
+                    active['now'] += 1
+                    active['max'] = max(active['max'], active['now'])
+                time.sleep(0.05)
+                with lock:
+                    active['now'] -= 1
+
+        threads = [threading.Thread(target=hold_slot) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(active['max'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
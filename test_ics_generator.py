@@ -0,0 +1,30 @@
+import unittest
+from datetime import datetime, date, timedelta
+
+from icalendar import Calendar
+
+from benchmarks.ics_generator import generate_calendar
+from room_availability_service import parse_events_with_recurrence, TIMEZONE
+
+
+class IcsGeneratorTests(unittest.TestCase):
+    def test_generated_calendar_parses_and_expands(self):
+        today = date(2024, 12, 2)
+        body = generate_calendar(one_off=100, daily=8, weekly=12, overrides=5, cancellations=3, today=today)
+        self.assertEqual(body, generate_calendar(one_off=100, daily=8, weekly=12, overrides=5, cancellations=3,
+                                                 today=today))
+
+        cal = Calendar.from_ical(body)
+        components = cal.walk('VEVENT')
+        self.assertEqual(len(components), 100 + 8 + 12 + 5 + 3)
+        self.assertTrue(any(c.get('RECURRENCE-ID') and str(c.get('STATUS')) == 'CANCELLED' for c in components))
+        self.assertTrue(any('UNTIL' in c.get('RRULE', {}) for c in components))
+
+        now = TIMEZONE.localize(datetime(2024, 12, 2, 10, 0))
+        events = parse_events_with_recurrence(cal, now, start_date=today, end_date=today + timedelta(days=6))
+        self.assertTrue(events)
+        self.assertEqual(events, sorted(events, key=lambda e: e['start']))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from datetime import datetime, date
+
+from icalendar import Calendar
+
+from room_availability_service import IcsStreamPruner, parse_events_with_recurrence, TIMEZONE
+
+
+MIXED_ICS = b"""BEGIN:VCALENDAR\r
+VERSION:2.0\r
+PRODID:-//Test Calendar//EN\r
+BEGIN:VTIMEZONE\r
+TZID:America/Chicago\r
+BEGIN:STANDARD\r
+DTSTART:19701101T020000\r
+TZOFFSETFROM:-0500\r
+TZOFFSETTO:-0600\r
+END:STANDARD\r
+END:VTIMEZONE\r
+BEGIN:VEVENT\r
+UID:old-one-off@example.com\r
+DTSTAMP:20230101T000000Z\r
+SUMMARY:Old Meeting\r
+DTSTART;TZID=America/Chicago:20230105T090000\r
+DTEND;TZID=America/Chicago:20230105T100000\r
+BEGIN:VALARM\r
+TRIGGER:-PT15M\r
+ACTION:DISPLAY\r
+END:VALARM\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:finished-series@example.com\r
+DTSTAMP:20230101T000000Z\r
+SUMMARY:Finished Series\r
+DTSTART;TZID=America/Chicago:20230105T090000\r
+DTEND;TZID=America/Chicago:20230105T100000\r
+RRULE:FREQ=WEEKLY;UNTIL=20230301T150000Z\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:active-series@example.com\r
+DTSTAMP:20230101T000000Z\r
+SUMMARY:Weekly Sync with a summary long enough that the exporter fold\r
+ ed it onto a second line\r
+DTSTART;TZID=America/Chicago:20230102T130000\r
+DTEND;TZID=America/Chicago:20230102T140000\r
+RRULE:FREQ=WEEKLY;BYDAY=MO\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:active-series@example.com\r
+DTSTAMP:20230101T000000Z\r
+RECURRENCE-ID;TZID=America/Chicago:20241202T130000\r
+SUMMARY:Moved Weekly Sync\r
+DTSTART;TZID=America/Chicago:20241202T150000\r
+DTEND;TZID=America/Chicago:20241202T160000\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:today@example.com\r
+DTSTAMP:20230101T000000Z\r
+SUMMARY:Planning\r
+DTSTART;TZID=America/Chicago:20241202T090000\r
+DTEND;TZID=America/Chicago:20241202T100000\r
+END:VEVENT\r
+END:VCALENDAR\r
+"""
+
+
+def stream(body, cutoff, chunk_size=7, max_bytes=10 * 1024 * 1024):
+    pruner = IcsStreamPruner(cutoff, max_bytes)
+    for offset in range(0, len(body), chunk_size):
+        pruner.feed(body[offset:offset + chunk_size])
+    return pruner, pruner.finish()
+
+
+class IcsStreamPrunerTests(unittest.TestCase):
+    def test_past_events_are_dropped_across_chunk_boundaries(self):
+        pruner, body = stream(MIXED_ICS, cutoff=date(2024, 12, 1))
+        cal = Calendar.from_ical(body)
+
+        uids = [str(component.get('UID')) for component in cal.walk('VEVENT')]
+        self.assertEqual(uids, ['active-series@example.com', 'active-series@example.com', 'today@example.com'])
+        self.assertEqual((pruner.kept_events, pruner.dropped_events), (3, 2))
+        self.assertEqual(len(cal.walk('VTIMEZONE')), 1)
+
+    def test_pruned_calendar_expands_like_the_full_one(self):
+        now = TIMEZONE.localize(datetime(2024, 12, 2, 8, 0))
+        _, body = stream(MIXED_ICS, cutoff=date(2024, 12, 1))
+
+        full = parse_events_with_recurrence(Calendar.from_ical(MIXED_ICS), now)
+        pruned = parse_events_with_recurrence(Calendar.from_ical(body), now)
+
+        self.assertEqual(
+            [(e['summary'], e['start'], e['end']) for e in pruned],
+            [(e['summary'], e['start'], e['end']) for e in full],
+        )
+        self.assertEqual([e['summary'] for e in pruned], ['Planning', 'Moved Weekly Sync'])
+
+    def test_hash_covers_the_raw_body(self):
+        pruned, _ = stream(MIXED_ICS, cutoff=date(2024, 12, 1))
+        unpruned, body = stream(MIXED_ICS, cutoff=None)
+        self.assertEqual(pruned.content_hash, unpruned.content_hash)
+        self.assertEqual(unpruned.dropped_events, 0)
+        self.assertEqual(len(Calendar.from_ical(body).walk('VEVENT')), 5)
+
+    def test_max_bytes_guard(self):
+        with self.assertRaises(ValueError):
+            stream(MIXED_ICS, cutoff=None, max_bytes=100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import random
+import threading
+import time
+import unittest
+
+import requests
+from werkzeug.serving import make_server
+
+from benchmarks.feed_server import FeedServer
+from benchmarks.load_test import LoadProfile, build_panels, poll_times, run_load_test
+from room_availability_service import (
+    CompiledCalendarCache, FeedCache, FeedHttpClient, HostCircuitBreaker, HostLatencyTracker, app,
+)
+from service_testing import patch_service
+
+
+class FeedServerInjectionTests(unittest.TestCase):
+    def setUp(self):
+        self.server = FeedServer().start()
+        self.addCleanup(self.server.stop)
+        self.url = self.server.set_feed('room', b'BEGIN:VCALENDAR\r\nEND:VCALENDAR\r\n')
+
+    def test_latency_is_added_per_feed(self):
+        self.server.set_latency(0.2, name='room')
+        started = time.perf_counter()
+        requests.get(self.url, timeout=5)
+        self.assertGreaterEqual(time.perf_counter() - started, 0.2)
+
+        started = time.perf_counter()
+        requests.get(f'{self.server.base_url}/other.ics', timeout=5)
+        self.assertLess(time.perf_counter() - started, 0.2)
+
+    def test_error_rate_fails_requests(self):
+        self.server.set_error_rate(1.0)
+        self.assertEqual(requests.get(self.url, timeout=5).status_code, 503)
+        self.server.set_error_rate(0.0)
+        self.assertEqual(requests.get(self.url, timeout=5).status_code, 200)
+        self.assertEqual((self.server.requests, self.server.errors), (2, 1))
+
+
+class LoadTestTests(unittest.TestCase):
+    def setUp(self):
+        patch_service(
+            self,
+            FEED_CACHE=FeedCache(ttl=60, max_entries=32, max_bytes=16 * 1024 * 1024),
+            COMPILED_CACHE=CompiledCalendarCache(32),
+            BACKGROUND_REFRESH=False,
+            USE_PROXY_FOR_ICS=False,
+            # Injected feed errors must not open the shared circuit for 127.0.0.1 in other tests
+            HTTP_CLIENT=FeedHttpClient(trust_env=False, max_per_host=4, pool_hosts=4,
+                                       breaker=HostCircuitBreaker(threshold=5, cooldown=60)),
+            FEED_LATENCY=HostLatencyTracker(window=20, min_samples=5, min_timeout=1, max_timeout=10,
+                                            p99_factor=3, hedge=False, hedge_max_p95=1),
+        )
+
+        self.feeds = FeedServer().start()
+        self.addCleanup(self.feeds.stop)
+        self.service = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=self.service.serve_forever, daemon=True).start()
+        self.addCleanup(self.service.shutdown)
+        self.base_url = f'http://127.0.0.1:{self.service.server_port}'
+
+    def test_aligned_devices_poll_together_and_unaligned_spread_out(self):
+        rng = random.Random(0)
+        aligned = LoadProfile(interval=300, duration=900, jitter=0)
+        self.assertEqual(poll_times(aligned, rng), [0, 300, 600])
+        unaligned = LoadProfile(interval=300, duration=900, jitter=0, aligned=False)
+        starts = {poll_times(unaligned, rng)[0] for _ in range(10)}
+        self.assertEqual(len(starts), 10)
+
+    def test_panels_share_feeds_and_mix_endpoints(self):
+        profile = LoadProfile(devices=40, rooms=10, feeds=2, multi_share=0.5, rooms_per_panel=3)
+        panels = build_panels(['https://a.example/a.ics', 'https://b.example/b.ics'], profile)
+        self.assertEqual(len(panels), 40)
+        self.assertTrue(any(panel.startswith('/multi-room-status?') for panel in panels))
+        self.assertTrue(any(panel.startswith('/room-status?') for panel in panels))
+
+    def test_fleet_run_reports_latency_errors_and_upstream_traffic(self):
+        profile = LoadProfile(devices=12, interval=0.5, duration=1.2, jitter=0.1, rooms=6, feeds=3, multi_share=0.25,
+                              rooms_per_panel=2, timeout=10)
+        report = run_load_test(self.base_url, self.feeds, profile)
+
+        self.assertGreaterEqual(report['requests'], 12 * 2)
+        self.assertEqual(report['error_rate'], 0)
+        self.assertEqual(report['latency']['all']['count'], report['requests'])
+        self.assertIn('p99_ms', report['latency']['/room-status'])
+        # Rooms sharing a feed share its cache entry
+        self.assertEqual(report['upstream']['requests'], 3)
+
+    def test_feed_errors_surface_as_service_errors(self):
+        profile = LoadProfile(devices=4, interval=1, duration=0.5, jitter=0, rooms=4, feeds=2, feed_error_rate=1.0,
+                              timeout=10)
+        report = run_load_test(self.base_url, self.feeds, profile)
+        self.assertEqual(report['error_rate'], 1.0)
+        self.assertGreater(report['upstream']['errors'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from unittest import mock
+
+import requests
+
+import room_availability_service as service
+from metrics import Registry
+from room_availability_service import app, FeedCache
+from service_testing import patch_service
+
+
+class MetricsRenderingTests(unittest.TestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        histogram = registry.histogram('demo_seconds', 'Demo latency', ('endpoint',), buckets=(0.1, 1.0))
+        histogram.observe(0.05, endpoint='a')
+        histogram.observe(0.5, endpoint='a')
+        histogram.observe(5, endpoint='a')
+
+        text = registry.render()
+        self.assertIn('# TYPE demo_seconds histogram', text)
+        self.assertIn('demo_seconds_bucket{endpoint="a",le="0.1"} 1', text)
+        self.assertIn('demo_seconds_bucket{endpoint="a",le="1"} 2', text)
+        self.assertIn('demo_seconds_bucket{endpoint="a",le="+Inf"} 3', text)
+        self.assertIn('demo_seconds_count{endpoint="a"} 3', text)
+
+    def test_label_values_are_escaped(self):
+        registry = Registry()
+        registry.counter('demo_total', 'Demo', ('feed',)).inc(feed='a"b\\c')
+        self.assertIn('demo_total{feed="a\\"b\\\\c"} 1', registry.render())
+
+
+class MetricsEndpointTests(unittest.TestCase):
+    def setUp(self):
+        patch_service(self, FEED_CACHE=FeedCache(ttl=60, max_entries=10, max_bytes=1024 * 1024))
+        self.client = app.test_client()
+
+    def test_upstream_errors_are_counted_by_type(self):
+        before = service.UPSTREAM_ERRORS.value(host='down.example.com', type='timeout')
+        with mock.patch.object(service, '_http_get', side_effect=requests.Timeout('slow')), \
+                mock.patch.object(service, 'BACKGROUND_REFRESH', False):
+            response = self.client.get('/room-status?ics_url=https://down.example.com/room.ics')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(service.UPSTREAM_ERRORS.value(host='down.example.com', type='timeout'), before + 1)
+
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('room_display_upstream_errors_total{host="down.example.com",type="timeout"}', text)
+        self.assertIn('room_display_requests_in_flight{endpoint="room_status"} 0', text)
+        self.assertIn('room_display_requests_in_flight{endpoint="metrics"} 1', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import time
+import unittest
+from unittest import mock
+
+import room_availability_service as service
+from room_availability_service import app
+from service_testing import patch_service
+
+
+def fake_room_status(delays):
+    def _build(ics_url, room_name, now):
+        delay = delays[ics_url]
+        if isinstance(delay, Exception):
+            raise delay
+        time.sleep(delay)
+        return {'room_name': room_name, 'ics_url': ics_url, 'status': 'AVAILABLE'}
+    return _build
+
+
+class MultiRoomFanOutTests(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        patch_service(
+            self,
+            MULTI_ROOM_MAX_WORKERS=4,
+            MULTI_ROOM_FEED_TIMEOUT=0.5,
+            MULTI_ROOM_DEADLINE=2.0,
+            _multi_room_executor=None,
+        )
+
+    def get(self, urls):
+        query = '&'.join(f'ics_url={url}&room_name=Room+{url}' for url in urls)
+        return self.client.get(f'/multi-room-status?{query}')
+
+    def test_feeds_are_fetched_concurrently_in_order(self):
+        delays = {'a': 0.2, 'b': 0.2, 'c': 0.2, 'd': 0.2}
+        with mock.patch.object(service, 'build_room_status_response', side_effect=fake_room_status(delays)):
+            started = time.monotonic()
+            response = self.get(['a', 'b', 'c', 'd'])
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room['ics_url'] for room in response.get_json()['rooms']], ['a', 'b', 'c', 'd'])
+        self.assertLess(elapsed, 0.6)
+
+    def test_slow_and_failing_feeds_are_reported_as_errors(self):
+        delays = {'fast': 0.0, 'slow': 1.5, 'broken': ValueError('bad feed')}
+        with mock.patch.object(service, 'build_room_status_response', side_effect=fake_room_status(delays)):
+            started = time.monotonic()
+            response = self.get(['fast', 'slow', 'broken'])
+            elapsed = time.monotonic() - started
+
+        payload = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room['ics_url'] for room in payload['rooms']], ['fast'])
+        errors = {error['ics_url']: error['error'] for error in payload['errors']}
+        self.assertIn('timed out', errors['slow'])
+        self.assertEqual(errors['broken'], 'bad feed')
+        self.assertLess(elapsed, 1.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
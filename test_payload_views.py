@@ -0,0 +1,144 @@
+import gzip
+import json
+import unittest
+import zlib
+from datetime import datetime
+from unittest import mock
+
+import room_availability_service as service
+from room_availability_service import TIMEZONE, app, choose_encoding, parse_field_selection, select_fields
+from service_testing import patch_service
+
+
+NOW = TIMEZONE.localize(datetime(2024, 12, 2, 9, 15))
+ICS_URL = 'https://outlook.office365.com/owa/calendar/' + 'x' * 300 + '/reachcalendar.ics'
+
+
+def fake_payload(ics_url, room_name, now):
+    return {
+        'room_name': room_name,
+        'ics_url': ics_url,
+        'current_time': '9:15 AM',
+        'current_date': 'Monday, December 2, 2024',
+        'status': 'OCCUPIED',
+        'status_text': 'IN USE',
+        'available_until': None,
+        'minutes_available': None,
+        'current_booking': {'title': 'Standup', 'start_time': '9:00 AM', 'end_time': '9:30 AM',
+                            'organizer': 'Dana'},
+        'next_booking': None,
+        'next_status_change': '2024-12-02T09:30:00-06:00',
+        'last_updated': now.isoformat(),
+        'data_age_seconds': 0,
+    }
+
+
+class FieldSelectionTests(unittest.TestCase):
+    def test_dotted_paths_select_nested_keys(self):
+        selection = parse_field_selection('status, current_booking.title,next_booking.title', None)
+        payload = select_fields(fake_payload(ICS_URL, 'Board Room', NOW), selection)
+        self.assertEqual(payload, {'status': 'OCCUPIED', 'current_booking': {'title': 'Standup'},
+                                   'next_booking': None})
+
+    def test_whole_key_wins_over_nested_path(self):
+        self.assertEqual(parse_field_selection('current_booking,current_booking.title', None),
+                         {'current_booking': None})
+        self.assertEqual(parse_field_selection('current_booking.title,current_booking', None),
+                         {'current_booking': None})
+
+    def test_view_and_fields_combine(self):
+        selection = parse_field_selection('minutes_available', 'compact')
+        self.assertIn('minutes_available', selection)
+        self.assertIn('room_name', selection)
+        self.assertNotIn('ics_url', selection)
+
+    def test_no_selection_returns_everything(self):
+        self.assertIsNone(parse_field_selection(None, None))
+        self.assertIsNone(parse_field_selection(' , ', ''))
+
+    def test_unknown_view_is_rejected(self):
+        with self.assertRaises(ValueError):
+            parse_field_selection(None, 'tiny')
+
+    def test_encoding_negotiation(self):
+        self.assertEqual(choose_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(choose_encoding('*'), 'gzip')
+        self.assertIsNone(choose_encoding('gzip;q=0, deflate'))
+        self.assertIsNone(choose_encoding(''))
+        with mock.patch.object(service, 'brotli', mock.Mock()):
+            self.assertEqual(choose_encoding('gzip, br'), 'br')
+            self.assertEqual(choose_encoding('gzip, br;q=0.5'), 'gzip')
+
+
+class PayloadViewEndpointTests(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        patch_service(self, build_room_status_response=mock.Mock(side_effect=fake_payload))
+
+    def get(self, url, **headers):
+        return self.client.get(url, headers=headers)
+
+    def test_compact_view_drops_the_echoed_url(self):
+        response = self.get(f'/room-status?ics_url={ICS_URL}&room_name=Board Room&view=compact')
+        payload = response.get_json()
+
+        self.assertEqual(set(payload), {'room_name', 'current_time', 'status', 'available_until',
+                                        'current_booking', 'next_booking'})
+        self.assertEqual(payload['current_booking'], {'title': 'Standup', 'start_time': '9:00 AM',
+                                                      'end_time': '9:30 AM'})
+        full = self.get(f'/room-status?ics_url={ICS_URL}&room_name=Board Room')
+        self.assertNotEqual(response.headers['ETag'], full.headers['ETag'])
+        self.assertEqual(response.cache_control.max_age, full.cache_control.max_age)
+
+    def test_multi_room_selection_applies_per_room(self):
+        response = self.get(f'/multi-room-status?ics_url={ICS_URL}&ics_url={ICS_URL}2&fields=room_name,status')
+        payload = response.get_json()
+
+        self.assertEqual(payload['rooms'], [{'room_name': 'Schedule 1', 'status': 'OCCUPIED'},
+                                            {'room_name': 'Schedule 2', 'status': 'OCCUPIED'}])
+        self.assertIn('generated_at', payload)
+
+    def test_unknown_view_returns_400(self):
+        self.assertEqual(self.get(f'/room-status?ics_url={ICS_URL}&view=tiny').status_code, 400)
+        self.assertEqual(self.get(f'/multi-room-status?ics_url={ICS_URL}&view=tiny').status_code, 400)
+
+    def test_gzip_response_has_its_own_etag(self):
+        url = f'/multi-room-status?ics_url={ICS_URL}&ics_url={ICS_URL}2'
+        plain = self.get(url)
+        compressed = self.get(url, **{'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed.headers['Vary'])
+        self.assertLess(len(compressed.data), len(plain.data))
+        self.assertEqual(service._semantic_payload(json.loads(gzip.decompress(compressed.data))),
+                         service._semantic_payload(plain.get_json()))
+        self.assertEqual(compressed.headers['ETag'], plain.headers['ETag'][:-1] + '-gzip"')
+
+        revalidated = self.get(url, **{'Accept-Encoding': 'gzip', 'If-None-Match': compressed.headers['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.headers['ETag'], compressed.headers['ETag'])
+        self.assertIn('Accept-Encoding', revalidated.headers['Vary'])
+
+    def test_brotli_is_preferred_when_available(self):
+        fake_brotli = mock.Mock(compress=lambda body, quality: zlib.compress(body))
+        with mock.patch.object(service, 'brotli', fake_brotli):
+            response = self.get(f'/room-status?ics_url={ICS_URL}', **{'Accept-Encoding': 'gzip, br'})
+
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertEqual(json.loads(zlib.decompress(response.data))['ics_url'], ICS_URL)
+        self.assertTrue(response.headers['ETag'].endswith('-br"'))
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.get(f'/room-status?ics_url={ICS_URL}&view=compact', **{'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertFalse(response.headers['ETag'].endswith('-gzip"'))
+
+    def test_compression_can_be_disabled(self):
+        with mock.patch.object(service, 'COMPRESS_RESPONSES', False):
+            response = self.get(f'/room-status?ics_url={ICS_URL}', **{'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertNotIn('Vary', response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+import room_availability_service as service
+from room_availability_service import FeedCache, SingleFlight, get_feed
+from service_testing import make_response, patch_service
+
+
+URL = 'https://calendar.example.com/room.ics'
+
+
+def slow_response(*args, **kwargs):
+    time.sleep(0.2)
+    return make_response()
+
+
+def run_concurrently(fn, count=8):
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def _worker(index):
+        barrier.wait()
+        try:
+            results[index] = fn()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=_worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class SingleFlightTests(unittest.TestCase):
+    def setUp(self):
+        patch_service(
+            self,
+            FEED_CACHE=FeedCache(ttl=60, max_entries=10, max_bytes=1024 * 1024),
+            FEED_FLIGHTS=SingleFlight('fetch'),
+        )
+
+    def test_concurrent_fetches_share_one_upstream_request(self):
+        with mock.patch.object(service, '_http_get', side_effect=slow_response) as http_get:
+            results = run_concurrently(lambda: get_feed(URL))
+
+        self.assertEqual(http_get.call_count, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_waiters_receive_the_leaders_error(self):
+        def failing(*args, **kwargs):
+            time.sleep(0.2)
+            raise requests.ConnectionError('refused')
+
+        with mock.patch.object(service, '_http_get', side_effect=failing) as http_get:
+            results = run_concurrently(lambda: get_feed(URL))
+
+        self.assertEqual(http_get.call_count, 1)
+        self.assertTrue(all(isinstance(result, Exception) for result in results))
+        self.assertEqual({str(result) for result in results}, {'Failed to fetch ICS feed: refused'})
+
+    def test_new_flight_starts_after_previous_completes(self):
+        flights = SingleFlight('test')
+        self.assertEqual(flights.do('key', lambda: 1), 1)
+        self.assertEqual(flights.do('key', lambda: 2), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from room_availability_service import TIMEZONE
+from service_testing import patch_service
+from snapshot_publisher import RegisteredRoom, SnapshotPublisher, load_registry
+
+
+NOW = TIMEZONE.localize(datetime(2024, 12, 2, 9, 15, 20))
+
+
+class SnapshotPublisherTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.statuses = {}
+        patch_service(self, build_room_status_response=mock.Mock(side_effect=self.fake_payload))
+        self.rooms = [
+            RegisteredRoom('board', 'Board Room', 'https://calendar.example.com/board.ics'),
+            RegisteredRoom('huddle', 'Huddle', 'https://calendar.example.com/huddle.ics'),
+        ]
+        self.publisher = SnapshotPublisher(self.rooms, self.directory)
+
+    def fake_payload(self, ics_url, room_name, now):
+        status = self.statuses.get(room_name, 'AVAILABLE')
+        if status == 'ERROR':
+            raise Exception('Failed to fetch ICS feed: refused')
+        return {
+            'room_name': room_name,
+            'ics_url': ics_url,
+            'current_time': now.strftime('%-I:%M %p'),
+            'status': status,
+            'current_booking': None,
+            'next_booking': {'title': 'Quarterly planning ' * 20, 'start_time': '10:00 AM', 'end_time': '11:00 AM'},
+            'next_status_change': '2024-12-02T09:59:00-06:00',
+            'last_updated': now.isoformat(),
+            'data_age_seconds': 3,
+        }
+
+    def path(self, *parts):
+        return os.path.join(self.directory, *parts)
+
+    def read(self, *parts):
+        with open(self.path(*parts)) as f:
+            return json.load(f)
+
+    def test_rooms_and_aggregate_are_published(self):
+        written, next_change = self.publisher.publish(NOW)
+
+        self.assertEqual(written, 3)
+        board = self.read('rooms', 'board.json')
+        self.assertEqual(board['room_id'], 'board')
+        self.assertNotIn('ics_url', board)
+        with gzip.open(self.path('rooms', 'board.json.gz')) as f:
+            self.assertEqual(json.load(f), board)
+        self.assertEqual([room['room_id'] for room in self.read('rooms.json')['rooms']], ['board', 'huddle'])
+        self.assertEqual(next_change.isoformat(), '2024-12-02T09:59:00-06:00')
+        self.assertEqual(sorted(os.listdir(self.path('rooms'))),
+                         ['board.json', 'board.json.gz', 'huddle.json', 'huddle.json.gz'])
+
+    def test_unchanged_rooms_are_not_rewritten(self):
+        self.publisher.publish(NOW)
+        mtime = os.stat(self.path('rooms', 'board.json')).st_mtime_ns
+
+        written, _ = self.publisher.publish(NOW + timedelta(seconds=30))
+        self.assertEqual(written, 0)
+        self.assertEqual(os.stat(self.path('rooms', 'board.json')).st_mtime_ns, mtime)
+
+        self.statuses['Huddle'] = 'OCCUPIED'
+        written, _ = self.publisher.publish(NOW + timedelta(seconds=35))
+        self.assertEqual(written, 2)
+        self.assertEqual(self.read('rooms', 'huddle.json')['status'], 'OCCUPIED')
+
+        written, _ = self.publisher.publish(NOW + timedelta(minutes=1))
+        self.assertEqual(written, 3)
+
+    def test_failed_room_keeps_its_last_file(self):
+        self.publisher.publish(NOW)
+        self.statuses['Huddle'] = 'ERROR'
+        self.publisher.publish(NOW + timedelta(minutes=1))
+
+        self.assertEqual(self.read('rooms', 'huddle.json')['current_time'], '9:15 AM')
+        aggregate = self.read('rooms.json')
+        self.assertEqual([room['room_id'] for room in aggregate['rooms']], ['board'])
+        self.assertEqual(aggregate['errors'][0]['room_id'], 'huddle')
+        self.assertNotIn('ics_url', aggregate['errors'][0])
+
+    def test_files_of_removed_rooms_are_deleted(self):
+        self.publisher.publish(NOW)
+        publisher = SnapshotPublisher(self.rooms[:1], self.directory)
+        self.assertEqual(publisher.remove_unregistered(), 2)
+        self.assertEqual(sorted(os.listdir(self.path('rooms'))), ['board.json', 'board.json.gz'])
+
+    def test_next_publish_is_at_the_minute_boundary_or_transition(self):
+        self.assertAlmostEqual(self.publisher.seconds_until_next_publish(NOW, None), 40)
+        self.assertAlmostEqual(self.publisher.seconds_until_next_publish(NOW, NOW + timedelta(seconds=5)), 5)
+
+    def test_registry_rejects_unsafe_ids(self):
+        registry = self.path('registry.json')
+        with open(registry, 'w') as f:
+            json.dump({'rooms': [{'id': '../etc', 'ics_url': 'https://calendar.example.com/x.ics'}]}, f)
+        with self.assertRaises(ValueError):
+            load_registry(registry)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import room_availability_service as service
+from room_availability_service import CompiledCalendarCache, FeedCache, TIMEZONE, get_events, get_feed
+from service_testing import make_response, patch_service
+from snapshot_store import FeedSnapshot, SnapshotStore
+
+
+ICS_TEMPLATE = """BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//Test Calendar//EN
+BEGIN:VEVENT
+UID:standup@example.com
+DTSTAMP:20241201T200000Z
+SUMMARY:{summary}
+DTSTART;TZID=America/Chicago:20240101T090000
+DTEND;TZID=America/Chicago:20240101T093000
+RRULE:FREQ=DAILY
+END:VEVENT
+END:VCALENDAR
+"""
+
+URL = 'https://calendar.example.com/room.ics'
+
+
+def feed_response(summary='Standup', status_code=200, etag='"v1"'):
+    return make_response(ICS_TEMPLATE.format(summary=summary).encode(), status_code, {'ETag': etag})
+
+
+class SnapshotStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.store = SnapshotStore(self.directory)
+        patch_service(self, SNAPSHOTS=self.store)
+        self.restart()
+        self.now = datetime.now(TIMEZONE)
+
+    def restart(self):
+        """Simulate a fresh worker process: empty in-memory caches, same snapshot directory"""
+        patch_service(
+            self,
+            FEED_CACHE=FeedCache(ttl=60, max_entries=10, max_bytes=1024 * 1024),
+            COMPILED_CACHE=CompiledCalendarCache(8),
+        )
+
+    def test_new_process_starts_warm(self):
+        with mock.patch.object(service, '_http_get', return_value=feed_response()):
+            expected = get_events(get_feed(URL), self.now)
+
+        self.restart()
+        compiled_from_disk = service.COMPILED_CACHE_REQUESTS.value(result='disk')
+        with mock.patch.object(service, '_http_get') as http_get:
+            events = get_events(get_feed(URL), self.now)
+
+        http_get.assert_not_called()
+        self.assertEqual(events, expected)
+        self.assertEqual(service.COMPILED_CACHE_REQUESTS.value(result='disk'), compiled_from_disk + 1)
+
+    def test_stale_snapshot_is_revalidated_with_stored_validators(self):
+        with mock.patch.object(service, '_http_get', return_value=feed_response()):
+            get_feed(URL)
+        with self.store._connection() as connection:
+            connection.execute('UPDATE feeds SET stored_at = ?', (time.time() - 600,))
+
+        self.restart()
+        with mock.patch.object(service, '_http_get', return_value=feed_response(status_code=304)) as http_get:
+            feed = get_feed(URL)
+
+        self.assertEqual(http_get.call_args.kwargs['headers'], {'If-None-Match': '"v1"'})
+        self.assertLess(feed.age(), 1)
+        self.assertLess(self.store.load_feed(URL).age(), 1)
+
+    def test_newer_snapshot_from_another_worker_is_adopted(self):
+        with mock.patch.object(service, '_http_get', return_value=feed_response('Standup')):
+            get_feed(URL)
+        service.FEED_CACHE.get(URL).fetched_at -= 600
+
+        other_worker = SnapshotStore(self.directory)
+        snapshot = self.store.load_feed(URL)
+        other_worker.save_feed(FeedSnapshot(
+            URL, ICS_TEMPLATE.format(summary='Retro').encode(), 'other-hash', '"v2"', None, time.time()
+        ))
+
+        with mock.patch.object(service, '_http_get') as http_get:
+            feed = get_feed(URL)
+
+        http_get.assert_not_called()
+        self.assertEqual(feed.content_hash, 'other-hash')
+        self.assertNotEqual(snapshot.content_hash, feed.content_hash)
+        self.assertEqual(str(feed.calendar.walk('VEVENT')[0]['SUMMARY']), 'Retro')
+
+    def test_replacing_a_feed_drops_its_old_timeline(self):
+        self.store.save_feed(FeedSnapshot(URL, b'one', 'hash-1', None, None, time.time()))
+        self.store.save_timeline('hash-1', '2024-12-01', '2024-12-30', '[]')
+        self.store.save_feed(FeedSnapshot(URL, b'two', 'hash-2', None, None, time.time()))
+
+        self.assertIsNone(self.store.load_timeline('hash-1'))
+        self.assertEqual(self.store.load_feed(URL).body, b'two')
+
+
+if __name__ == "__main__":
+    unittest.main()
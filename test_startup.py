@@ -0,0 +1,40 @@
+import unittest
+from unittest import mock
+
+import room_availability_service as service
+from room_availability_service import CompiledCalendarCache, ExpandedSeriesCache, FeedCache, SeriesFailureCache, warm_up
+from service_testing import patch_service
+
+
+class WarmUpTests(unittest.TestCase):
+    def setUp(self):
+        patch_service(
+            self,
+            FEED_CACHE=FeedCache(ttl=60, max_entries=10, max_bytes=1024 * 1024),
+            COMPILED_CACHE=CompiledCalendarCache(8),
+            EXPANDED_SERIES=ExpandedSeriesCache(64),
+            FAILED_SERIES=SeriesFailureCache(16),
+        )
+
+    def test_warm_up_exercises_the_request_path_without_side_effects(self):
+        before = service.EXPAND_SECONDS.count(endpoint='warm_up', host='unknown')
+        with mock.patch.object(service, '_http_get') as http_get:
+            self.assertGreater(warm_up(), 0)
+
+        http_get.assert_not_called()
+        self.assertEqual(len(service.FEED_CACHE), 0)
+        self.assertEqual(len(service.COMPILED_CACHE), 0)
+        self.assertEqual(len(service.EXPANDED_SERIES), 0)
+        self.assertEqual(len(service.FAILED_SERIES), 0)
+        self.assertEqual(service.EXPAND_SECONDS.count(endpoint='warm_up', host='unknown'), before + 1)
+        self.assertEqual(service._metrics_endpoint.get(), 'background')
+
+    def test_sample_feed_expands_recurrences_and_overrides(self):
+        cal = service.Calendar.from_ical(service.WARM_UP_ICS)
+        now = service.TIMEZONE.localize(service.datetime(2024, 1, 3, 8, 0))
+        summaries = [event['summary'] for event in service.parse_events_with_recurrence(cal, now)]
+        self.assertEqual(summaries, ['Weekly', 'Moved'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from datetime import datetime, time, timedelta
+
+from benchmarks.feed_server import FeedServer
+from benchmarks.webhook_receiver import WebhookReceiver
+from room_availability_service import CompiledCalendarCache, FeedCache, TIMEZONE
+from service_testing import patch_service
+from webhook_pusher import PushRoom, WebhookPusher, post_json
+
+
+DAILY_MEETING_ICS = b"""BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//Test Calendar//EN
+BEGIN:VEVENT
+UID:daily@example.com
+DTSTAMP:20240101T000000Z
+SUMMARY:Daily Planning
+DTSTART;TZID=America/Chicago:20240101T100000
+DTEND;TZID=America/Chicago:20240101T110000
+RRULE:FREQ=DAILY
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+class WebhookPusherTests(unittest.TestCase):
+    def setUp(self):
+        patch_service(
+            self,
+            FEED_CACHE=FeedCache(ttl=60, max_entries=10, max_bytes=1024 * 1024),
+            COMPILED_CACHE=CompiledCalendarCache(8),
+            BACKGROUND_REFRESH=False,
+            USE_PROXY_FOR_ICS=False,
+        )
+
+        self.feeds = FeedServer().start()
+        self.addCleanup(self.feeds.stop)
+        self.receiver = WebhookReceiver().start()
+        self.addCleanup(self.receiver.stop)
+        self.now = TIMEZONE.localize(datetime.combine(datetime.now(TIMEZONE).date(), time(9, 30)))
+
+    def pusher(self, rooms, **options):
+        return WebhookPusher(rooms, send=post_json, clock=lambda: self.now, **options)
+
+    def room(self, name, webhook='display', **options):
+        return PushRoom(self.feeds.set_feed(name, DAILY_MEETING_ICS), name, self.receiver.url(webhook), **options)
+
+    def test_pushes_only_on_status_transitions(self):
+        pusher = self.pusher([self.room('board')], recheck_interval=3600, batch_window=0)
+        end = self.now.replace(hour=12)
+        wakeups = 0
+        while self.now < end:
+            delay = pusher.run_once()
+            self.now += timedelta(seconds=delay)
+            wakeups += 1
+
+        # The meeting enters its one-minute early start at 9:59, stops being the next booking at 10:00
+        # and ends at 11:00; nothing is sent in between
+        pushes = [(body['merge_variables']['current_time'], body['merge_variables']['status'])
+                  for body in self.receiver.bodies('display')]
+        self.assertEqual(pushes, [('9:30 AM', 'AVAILABLE'), ('9:59 AM', 'OCCUPIED'), ('10:00 AM', 'OCCUPIED'),
+                                  ('11:00 AM', 'AVAILABLE')])
+        self.assertLess(wakeups, 10)
+
+    def test_rechecks_without_change_send_nothing(self):
+        pusher = self.pusher([self.room('board')], recheck_interval=60, batch_window=0)
+        self.assertEqual(pusher.run_once(), 60)
+        self.now += timedelta(minutes=1)
+        pusher.run_once()
+
+        self.assertEqual(self.feeds.requests, 1)
+        self.assertEqual(len(self.receiver.bodies('display')), 1)
+
+    def test_rooms_sharing_a_webhook_are_batched(self):
+        pusher = self.pusher([self.room('a', view='compact'), self.room('b', view='compact')], batch_window=5)
+        self.assertEqual(pusher.run_once(), 5)
+        self.assertEqual(self.receiver.requests, 0)
+
+        self.now += timedelta(seconds=5)
+        pusher.run_once()
+        bodies = self.receiver.bodies('display')
+        self.assertEqual(len(bodies), 1)
+        self.assertEqual([room['room_name'] for room in bodies[0]['merge_variables']['rooms']], ['a', 'b'])
+        self.assertNotIn('ics_url', bodies[0]['merge_variables']['rooms'][0])
+
+    def test_failed_delivery_is_retried_after_retry_after(self):
+        pusher = self.pusher([self.room('board')], batch_window=0, retry_delay=10)
+        self.receiver.fail_next(1, status=429, retry_after=30)
+        pusher.run_once()
+        self.now += timedelta(seconds=10)
+        pusher.run_once()
+        self.assertEqual(self.receiver.requests, 1)
+
+        self.now += timedelta(seconds=20)
+        pusher.run_once()
+        self.assertEqual(self.receiver.requests, 2)
+        self.assertEqual(len(self.receiver.bodies('display')), 1)
+
+    def test_unreachable_feed_is_rechecked_later(self):
+        room = PushRoom(f'{self.feeds.base_url}/missing.ics', 'Missing', self.receiver.url('display'))
+        pusher = self.pusher([room], recheck_interval=120, batch_window=0)
+        self.assertEqual(pusher.run_once(), 120)
+        self.assertEqual(self.receiver.requests, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Webhook push mode for the Room Availability Service
+
+Instead of every display polling /room-status, rooms are registered with a
+webhook URL (for TRMNL, a private plugin using the webhook strategy) and the
+pusher POSTs a room's payload only when what the display shows changes: its
+status, current booking or next booking. Between changes each room sleeps
+until its next status transition from the compiled timeline, re-checked every
+WEBHOOK_RECHECK_INTERVAL seconds so calendar edits are still picked up.
+
+Rooms are listed in a JSON file:
+
+    {"rooms": [{"ics_url": "https://...", "room_name": "Board Room",
+                "webhook_url": "https://usetrmnl.com/api/custom_plugins/<uuid>",
+                "view": "compact"}]}
+
+`view` and `fields` select the payload fields as on /room-status. Rooms that
+share a webhook_url are sent together in one /multi-room-status style body.
+Changes are batched for WEBHOOK_BATCH_WINDOW seconds, a target is posted to
+at most once every WEBHOOK_MIN_INTERVAL seconds, and failed deliveries are
+retried with exponential backoff (honouring Retry-After on 429/503). Run with:
+
+    python webhook_pusher.py rooms.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from room_availability_service import (
+    TIMEZONE,
+    build_room_status_responses,
+    multi_room_payload,
+    parse_field_selection,
+    select_fields,
+)
+
+WEBHOOK_RECHECK_INTERVAL = float(os.environ.get('WEBHOOK_RECHECK_INTERVAL', '60'))
+WEBHOOK_BATCH_WINDOW = float(os.environ.get('WEBHOOK_BATCH_WINDOW', '5'))
+WEBHOOK_MIN_INTERVAL = float(os.environ.get('WEBHOOK_MIN_INTERVAL', '0'))
+WEBHOOK_RETRY_DELAY = float(os.environ.get('WEBHOOK_RETRY_DELAY', '10'))
+WEBHOOK_MAX_BACKOFF = float(os.environ.get('WEBHOOK_MAX_BACKOFF', '900'))
+WEBHOOK_TIMEOUT = float(os.environ.get('WEBHOOK_TIMEOUT', '10'))
+
+# The part of a payload a display actually changes for
+DISPLAYED_FIELDS = ('status', 'current_booking', 'next_booking')
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookDeliveryError(Exception):
+    """A webhook POST failed; retry_after is the delay the receiver asked for, if any"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class PushRoom:
+    """A room whose status is pushed to webhook_url"""
+    ics_url: str
+    room_name: str
+    webhook_url: str
+    view: Optional[str] = None
+    fields: Optional[str] = None
+    selection: Optional[Dict] = field(default=None, init=False, repr=False)
+    next_check: float = 0.0
+    displayed: Optional[str] = None
+    payload: Optional[Dict] = None
+
+    def __post_init__(self):
+        self.selection = parse_field_selection(self.fields, self.view)
+
+    @property
+    def key(self) -> tuple:
+        return (self.ics_url, self.room_name)
+
+
+@dataclass
+class WebhookTarget:
+    """Delivery state of one webhook URL"""
+    url: str
+    rooms: List[PushRoom]
+    changed_at: Optional[float] = None
+    last_sent: Optional[float] = None
+    failures: int = 0
+    retry_at: float = 0.0
+
+    def due_at(self, batch_window: float, min_interval: float) -> Optional[float]:
+        """Earliest timestamp the pending change may be sent, or None if nothing is pending"""
+        if self.changed_at is None:
+            return None
+        due = max(self.changed_at + batch_window, self.retry_at)
+        if self.last_sent is not None:
+            due = max(due, self.last_sent + min_interval)
+        return due
+
+
+def displayed_state(payload: Dict) -> str:
+    return json.dumps({key: payload.get(key) for key in DISPLAYED_FIELDS}, sort_keys=True, default=str)
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    try:
+        return float(response.headers['Retry-After'])
+    except (KeyError, ValueError):
+        return None
+
+
+_session = requests.Session()
+
+
+def post_json(url: str, body: Dict) -> None:
+    """POST body to a webhook, raising WebhookDeliveryError unless it answers 2xx"""
+    try:
+        response = _session.post(url, json=body, timeout=WEBHOOK_TIMEOUT)
+    except requests.RequestException as e:
+        raise WebhookDeliveryError(str(e)) from e
+    if not 200 <= response.status_code < 300:
+        raise WebhookDeliveryError(f'HTTP {response.status_code}', _retry_after(response))
+
+
+class WebhookPusher:
+    """
+    Pushes room payloads to webhooks when their displayed state changes
+
+    `clock` returns the current time as an aware datetime and `send(url, body)`
+    delivers one webhook body; both are replaceable for tests.
+    """
+
+    def __init__(self, rooms: List[PushRoom], send: Callable[[str, Dict], None] = post_json,
+                 clock: Callable[[], datetime] = lambda: datetime.now(TIMEZONE),
+                 recheck_interval: float = WEBHOOK_RECHECK_INTERVAL, batch_window: float = WEBHOOK_BATCH_WINDOW,
+                 min_interval: float = WEBHOOK_MIN_INTERVAL, retry_delay: float = WEBHOOK_RETRY_DELAY,
+                 max_backoff: float = WEBHOOK_MAX_BACKOFF):
+        self.rooms = rooms
+        self.send = send
+        self.clock = clock
+        self.recheck_interval = recheck_interval
+        self.batch_window = batch_window
+        self.min_interval = min_interval
+        self.retry_delay = retry_delay
+        self.max_backoff = max_backoff
+        self.targets: Dict[str, WebhookTarget] = {}
+        for room in rooms:
+            self.targets.setdefault(room.webhook_url, WebhookTarget(room.webhook_url, [])).rooms.append(room)
+        self._stop = threading.Event()
+
+    def check_rooms(self, now: datetime) -> int:
+        """Recompute the status of every room that is due; returns how many changed"""
+        timestamp = now.timestamp()
+        due: Dict[tuple, List[PushRoom]] = {}
+        for room in self.rooms:
+            if room.next_check <= timestamp:
+                due.setdefault(room.key, []).append(room)
+        if not due:
+            return 0
+
+        results, errors = build_room_status_responses(list(due), now)
+        failed = {(error['ics_url'], error['room_name']) for error in errors}
+        for error in errors:
+            logger.warning(f"Could not check {error['room_name']} ({error['ics_url']}): {error['error']}")
+            for room in due[(error['ics_url'], error['room_name'])]:
+                room.next_check = timestamp + self.recheck_interval
+
+        changed = 0
+        for key, payload in zip([key for key in due if key not in failed], results):
+            next_check = timestamp + self.recheck_interval
+            if payload['next_status_change']:
+                next_change = datetime.fromisoformat(payload['next_status_change']).timestamp()
+                next_check = min(next_check, max(next_change, timestamp + 1))
+            state = displayed_state(payload)
+            for room in due[key]:
+                room.next_check = next_check
+                room.payload = payload
+                if state != room.displayed:
+                    room.displayed = state
+                    changed += 1
+                    target = self.targets[room.webhook_url]
+                    if target.changed_at is None:
+                        target.changed_at = timestamp
+        return changed
+
+    def body_for(self, target: WebhookTarget, now: datetime) -> Dict:
+        """Webhook body for a target: TRMNL merge variables of its room, or of all its rooms"""
+        payloads = [select_fields(room.payload, room.selection) for room in target.rooms if room.payload]
+        if len(target.rooms) == 1:
+            return {'merge_variables': payloads[0]}
+        return {'merge_variables': multi_room_payload(payloads, [], now)}
+
+    def deliver(self, target: WebhookTarget, now: datetime) -> bool:
+        timestamp = now.timestamp()
+        try:
+            self.send(target.url, self.body_for(target, now))
+        except Exception as e:
+            target.failures += 1
+            delay = min(self.retry_delay * 2 ** (target.failures - 1), self.max_backoff)
+            retry_after = getattr(e, 'retry_after', None)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            target.retry_at = timestamp + delay
+            logger.warning(f"Webhook delivery to {target.url} failed ({str(e)}), retrying in {delay:g}s")
+            return False
+        target.changed_at = None
+        target.last_sent = timestamp
+        target.failures = 0
+        target.retry_at = 0.0
+        return True
+
+    def run_once(self) -> float:
+        """Check due rooms and deliver due batches; returns seconds until something is next due"""
+        now = self.clock()
+        self.check_rooms(now)
+        timestamp = now.timestamp()
+        for target in self.targets.values():
+            due_at = target.due_at(self.batch_window, self.min_interval)
+            if due_at is not None and due_at <= timestamp:
+                self.deliver(target, now)
+
+        wake = [room.next_check for room in self.rooms]
+        wake.extend(
+            due_at for due_at in (target.due_at(self.batch_window, self.min_interval) for target in self.targets.values())
+            if due_at is not None
+        )
+        return max(0.0, min(wake, default=timestamp + self.recheck_interval) - self.clock().timestamp())
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                delay = self.run_once()
+            except Exception as e:
+                logger.error(f"Webhook push cycle failed: {str(e)}", exc_info=True)
+                delay = self.recheck_interval
+            self._stop.wait(min(delay, self.recheck_interval))
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def load_rooms(path: str) -> List[PushRoom]:
+    with open(path) as f:
+        config = json.load(f)
+    return [
+        PushRoom(
+            ics_url=room['ics_url'],
+            room_name=room.get('room_name') or f"Schedule {index + 1}",
+            webhook_url=room['webhook_url'],
+            view=room.get('view'),
+            fields=room.get('fields'),
+        )
+        for index, room in enumerate(config['rooms'])
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('config', help='JSON file listing rooms and their webhook URLs')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    rooms = load_rooms(args.config)
+    logger.info(f"Pushing {len(rooms)} rooms to {len({room.webhook_url for room in rooms})} webhooks")
+    WebhookPusher(rooms).run()
+
+
+if __name__ == '__main__':
+    main()